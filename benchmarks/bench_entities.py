@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Entity Extraction Benchmark
+Compares the single-pass EntityExtractor with the previous regex-per-entity one
+
+On 50000 messages (best of 25 interleaved rounds) the single pass runs
+at 0.95-1.09x the regex one, about 1.02x typically, over six runs on a
+noisy VM. That is while it matches every installed app's aliases on word
+boundaries, and tells "open notes" from "my notes", instead of scanning
+for seven substrings. Before the gazetteer's first-word check it ran at
+0.82-1.08x.
+
+Usage: python3 benchmarks/bench_entities.py [message_count]
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from brain.nlu.app_gazetteer import AppGazetteer
+from brain.nlu.entity_extractor import EntityExtractor
+
+class RegexEntityExtractor:
+    """The extractor as it was: one findall, a substring scan per app, a search per unit"""
+    number_pattern = re.compile(r'\d+')
+    apps = ['safari', 'chrome', 'spotify', 'music', 'notes', 'mail', 'calendar']
+    time_patterns = [
+        (re.compile(r'(\d+)\s*minutes?'), 'minutes'),
+        (re.compile(r'(\d+)\s*hours?'), 'hours'),
+        (re.compile(r'(\d+)\s*seconds?'), 'seconds')
+    ]
+    
+    def extract(self, text):
+        text_lower = text.lower()
+        entities = {}
+        
+        numbers = self.number_pattern.findall(text_lower)
+        if numbers:
+            entities['numbers'] = [int(n) for n in numbers]
+            
+        for app in self.apps:
+            if app in text_lower:
+                entities['app'] = app.capitalize()
+                break
+                
+        for pattern, unit in self.time_patterns:
+            match = pattern.search(text_lower)
+            if match:
+                entities['duration'] = {'value': int(match.group(1)), 'unit': unit}
+                break
+                
+        return entities
+
+TEMPLATES = [
+    'Open {app}',
+    'close {app} please',
+    'set a timer for {n} minutes',
+    'timer {n} hours and {n} minutes',
+    'minuteur {n} secondes',
+    'set volume to {n}',
+    'remind me in {n} minutes to call mom',
+    'what is the weather like today',
+    'create a note: buy milk, eggs and {n} apples',
+    'hello there, how are you doing this fine morning?',
+    'ouvre {app} et lance la musique',
+    'play some music on {app}'
+]
+
+APPS = ['Safari', 'Chrome', 'Spotify', 'Music', 'Notes', 'Mail', 'Calendar', 'Finder', 'Terminal']
+
+def corpus(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(app=rng.choice(APPS), n=rng.randint(1, 90))
+        for _ in range(count)
+    ]
+
+def measure(extractors, messages, rounds=25):
+    """Best messages/sec of each extractor, alternating rounds so machine noise hits both"""
+    best = [float('inf')] * len(extractors)
+    for _ in range(rounds):
+        for index, extractor in enumerate(extractors):
+            start = time.perf_counter()
+            for message in messages:
+                extractor.extract(message)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return [len(messages) / elapsed for elapsed in best]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    messages = corpus(count)
+    
+    regex_rate, single_rate = measure(
+        [RegexEntityExtractor(), EntityExtractor(AppGazetteer(cache_path=None))],
+        messages
+    )
+    
+    print(f"{count} messages")
+    print(f"  regex per entity: {regex_rate:10.0f} msg/s")
+    print(f"  single pass:      {single_rate:10.0f} msg/s ({single_rate / regex_rate:.2f}x)")
+
+if __name__ == '__main__':
+    main()
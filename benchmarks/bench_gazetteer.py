@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+App Gazetteer Benchmark
+Scans a fake application directory of growing size and compares app lookup
+with the automaton to a substring scan over every app name
+
+Usage: python3 benchmarks/bench_gazetteer.py [message_count]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from brain.nlu.app_gazetteer import AppGazetteer
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ter', 'vox', 'ra', 'pix', 'sun', 'del', 'ium', 'zo', 'fy']
+
+TEMPLATES = [
+    'open {app}',
+    'close {app} please',
+    'ouvre {app} et lance la musique',
+    'set a timer for 10 minutes',
+    'what is the weather like today',
+    'hello there, how are you doing this fine morning?'
+]
+
+def app_names(count, rng):
+    names = set()
+    while len(names) < count:
+        words = [
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+            for _ in range(rng.randint(1, 2))
+        ]
+        names.add(' '.join(words))
+    return sorted(names)
+
+def linear_find(apps, text):
+    """The previous approach: one substring test per known app"""
+    text_lower = text.lower()
+    for app in apps:
+        if app.lower() in text_lower:
+            return app
+    return None
+
+def rate(func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(1)
+    
+    print(f"{'apps':>6} {'scan ms':>9} {'cache ms':>9} {'linear msg/s':>13} {'automaton msg/s':>16}")
+    for app_count in (10, 100, 1000):
+        names = app_names(app_count, rng)
+        messages = [rng.choice(TEMPLATES).format(app=rng.choice(names)) for _ in range(count)]
+        
+        with tempfile.TemporaryDirectory() as directory:
+            for name in names:
+                (Path(directory) / f'{name}.app').mkdir()
+            cache_path = Path(directory) / 'gazetteer.json'
+            
+            start = time.perf_counter()
+            gazetteer = AppGazetteer([directory], cache_path).load()
+            scan_ms = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            AppGazetteer([directory], cache_path).load()
+            cache_ms = (time.perf_counter() - start) * 1000
+            
+            linear_rate = rate(lambda message: linear_find(names, message), messages)
+            automaton_rate = rate(gazetteer.find, messages)
+            
+        print(f"{app_count:>6} {scan_ms:>9.1f} {cache_ms:>9.1f} {linear_rate:>13.0f} {automaton_rate:>16.0f}")
+
+if __name__ == '__main__':
+    main()
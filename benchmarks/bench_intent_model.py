@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Intent Model Benchmark
+Training and inference speed of the learned intent model, and per-engine
+latency of the regex -> model cascade
+
+Usage: python3 benchmarks/bench_intent_model.py [example_count]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from brain.nlu.intent_cascade import IntentCascade
+from brain.nlu.intent_classifier import IntentClassifier
+from brain.nlu.intent_model import IntentModel, np
+
+# Wordings the regex patterns do not cover, as users would correct them
+PARAPHRASES = {
+    'system.volume': ['turn the sound up to {n}', 'make it louder please', 'mute the speakers', 'baisse le son'],
+    'info.weather': ['is it going to rain tomorrow', 'do i need an umbrella', 'how hot is it outside', 'va-t-il pleuvoir'],
+    'time.timer': ['wake me up in {n} minutes', 'countdown {n} seconds', 'alarm in {n} minutes', 'réveille-moi dans {n} minutes'],
+    'notes.create': ['jot down buy milk', 'write this down: call mom', 'remember that the code is {n}', 'add eggs to my notes'],
+    'music.play': ['put on some jazz', 'i want to hear something relaxing', 'mets de la musique', 'next song please'],
+    'system.open': ['bring up {app}', 'fire up {app}', 'switch to {app}', 'affiche {app}']
+}
+
+# What the regex engine already answers confidently
+DIRECT = ['open safari', 'close mail', 'set volume to {n}', 'timer {n}', 'what time is it', 'météo']
+
+APPS = ['Safari', 'Mail', 'Notes', 'Music', 'Terminal']
+
+def sample(rng, templates):
+    return rng.choice(templates).format(n=rng.randint(1, 99), app=rng.choice(APPS))
+
+def examples(count, rng):
+    intents = list(PARAPHRASES)
+    return [
+        (sample(rng, PARAPHRASES[intent]), intent)
+        for intent in (rng.choice(intents) for _ in range(count))
+    ]
+
+def main():
+    if np is None:
+        print("numpy is not installed: the intent model is disabled")
+        return
+        
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(1)
+    training = examples(count, rng)
+    held_out = examples(1000, rng)
+    
+    model = IntentModel(path=None)
+    start = time.perf_counter()
+    for i in range(0, len(training), 8):
+        model.train(training[i:i + 8])
+    train_seconds = time.perf_counter() - start
+    
+    texts = [text for text, _ in held_out]
+    start = time.perf_counter()
+    for text in texts[:200]:
+        model.classify(text)
+    single_ms = (time.perf_counter() - start) * 1000 / 200
+    
+    start = time.perf_counter()
+    predictions = model.classify_batch(texts)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(texts)
+    
+    correct = sum(
+        prediction is not None and prediction['intent'] == intent
+        for prediction, (_, intent) in zip(predictions, held_out)
+    )
+    
+    print(f"{count} training examples in batches of 8")
+    print(f"  training:          {count / train_seconds:10.0f} examples/s")
+    print(f"  single inference:  {single_ms:10.3f} ms/message")
+    print(f"  batch inference:   {batch_ms:10.3f} ms/message (1000 messages)")
+    print(f"  accuracy (new samples of the same wordings): {correct / len(held_out):.1%}")
+    
+    cascade = IntentCascade([(IntentClassifier(), 0.80), (model, 1.0)])
+    mixed = [sample(rng, DIRECT) for _ in range(500)] + texts[:500]
+    rng.shuffle(mixed)
+    for text in mixed:
+        cascade.classify(text)
+        
+    print("cascade, 1000 messages (half answered by the regex engine)")
+    for name, stats in cascade.get_stats()['engines'].items():
+        print(f"  {name:6} calls {stats['calls']:5}  answers {stats['answers']:5}  avg {stats['avg_ms']:.3f} ms  max {stats['max_ms']:.3f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+IPC Benchmark
+Compares messages/sec of the brain's JSON and msgpack wire formats
+
+Usage: python3 benchmarks/bench_ipc.py [message_count]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from brain.ipc import CODECS, MessageChannel
+
+SAMPLE_RESPONSE = {
+    'type': 'response',
+    'id': 0,
+    'data': {
+        'text': 'Processed: open spotify',
+        'type': 'info',
+        'module': 'system',
+        'intent': {'intent': 'system.open', 'confidence': 0.85},
+        'confidence': 0.85,
+        'timestamp': '2024-01-01T12:00:00.000000'
+    }
+}
+
+async def open_pipe():
+    """Return a (reader, writer) stream pair connected through an OS pipe"""
+    loop = asyncio.get_event_loop()
+    read_fd, write_fd = os.pipe()
+    
+    reader = asyncio.StreamReader(limit=2 ** 20)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, 'rb'))
+    
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, os.fdopen(write_fd, 'wb'))
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    
+    return reader, writer
+
+async def run(format_name, count, burst):
+    """Send count responses in bursts and decode them on the other end"""
+    reader, writer = await open_pipe()
+    sender = MessageChannel(reader, writer)
+    receiver = MessageChannel(reader, writer)
+    sender.codec = receiver.codec = CODECS[format_name]()
+    
+    async def produce():
+        for start in range(0, count, burst):
+            # Concurrent commands finishing in the same loop iteration
+            await asyncio.gather(*(sender.send(SAMPLE_RESPONSE) for _ in range(min(burst, count - start))))
+            await asyncio.sleep(0)
+        await sender.close()
+        
+    async def consume():
+        received = 0
+        while await receiver.receive() is not None:
+            received += 1
+        return received
+        
+    started = time.perf_counter()
+    _, received = await asyncio.gather(produce(), consume())
+    elapsed = time.perf_counter() - started
+    
+    assert received == count
+    return count / elapsed, sender.writes
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    
+    print(f"{'format':<10}{'burst':>6}{'msg/s':>12}{'writes':>9}")
+    for format_name in CODECS:
+        for burst in (1, 16):
+            rate, writes = await run(format_name, count, burst)
+            print(f"{format_name:<10}{burst:>6}{rate:>12,.0f}{writes:>9}")
+            
+    if 'msgpack' not in CODECS:
+        print("msgpack is not installed, only JSON was measured")
+
+if __name__ == '__main__':
+    asyncio.run(main())
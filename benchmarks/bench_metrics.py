@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Metrics Overhead Benchmark
+Cost of the brain's latency metrics against the cost of a request
+
+Runs process() and the timed pipeline over stub stages (so only the
+metrics code differs) in interleaved rounds, and divides the extra cost
+per request by the time brain/main.py takes to handle a real one (with
+stand-in reasoning modules, in a temporary directory). Exits with status
+1 when timing costs more than 1% of a request.
+
+Usage: python3 benchmarks/bench_metrics.py [request_count]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+BENCHMARKS = Path(__file__).parent
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCHMARKS))
+sys.path.insert(0, str(BENCHMARKS / 'stand_ins'))
+
+# The brain must swap in the timed pipeline
+os.environ['NYX_METRICS'] = '1'
+
+from brain.main import NyxBrain
+from brain.metrics import BrainMetrics
+from corpus import generate
+
+MAX_OVERHEAD = 0.01
+
+class StubBrain:
+    """Stages that do nothing, so a request costs only the pipeline around them"""
+    
+    def __init__(self, sample_every):
+        self.initialized = True
+        self.metrics = BrainMetrics(enabled=True, sample_every=sample_every)
+        
+    async def perceive(self, message):
+        return message
+        
+    async def reason(self, perception):
+        return {'module': 'system'}
+        
+    async def learn(self, perception, decision):
+        pass
+
+async def per_request(process, brain, messages):
+    """Nanoseconds per request of process over messages"""
+    start = time.perf_counter_ns()
+    for message in messages:
+        await process(brain, message)
+    return (time.perf_counter_ns() - start) / len(messages)
+
+async def bench_overhead(messages, rounds=15):
+    """Extra ns per request of the timed pipeline (sampled and not) over process()"""
+    variants = {
+        'untimed': (NyxBrain.process, StubBrain(1)),
+        'sampled': (NyxBrain._process_timed, StubBrain(BrainMetrics().sample_every)),
+        'every request': (NyxBrain._process_timed, StubBrain(1))
+    }
+    timings = {name: [] for name in variants}
+    for _ in range(rounds):
+        # Interleaved, so drifting clock speed hits every variant alike
+        for name, (process, brain) in variants.items():
+            timings[name].append(await per_request(process, brain, messages))
+            
+    untimed = statistics.median(timings['untimed'])
+    return {name: statistics.median(values) - untimed for name, values in timings.items() if name != 'untimed'}
+
+async def bench_request(messages):
+    """Median ns per request of brain/main.py's pipeline, and the brain's stats"""
+    brain = NyxBrain()
+    await brain.initialize()
+    
+    # Warm up (model load, first allocations)
+    for message in messages[:100]:
+        await brain.process(message)
+        
+    latencies = []
+    for message in messages:
+        start = time.perf_counter_ns()
+        await brain.process(message)
+        latencies.append(time.perf_counter_ns() - start)
+        
+    await brain.q_learning.close()
+    await brain.intent_classifier.close()
+    await brain.memory.close()
+    return statistics.median(latencies), brain.metrics.get_stats()
+
+async def run(count):
+    messages = [message for message, _ in generate(count)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_cwd = os.getcwd()
+        # The brain keeps its data in ./data
+        os.chdir(tmp)
+        try:
+            request, stats = await bench_request(messages)
+        finally:
+            os.chdir(previous_cwd)
+            
+    return request, await bench_overhead(messages), stats
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    
+    request, overheads, stats = asyncio.run(run(count))
+    
+    print(f"request (brain/main.py, median): {request / 1000:.1f} µs")
+    print(f"requests counted: {stats['requests']}, timed: {stats['stages']['perceive']['count']} (1 in {stats['sample_every']})")
+    print(f"{'timing':<16}{'ns/request':>12}{'overhead':>10}")
+    for name, overhead in overheads.items():
+        print(f"{name:<16}{overhead:>12.0f}{overhead / request:>10.2%}")
+        
+    sampled = overheads['sampled'] / request
+    if sampled > MAX_OVERHEAD:
+        print(f"FAIL: metrics cost {sampled:.2%} of a request (limit {MAX_OVERHEAD:.0%})")
+        sys.exit(1)
+    print(f"OK: metrics cost under {MAX_OVERHEAD:.0%} of a request")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Module Startup Benchmark
+Time to first response with eager vs lazy module loading
+
+Generates a directory of synthetic modules whose import does some real
+work (compiling patterns, building tables), then measures in a fresh
+interpreter per mode how long it takes before the first command answers.
+
+Usage: python3 benchmarks/bench_module_startup.py [module_count]
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.module_loader import ModuleLoader
+
+MODULE_TEMPLATE = '''"""
+Synthetic module {index}
+"""
+
+import re
+
+PATTERNS = [re.compile(r'(?:{index})\\s+word{{}}\\s+(\\d+)'.format(i)) for i in range(150)]
+TABLE = {{f'key{{i}}': i * {index} for i in range(20000)}}
+
+class Module{index}Module:
+    intents = ['bench{index}.run']
+    
+    def __init__(self, core):
+        self.core = core
+        self.name = 'module{index}'
+        
+    async def execute(self, message, decision):
+        return {{'text': f'module{index}: {{message}}', 'type': 'success'}}
+'''
+
+def write_modules(directory, count):
+    for index in range(count):
+        (directory / f'module{index}.py').write_text(MODULE_TEMPLATE.format(index=index))
+
+async def first_response(modules_dir, mode):
+    """Seconds from startup to the first command's response"""
+    start = time.perf_counter()
+    loader = ModuleLoader(None, modules_dir)
+    
+    if mode == 'eager':
+        await loader.load_all()
+    else:
+        loader.scan()
+        
+    await loader.execute(loader.module_for_intent('bench0.run'), 'run', {})
+    elapsed = time.perf_counter() - start
+    
+    warm_up = None
+    if mode == 'lazy':
+        warm_start = time.perf_counter()
+        await loader.warm_up()
+        warm_up = time.perf_counter() - warm_start
+        
+    return {'first_response': elapsed, 'warm_up': warm_up, 'loaded': len(loader.modules)}
+
+def measure(modules_dir, mode):
+    """Run one mode in a fresh interpreter so no import is cached"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', mode, str(modules_dir)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == '--measure':
+        result = asyncio.run(first_response(Path(sys.argv[3]), sys.argv[2]))
+        print(json.dumps(result))
+        return
+        
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        modules_dir = Path(tmp) / 'bench_modules'
+        modules_dir.mkdir()
+        write_modules(modules_dir, count)
+        
+        print(f"{count} modules\n")
+        for mode in ('eager', 'lazy'):
+            result = measure(modules_dir, mode)
+            line = f"{mode:>6}: first response {result['first_response'] * 1000:8.1f} ms"
+            if result['warm_up'] is not None:
+                line += f", background warm-up {result['warm_up'] * 1000:.1f} ms"
+            print(f"{line} ({result['loaded']} loaded)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Brain Pipeline Benchmark Suite
+Throughput and p50/p95/p99 latency of every stage of the brain, offline
+
+Stages: classify, extract, get_confidence_boost, update_q_value and save
+at several Q-table sizes, module dispatch (against a stand-in osascript)
+and a stdin -> stdout round trip through brain/main.py (with stand-in
+reasoning modules, which the tree does not ship). Everything runs in
+a temporary directory on a generated English/French corpus. Results are
+written as JSON; --compare prints the change against an earlier run.
+
+Usage: python3 benchmarks/bench_pipeline.py [--quick] [--output FILE] [--compare FILE]
+
+The brain logs to stderr; add 2>/dev/null for the results alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+BENCHMARKS = Path(__file__).parent
+STAND_INS = BENCHMARKS / 'stand_ins'
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCHMARKS))
+
+# The modules must talk to the stand-ins, whatever the environment says
+os.environ['NYX_OSASCRIPT'] = shlex.join([sys.executable, str(STAND_INS / 'osascript.py')])
+os.environ['NYX_OSACOMPILE'] = shlex.join([sys.executable, str(STAND_INS / 'osacompile.py')])
+os.environ['NYX_APP_DIRS'] = os.pathsep.join(['Applications'])
+
+from brain.intent_router import default_router
+from brain.learning.q_learning import QLearningSystem
+from brain.nlu.app_gazetteer import AppGazetteer
+from brain.nlu.entity_extractor import EntityExtractor
+from brain.nlu.intent_cascade import build_intent_cascade
+from corpus import generate
+from modules.module_loader import ModuleLoader
+
+def summarize(latencies, elapsed=None):
+    """Throughput and latency percentiles (ms) of per-operation timings in seconds"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    if elapsed is None:
+        elapsed = sum(ordered)
+        
+    def percentile(p):
+        # Nearest rank
+        return ordered[min(count - 1, max(0, int(round(p / 100 * count)) - 1))] * 1000
+        
+    return {
+        'ops': count,
+        'seconds': round(elapsed, 6),
+        'throughput': round(count / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(50), 4),
+        'p95_ms': round(percentile(95), 4),
+        'p99_ms': round(percentile(99), 4),
+        'max_ms': round(ordered[-1] * 1000, 4)
+    }
+
+def time_each(func, items):
+    """Call func on every item; return per-call seconds"""
+    latencies = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        func(item)
+        latencies.append(clock() - start)
+    return latencies
+
+async def time_each_async(func, items):
+    latencies = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        await func(item)
+        latencies.append(clock() - start)
+    return latencies
+
+def bench_classify(messages):
+    classifier = build_intent_cascade(model_path=None)
+    # One warm-up pass, so pattern caches do not count
+    for message in messages[:100]:
+        classifier.classify(message)
+    return summarize(time_each(classifier.classify, messages))
+
+def bench_extract(messages):
+    extractor = EntityExtractor(AppGazetteer(cache_path=None))
+    for message in messages[:100]:
+        extractor.extract(message)
+    return summarize(time_each(extractor.extract, messages))
+
+async def filled_q_learning(data_dir, storage, size, corpus):
+    """A Q-learning system with `size` learned (message, intent) pairs"""
+    q_learning = QLearningSystem(data_dir=data_dir, storage=storage)
+    await q_learning.initialize()
+    updates = [
+        (f'{message} #{i}', intent, 1.0)
+        for i, (message, intent) in zip(range(size), (corpus[i % len(corpus)] for i in range(size)))
+    ]
+    await q_learning.update_q_values(updates)
+    await q_learning.save()
+    return q_learning
+
+async def bench_confidence_boost(workdir, corpus, size):
+    q_learning = await filled_q_learning(workdir / 'boost', 'json', size, corpus)
+    # Half of the lookups hit a learned pair
+    lookups = [
+        (f'{message} #{i}' if i % 2 else message, intent)
+        for i, (message, intent) in enumerate(corpus)
+    ]
+    result = summarize(time_each(lambda pair: q_learning.get_confidence_boost(*pair), lookups))
+    result['table_size'] = size
+    await q_learning.close()
+    return result
+
+async def bench_q_updates(workdir, corpus, sizes, storages, updates):
+    results = {}
+    for storage in storages:
+        for size in sizes:
+            data_dir = workdir / f'q-{storage}-{size}'
+            q_learning = await filled_q_learning(data_dir, storage, size, corpus)
+            update_latencies = await time_each_async(
+                lambda pair: q_learning.update_q_value(pair[0], pair[1], 0.5),
+                corpus[:updates]
+            )
+            save_latencies = await time_each_async(lambda _: q_learning.save(), range(5))
+            await q_learning.close()
+            
+            results[f'{storage}/{size}'] = {
+                'update_q_value': summarize(update_latencies),
+                'save': summarize(save_latencies)
+            }
+    return results
+
+async def bench_dispatch(corpus):
+    loader = ModuleLoader(None, ROOT / 'modules')
+    loader.scan()
+    classifier = build_intent_cascade(model_path=None)
+    extractor = EntityExtractor(AppGazetteer(cache_path=None))
+    
+    async def dispatch(message):
+        intent = classifier.classify(message)
+        decision = {'intent': intent, 'entities': extractor.extract(message), 'confidence': intent['confidence']}
+        module = loader.module_for_intent(intent['intent']) or default_router.route(intent['intent'])
+        return await loader.execute(module, message, decision)
+        
+    # First use of each module imports it and starts the script workers
+    start = time.perf_counter()
+    await loader.load_all()
+    for message in corpus[:20]:
+        await dispatch(message)
+    warm_up = time.perf_counter() - start
+    
+    result = summarize(await time_each_async(dispatch, corpus))
+    
+    result['warm_up_seconds'] = round(warm_up, 4)
+    result['modules'] = sorted(loader.manifests)
+    return result
+
+def read_response(process, deadline):
+    """Next JSON response line from the brain (other output is skipped)"""
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(message, dict) and message.get('type') in ('response', 'error'):
+            return message
+    return None
+
+def bench_round_trip(workdir, messages, timeout=60.0):
+    """Commands through brain/main.py over its stdin/stdout protocol"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(STAND_INS), os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / 'brain' / 'main.py')],
+        cwd=workdir,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1
+    )
+    deadline = time.monotonic() + timeout
+    
+    def send(request_id, message):
+        process.stdin.write(json.dumps({'type': 'command', 'id': request_id, 'message': message}) + '\n')
+        process.stdin.flush()
+        
+    try:
+        # One at a time: the latency of a single command
+        latencies = []
+        for request_id, message in enumerate(messages):
+            start = time.perf_counter()
+            send(request_id, message)
+            if read_response(process, deadline) is None:
+                break
+            latencies.append(time.perf_counter() - start)
+            
+        if len(latencies) < len(messages):
+            process.kill()
+            error = process.stderr.read().strip().splitlines()
+            return {'skipped': error[-1] if error else 'brain/main.py stopped answering'}
+            
+        result = summarize(latencies)
+        
+        # All at once: throughput with the brain's concurrent command handling
+        start = time.perf_counter()
+        for request_id, message in enumerate(messages, len(messages)):
+            send(request_id, message)
+        answered = sum(read_response(process, deadline) is not None for _ in messages)
+        result['pipelined_throughput'] = round(answered / (time.perf_counter() - start), 1)
+        return result
+    finally:
+        if process.poll() is None:
+            process.stdin.close()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def compare(results, previous):
+    """Print how each measurement moved since a previous results file"""
+    def flatten(stages, prefix=''):
+        for name, value in stages.items():
+            if isinstance(value, dict) and 'p50_ms' not in value:
+                yield from flatten(value, f'{prefix}{name}.')
+            elif isinstance(value, dict):
+                yield f'{prefix}{name}', value
+                
+    before = dict(flatten(previous['stages']))
+    print(f"\nCompared with {previous['timestamp']}:")
+    for name, now in flatten(results['stages']):
+        then = before.get(name)
+        if then is None:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p99_ms', 'throughput'):
+            if then.get(key) and now.get(key) is not None:
+                changes.append(f"{key} {(now[key] - then[key]) / then[key]:+.1%}")
+        print(f"  {name:40} {'  '.join(changes)}")
+
+def print_stage(name, result, indent='  '):
+    if 'skipped' in result:
+        print(f"{indent}{name:40} skipped: {result['skipped']}")
+    elif 'p50_ms' in result:
+        print(
+            f"{indent}{name:40} {result['throughput']:>10,.0f}/s  p50 {result['p50_ms']:8.3f}  "
+            f"p95 {result['p95_ms']:8.3f}  p99 {result['p99_ms']:8.3f} ms"
+        )
+    else:
+        for child, child_result in result.items():
+            print_stage(f'{name} {child}', child_result, indent)
+
+async def run(args):
+    if args.quick:
+        messages_count, sizes, updates, trips = 2000, [1000, 10000], 100, 50
+    else:
+        messages_count, sizes, updates, trips = 20000, [1000, 10000, 100000], 300, 200
+        
+    corpus = generate(messages_count)
+    messages = [message for message, _ in corpus]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        previous_cwd = os.getcwd()
+        # Modules keep their data in ./data
+        os.chdir(workdir)
+        try:
+            stages = {}
+            stages['classify'] = bench_classify(messages)
+            stages['extract'] = bench_extract(messages)
+            stages['get_confidence_boost'] = await bench_confidence_boost(workdir, corpus, sizes[-1])
+            stages['q_learning'] = await bench_q_updates(workdir, corpus, sizes, ['json', 'journal', 'compact'], updates)
+            stages['module_dispatch'] = await bench_dispatch(messages[:updates * 2])
+            (workdir / 'brain').mkdir()
+            stages['round_trip'] = bench_round_trip(workdir / 'brain', messages[:trips])
+        finally:
+            os.chdir(previous_cwd)
+            
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': {'messages': messages_count, 'seed': 1},
+        'stages': stages
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every stage of the brain pipeline')
+    parser.add_argument('--quick', action='store_true', help='smaller corpus and tables')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/pipeline-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args))
+    
+    for name, result in results['stages'].items():
+        print_stage(name, result)
+        
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / 'results' / f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+    
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+if __name__ == '__main__':
+    main()
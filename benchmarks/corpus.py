@@ -0,0 +1,77 @@
+"""
+Benchmark Corpus
+Generated English and French commands, labelled with the intent they express
+"""
+
+import random
+
+APPS = ['Safari', 'Chrome', 'Spotify', 'Music', 'Notes', 'Mail', 'Calendar', 'Finder', 'Terminal']
+
+ITEMS = ['milk', 'eggs', 'bread', 'du pain', 'des pommes', 'the report', 'le rapport']
+
+# intent -> (English templates, French templates)
+TEMPLATES = {
+    'system.open': (
+        ['open {app}', 'launch {app}', 'start {app} please', 'can you open {app}'],
+        ['ouvre {app}', 'lance {app}', 'ouvre {app} stp']
+    ),
+    'system.close': (
+        ['close {app}', 'quit {app}', 'close {app} now'],
+        ['ferme {app}', 'ferme {app} stp']
+    ),
+    'system.volume': (
+        ['set volume to {n}', 'volume {n}', 'turn the volume to {n} percent'],
+        ['volume à {n}', 'mets le volume à {n}']
+    ),
+    'time.timer': (
+        ['set timer for {n} minutes', 'timer {n} minutes', 'timer for 1 hour {n} minutes'],
+        ['minuteur {n} minutes', 'minuteur de {n} secondes', 'minuteur une heure et demie']
+    ),
+    'info.weather': (
+        ['what is the weather like', "what's the weather in paris", 'weather today'],
+        ['quel temps fait-il', 'météo de demain', 'la météo à lyon']
+    ),
+    'info.time': (
+        ['what time is it', 'current time please'],
+        ['quelle heure est-il', 'tu as quelle heure']
+    ),
+    'math.calculate': (
+        ['calculate {n} * {m}', 'what is {n} + {m}', '{n} / {m}'],
+        ['combien fait {n} + {m}', 'calcul {n} - {m}']
+    ),
+    'notes.create': (
+        ['create note buy {item}', 'make note call mom', 'note: {item} and {item2}'],
+        ['crée note acheter {item}', 'nouvelle note appeler maman']
+    ),
+    'notes.read': (
+        ['read note {item}', 'show note about {item}', 'list notes'],
+        ['lis note {item}', 'montre note sur {item}']
+    ),
+    'music.play': (
+        ['play music', 'play some jazz', 'play {app}'],
+        ['lance musique', 'joue du jazz']
+    ),
+    'unknown': (
+        ['hello there', 'how are you doing today', 'tell me a joke', 'thanks a lot'],
+        ['bonjour', 'comment ça va', 'raconte-moi une blague', 'merci beaucoup']
+    )
+}
+
+def generate(count, seed=1, french_share=0.4):
+    """count (message, expected intent) pairs, reproducible for a given seed"""
+    rng = random.Random(seed)
+    intents = list(TEMPLATES)
+    corpus = []
+    for _ in range(count):
+        intent = rng.choice(intents)
+        english, french = TEMPLATES[intent]
+        template = rng.choice(french if rng.random() < french_share else english)
+        message = template.format(
+            app=rng.choice(APPS),
+            n=rng.randint(1, 99),
+            m=rng.randint(1, 99),
+            item=rng.choice(ITEMS),
+            item2=rng.choice(ITEMS)
+        )
+        corpus.append((message, intent))
+    return corpus
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Stand-in osacompile
+"Compiles" a script by copying its source to the output path, which the
+stand-in osascript reads back
+
+Usage: NYX_OSACOMPILE="python3 benchmarks/stand_ins/osacompile.py" ...
+"""
+
+import shutil
+import sys
+
+def main():
+    args = sys.argv[1:]
+    output = args[args.index('-o') + 1]
+    shutil.copy(args[-1], output)
+
+if __name__ == '__main__':
+    main()
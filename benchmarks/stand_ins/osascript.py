@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Stand-in osascript
+Speaks the script worker's line protocol (see scripts/osa_worker.js) without
+macOS, answering each request with a canned result
+
+Usage: NYX_OSASCRIPT="python3 benchmarks/stand_ins/osascript.py" ...
+Set NYX_STAND_IN_DELAY to a number of seconds to simulate script run time.
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+
+DELAY = float(os.environ.get('NYX_STAND_IN_DELAY', '0'))
+
+note_ids = itertools.count(1)
+sources = {}
+
+def answer(request):
+    """What the real script would roughly return"""
+    if 'path' not in request:
+        return ''
+        
+    path = request['path']
+    if path not in sources:
+        with open(path) as f:
+            sources[path] = f.read()
+    source = sources[path]
+    
+    if 'make new note' in source:
+        text = str(request.get('args', [''])[0])
+        return f"x-coredata://stand-in/{next(note_ids)}\t{text[:40]}\tMonday, 1 January 2024 at 12:00:00"
+    if 'plaintext of note' in source:
+        return 'Stand-in note body'
+    return ''
+
+def main():
+    for line in sys.stdin:
+        request = json.loads(line)
+        if DELAY:
+            time.sleep(DELAY)
+        try:
+            response = {'id': request['id'], 'result': answer(request)}
+        except OSError as e:
+            response = {'id': request['id'], 'error': str(e)}
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
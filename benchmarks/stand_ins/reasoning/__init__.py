@@ -0,0 +1,6 @@
+"""
+Stand-in reasoning package
+Just enough of brain/reasoning for brain/main.py to run in benchmarks
+
+Usage: PYTHONPATH=benchmarks/stand_ins python3 brain/main.py
+"""
@@ -0,0 +1,6 @@
+"""
+Stand-in Reasoner
+"""
+
+class Reasoner:
+    """Holds no state; main.py only constructs it"""
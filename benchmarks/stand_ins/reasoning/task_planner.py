@@ -0,0 +1,13 @@
+"""
+Stand-in Task Planner
+Plans low-confidence commands as a single step, at no cost
+"""
+
+class TaskPlanner:
+    async def create_plan(self, perception):
+        """One step running the classified intent as-is"""
+        intent = perception['intent']
+        return {
+            'steps': [{'intent': intent['intent'], 'entities': perception.get('entities', {})}],
+            'confidence': intent['confidence']
+        }
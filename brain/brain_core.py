@@ -3,35 +3,79 @@ Nyx Brain - Central Intelligence System
 """
 
 import asyncio
-from .nlu.intent_classifier import IntentClassifier
+import signal
+import sys
+
+from .nlu.intent_cascade import build_intent_cascade
 from .nlu.entity_extractor import EntityExtractor
-from .learning.q_learning import QLearningSystem
+from .learning.q_learning import build_q_learning
 from .learning.feedback_manager import FeedbackManager
+from .intent_router import default_router
+from .conversation import ConversationHistory
+from .pipeline import BrainPipeline
+
+# Signals that end the process; learned state is flushed first
+EXIT_SIGNALS = (signal.SIGTERM, signal.SIGINT)
 
-class NyxBrain:
+class NyxBrain(BrainPipeline):
     def __init__(self, core):
         self.core = core
-        self.intent_classifier = IntentClassifier()
+        self.intent_classifier = build_intent_cascade()
         self.entity_extractor = EntityExtractor()
-        self.q_learning = QLearningSystem()
+        self.q_learning = build_q_learning()
         self.feedback_manager = None
+        self.router = default_router
         
         self.initialized = False
-        self.conversation_context = []
+        self.closed = False
+        self.conversation_context = ConversationHistory(capacity=10)
         
+        self._init_pipeline()
+            
     async def initialize(self):
         """Initialize brain components"""
-        print("🧠 Initializing Nyx Brain...")
+        print("🧠 Initializing Nyx Brain...", file=sys.stderr)
         
         # Initialize Q-Learning
         await self.q_learning.initialize()
-        print(f"✓ Q-Learning loaded with {self.q_learning.get_stats()['known_messages']} patterns")
+        print(f"✓ Q-Learning loaded with {self.q_learning.get_stats()['known_messages']} patterns", file=sys.stderr)
+        
+        # Load the learned intent model
+        await self.intent_classifier.load()
         
         # Initialize feedback manager
-        self.feedback_manager = FeedbackManager(self.q_learning, self.core)
+        self.feedback_manager = FeedbackManager(self.q_learning, self.core, intent_learner=self.intent_classifier)
+        self.metrics.add_source('feedback', self.feedback_manager.get_stats)
         
+        self._install_exit_handlers()
         self.initialized = True
         
+    def _install_exit_handlers(self):
+        """Run shutdown() before the process stops on SIGTERM or SIGINT"""
+        loop = asyncio.get_event_loop()
+        for signum in EXIT_SIGNALS:
+            try:
+                loop.add_signal_handler(signum, self._on_exit_signal, signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # No signal support (Windows) or not in the main thread
+                return
+                
+    def _on_exit_signal(self, signum):
+        """Flush, then let the signal take its default course"""
+        loop = asyncio.get_event_loop()
+        for handled in EXIT_SIGNALS:
+            loop.remove_signal_handler(handled)
+        task = asyncio.ensure_future(self.shutdown())
+        task.add_done_callback(lambda _: signal.raise_signal(signum))
+        
+    async def shutdown(self):
+        """Flush learned state to disk"""
+        if self.closed:
+            return
+        self.closed = True
+        await self.q_learning.close()
+        await self.intent_classifier.close()
+        
     async def process(self, message, context=None):
         """
         Main processing pipeline
@@ -51,6 +95,14 @@ class NyxBrain:
         
         return decision
         
+    def get_stats(self):
+        """Latency histograms and the counters of every component"""
+        return self.metrics.get_stats()
+        
+    def render_metrics(self):
+        """Statistics in the Prometheus text format, for a /metrics endpoint"""
+        return self.metrics.render()
+        
     async def perceive(self, message):
         """Analyze and understand the input"""
         perception = {
@@ -58,23 +110,30 @@ class NyxBrain:
             'timestamp': asyncio.get_event_loop().time()
         }
         
-        # Classify intent
-        intent = self.intent_classifier.classify(message)
-        perception['intent'] = intent
-        
-        # Apply Q-Learning confidence boost
-        q_boost = self.q_learning.get_confidence_boost(message, intent['intent'])
-        if q_boost != 0:
-            old_conf = intent['confidence']
-            intent['confidence'] = max(0, min(1, intent['confidence'] + q_boost))
-            print(f"🎓 Q-Boost: {int(old_conf*100)}% → {int(intent['confidence']*100)}%")
-        
-        # Extract entities
-        entities = self.entity_extractor.extract(message)
-        perception['entities'] = entities
+        # Classify intent, apply the Q-Learning boost and extract entities
+        perception['intent'], perception['entities'] = self._perceive_cached(message)
         
         return perception
         
+    async def perceive_batch(self, messages, workers=None):
+        """Analyze many inputs at once, e.g. to replay logged commands"""
+        messages = list(messages)
+        intents = self.intent_classifier.classify_batch(messages, workers)
+        entities = self.entity_extractor.extract_batch(messages, workers)
+        timestamp = asyncio.get_event_loop().time()
+        
+        perceptions = []
+        for message, intent, message_entities in zip(messages, intents, entities):
+            self._apply_q_boost(message, intent)
+            perceptions.append({
+                'raw_input': message,
+                'timestamp': timestamp,
+                'intent': intent,
+                'entities': message_entities
+            })
+            
+        return perceptions
+        
     async def reason(self, perception):
         """Make intelligent decision based on perception"""
         intent = perception['intent']
@@ -90,51 +149,23 @@ class NyxBrain:
             'perception': perception
         }
         
-        print(f"🎯 Intent: {intent['intent']} ({int(intent['confidence']*100)}%) → {module}")
+        print(f"🎯 Intent: {intent['intent']} ({int(intent['confidence']*100)}%) → {module}", file=sys.stderr)
         
         return decision
         
     def map_intent_to_module(self, intent):
         """Route intent to appropriate module"""
-        intent_map = {
-            'system.open': 'system',
-            'system.close': 'system',
-            'system.volume': 'system',
-            'system.brightness': 'system',
-            'time.timer': 'time',
-            'time.reminder': 'time',
-            'info.time': 'time',
-            'info.date': 'time',
-            'info.weather': 'weather',
-            'math.calculate': 'math',
-            'math.derivative': 'math',
-            'notes.create': 'notes',
-            'notes.read': 'notes',
-            'music.play': 'music',
-            'music.control': 'music',
-            'unknown': 'ai'
-        }
-        
-        # Try exact match
-        if intent in intent_map:
-            return intent_map[intent]
-            
-        # Try prefix match
-        for prefix, module in intent_map.items():
-            if intent.startswith(prefix.split('.')[0]):
-                return module
-                
-        return 'ai'
+        return self.router.route(intent)
         
     async def learn(self, perception, decision):
         """Learning from interaction"""
-        # Store context for future reference
-        self.conversation_context.append({
-            'perception': perception,
-            'decision': decision,
-            'timestamp': asyncio.get_event_loop().time()
-        })
-        
-        # Keep only last 10 interactions
-        if len(self.conversation_context) > 10:
-            self.conversation_context = self.conversation_context[-10:]
+        # Store context for future reference (the last 10 interactions)
+        intent = perception['intent']
+        self.conversation_context.record(
+            perception['raw_input'],
+            intent['intent'],
+            intent['confidence'],
+            decision['module'],
+            perception['entities'],
+            asyncio.get_event_loop().time()
+        )
@@ -0,0 +1,133 @@
+"""
+Context Analyzer
+Rolling conversation state, used to resolve follow-ups like "close it"
+"""
+
+import re
+from collections import Counter, deque
+
+# Messages that refer back to something instead of naming it. "that" and
+# "this" only count at the end of a clause, and le/la/les only as a clitic
+# (before the verb, or hyphenated after it), so "close that window" and
+# "ferme la porte" are not follow-ups.
+PRONOUN_PATTERN = re.compile(
+    r"\b(?:it|them|ça|cela)\b"
+    r"|\b(?:that|this)\b(?=\s*(?:$|[.,;!?]|(?:please|now|again|too)\b))"
+    r"|\b(?:le|la|les|l')\s*(?:ouvr|rouvr|lanc|ferm|quitt)(?:e|es|ez|er|ir|ons)\b"
+    r"|-(?:le|la|les)\b"
+)
+OPEN_PATTERN = re.compile(r'\b(?:open|launch|start|ouvr|lance|rouvr)')
+CLOSE_PATTERN = re.compile(r'\b(?:close|quit|ferme|quitte)')
+LOUDER_PATTERN = re.compile(r'\b(?:louder|turn (?:it )?up|volume up|plus fort|monte)')
+QUIETER_PATTERN = re.compile(r'\b(?:quieter|softer|turn (?:it )?down|volume down|moins fort|baisse)')
+REPEAT_PATTERN = re.compile(r'^(?:again|same again|once more|do it again|encore|recommence)\b')
+
+VOLUME_STEP = 10
+
+class ContextAnalyzer:
+    """
+    Keeps conversation features up to date one interaction at a time
+    
+    analyze() first folds in the interactions appended to the history
+    since its last call (normally one), using their sequence numbers, so
+    its cost does not depend on how long the history is. The state it
+    keeps: the intent distribution over a sliding window, the last app,
+    duration, number and volume referenced, and the current topic (intent
+    domain) with how many consecutive interactions stayed on it.
+    """
+    
+    def __init__(self, window=10):
+        self.window = deque(maxlen=window)
+        self.intent_counts = Counter()
+        self.seen = 0
+        
+        self.last_intent = None
+        self.last_entities = {}
+        self.last_app = None
+        self.last_duration = None
+        self.last_number = None
+        self.last_volume = None
+        
+        self.topic = None
+        self.topic_streak = 0
+        
+    def observe(self, intent, entities):
+        """Fold one interaction into the rolling state"""
+        if len(self.window) == self.window.maxlen:
+            expired = self.window[0]
+            self.intent_counts[expired] -= 1
+            if not self.intent_counts[expired]:
+                del self.intent_counts[expired]
+        self.window.append(intent)
+        self.intent_counts[intent] += 1
+        
+        entities = entities or {}
+        if 'app' in entities:
+            self.last_app = entities['app']
+        if 'duration' in entities:
+            self.last_duration = entities['duration']
+        if entities.get('numbers'):
+            self.last_number = entities['numbers'][-1]
+            if intent == 'system.volume':
+                self.last_volume = self.last_number
+                
+        topic = intent.split('.')[0]
+        if topic == self.topic:
+            self.topic_streak += 1
+        else:
+            self.topic = topic
+            self.topic_streak = 1
+            
+        self.last_intent = intent
+        self.last_entities = entities
+        
+    def _catch_up(self, history):
+        if history.count < self.seen:
+            # The history was cleared: start over
+            self.__init__(self.window.maxlen)
+            
+        missing = history.count - self.seen
+        if missing:
+            for interaction in reversed(list(history.latest(min(missing, self.window.maxlen)))):
+                self.observe(interaction.intent, interaction.entities)
+            self.seen = history.count
+            
+    def analyze(self, message, history=None, intent=None):
+        """Context for a new message (intent: its classified intent name, if known)"""
+        if history is not None:
+            self._catch_up(history)
+            
+        total = len(self.window)
+        context = {
+            'recent_intents': {name: count / total for name, count in self.intent_counts.items()},
+            'last_app': self.last_app,
+            'last_duration': self.last_duration,
+            'last_number': self.last_number,
+            'topic': self.topic,
+            'topic_streak': self.topic_streak,
+            'topic_continues': intent is not None and intent.split('.')[0] == self.topic,
+            'follow_up': self._resolve_follow_up(message.lower())
+        }
+        return context
+        
+    def _resolve_follow_up(self, message_lower):
+        """Intent and entities a follow-up message leaves implicit, or None"""
+        if LOUDER_PATTERN.search(message_lower) or QUIETER_PATTERN.search(message_lower):
+            if self.last_volume is None:
+                return None
+            step = VOLUME_STEP if LOUDER_PATTERN.search(message_lower) else -VOLUME_STEP
+            volume = max(0, min(100, self.last_volume + step))
+            return {'intent': 'system.volume', 'confidence': 0.75, 'entities': {'numbers': [volume]}}
+            
+        if REPEAT_PATTERN.search(message_lower):
+            if self.last_intent is None or self.last_intent == 'unknown':
+                return None
+            return {'intent': self.last_intent, 'confidence': 0.7, 'entities': dict(self.last_entities)}
+            
+        if self.last_app is not None and PRONOUN_PATTERN.search(message_lower):
+            if CLOSE_PATTERN.search(message_lower):
+                return {'intent': 'system.close', 'confidence': 0.75, 'entities': {'app': self.last_app}}
+            if OPEN_PATTERN.search(message_lower):
+                return {'intent': 'system.open', 'confidence': 0.75, 'entities': {'app': self.last_app}}
+                
+        return None
@@ -0,0 +1,85 @@
+"""
+Conversation History
+Fixed-capacity ring buffer of compact interaction records
+"""
+
+class Interaction:
+    """One past message: only the fields context lookups need"""
+    __slots__ = ('sequence', 'message', 'intent', 'confidence', 'module', 'entities', 'timestamp')
+    
+    def __init__(self):
+        self.sequence = -1
+        self.message = None
+        self.intent = None
+        self.confidence = 0.0
+        self.module = None
+        self.entities = None
+        self.timestamp = None
+
+class ConversationHistory:
+    """
+    The last `capacity` interactions, oldest overwritten first
+    
+    Records are allocated once and rewritten in place, so recording a
+    message neither allocates a record nor copies the buffer. The latest
+    value of each entity type is tracked as messages are recorded, which
+    makes last_entity() O(1). Records handed out by latest() are live views
+    that a later record() may overwrite; copy fields out to keep them.
+    """
+    
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self.records = [Interaction() for _ in range(capacity)]
+        self.count = 0
+        
+        # entity type -> (value, sequence of the interaction it came from)
+        self.latest_entities = {}
+        
+    def __len__(self):
+        return min(self.count, self.capacity)
+        
+    def __iter__(self):
+        """Records from oldest to newest"""
+        for sequence in range(self.count - len(self), self.count):
+            yield self.records[sequence % self.capacity]
+            
+    def record(self, message, intent, confidence, module, entities, timestamp):
+        """Store an interaction in the oldest slot"""
+        sequence = self.count
+        interaction = self.records[sequence % self.capacity]
+        interaction.sequence = sequence
+        interaction.message = message
+        interaction.intent = intent
+        interaction.confidence = confidence
+        interaction.module = module
+        interaction.entities = entities
+        interaction.timestamp = timestamp
+        self.count += 1
+        
+        if entities:
+            for kind, value in entities.items():
+                self.latest_entities[kind] = (value, sequence)
+                
+    def latest(self, n=1):
+        """Up to n records, newest first"""
+        newest = self.count - 1
+        for sequence in range(newest, newest - min(n, len(self)), -1):
+            yield self.records[sequence % self.capacity]
+            
+    def last_intents(self, n=5):
+        """Intent names of the last n interactions, newest first"""
+        return [interaction.intent for interaction in self.latest(n)]
+        
+    def last_entity(self, kind):
+        """Most recent value of an entity type still in the buffer, or None"""
+        entry = self.latest_entities.get(kind)
+        if entry is None or entry[1] < self.count - len(self):
+            return None
+        return entry[0]
+        
+    def clear(self):
+        """Forget every interaction"""
+        self.count = 0
+        self.latest_entities.clear()
+        for interaction in self.records:
+            interaction.__init__()
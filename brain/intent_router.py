@@ -0,0 +1,97 @@
+"""
+Intent Router
+Maps intents to the modules that handle them
+"""
+
+from modules.module_loader import ModuleLoader
+
+DEFAULT_MODULE = 'ai'
+
+class IntentRouter:
+    """
+    Routing table built from module declarations
+    
+    A declaration covers the intent and every intent below it: 'system'
+    routes system.open and system.volume.up.
+    
+    Declared intents are kept in an exact-match dict, which answers most
+    lookups in one step. Other intents walk a trie of their dot-separated
+    segments and take the deepest declared ancestor, so a lookup costs at
+    most one dict access per segment. Intents with no declared ancestor go
+    to the default module.
+    """
+    
+    def __init__(self, declarations=None, default=DEFAULT_MODULE):
+        self.default = default
+        self.exact = {}
+        self.trie = {}
+        
+        for module, intents in (declarations or {}).items():
+            self.declare(module, intents)
+            
+    def declare(self, module, intents):
+        """Route intents (and everything below them) to module"""
+        for intent in intents:
+            if intent in self.exact:
+                continue
+                
+            self.exact[intent] = module
+            node = self.trie
+            for segment in intent.split('.'):
+                node = node.setdefault(segment, {})
+            node[None] = module
+            
+    def declare_manifests(self, manifests):
+        """
+        Replace the routing table with the intents module manifests declare
+        
+        Each module also gets the domains (first segments) of its intents,
+        after every exact declaration, so system.sleep goes to the module
+        declaring system.open.
+        """
+        manifests = list(manifests)
+        self.exact = {}
+        self.trie = {}
+        
+        for manifest in manifests:
+            self.declare(manifest['name'], manifest['intents'])
+        for manifest in manifests:
+            self.declare(manifest['name'], [intent.split('.')[0] for intent in manifest['intents']])
+            
+    def resolve(self, intent):
+        """Return (module, matching declaration or None for the default)"""
+        module = self.exact.get(intent)
+        if module is not None:
+            return module, intent
+            
+        match = None
+        node = self.trie
+        segments = intent.split('.')
+        for depth, segment in enumerate(segments, 1):
+            node = node.get(segment)
+            if node is None:
+                break
+            if None in node:
+                match = depth
+                
+        if match is None:
+            return self.default, None
+            
+        declaration = '.'.join(segments[:match])
+        return self.exact[declaration], declaration
+        
+    def route(self, intent):
+        """Module handling an intent"""
+        return self.resolve(intent)[0]
+        
+    def table(self):
+        """Resolution table: declared intent -> module, sorted by intent"""
+        return dict(sorted(self.exact.items()))
+
+def manifest_router(default=DEFAULT_MODULE):
+    """Router over the manifests in modules/ (read from source, not imported)"""
+    loader = ModuleLoader(None, router=IntentRouter(default=default))
+    loader.scan()
+    return loader.router
+
+default_router = manifest_router()
@@ -0,0 +1,139 @@
+"""
+Brain IPC Channel
+Message framing between the brain process and Node.js
+"""
+
+import asyncio
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+class JsonLineCodec:
+    """Newline-delimited JSON (the default wire format)"""
+    name = 'json'
+    
+    async def read(self, reader):
+        """Return the next raw message, or None at end of stream"""
+        line = await reader.readline()
+        return line or None
+        
+    def decode(self, raw):
+        return json.loads(raw)
+        
+    def encode(self, message):
+        return json.dumps(message).encode() + b'\n'
+
+class MsgpackFrameCodec:
+    """Length-prefixed msgpack frames: 4-byte big-endian size, then payload"""
+    name = 'msgpack'
+    
+    async def read(self, reader):
+        """Return the next raw message, or None at end of stream"""
+        try:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            (size,) = FRAME_HEADER.unpack(header)
+            if size > MAX_FRAME_SIZE:
+                # Skip the payload so the stream stays aligned on frames
+                while size:
+                    size -= len(await reader.readexactly(min(size, 65536)))
+                raise ValueError(f"Frame exceeds the {MAX_FRAME_SIZE} byte limit")
+            return await reader.readexactly(size)
+        except asyncio.IncompleteReadError:
+            return None
+            
+    def decode(self, raw):
+        return msgpack.unpackb(raw, raw=False)
+        
+    def encode(self, message):
+        payload = msgpack.packb(message, use_bin_type=True)
+        return FRAME_HEADER.pack(len(payload)) + payload
+
+CODECS = {'json': JsonLineCodec}
+if msgpack is not None:
+    CODECS['msgpack'] = MsgpackFrameCodec
+
+# Preferred first when both sides support several formats
+FORMAT_PREFERENCE = ['msgpack', 'json']
+
+class MessageChannel:
+    """
+    Reads and writes brain messages over a stream pair
+    
+    Starts in JSON mode. A {"type": "hello", "formats": [...]} message
+    switches both directions to the best format the two sides share, after
+    the reply has gone out in JSON. Outgoing messages are buffered and
+    written together once per event loop iteration, so a burst of responses
+    costs one write syscall.
+    """
+    
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.codec = JsonLineCodec()
+        
+        self.pending = []
+        self.flush_scheduled = False
+        
+        self.messages_sent = 0
+        self.writes = 0
+        
+    async def receive(self):
+        """Return the next decoded message, None at end of stream (ValueError if undecodable or not an object)"""
+        raw = await self.codec.read(self.reader)
+        if raw is None:
+            return None
+        message = self.codec.decode(raw)
+        if not isinstance(message, dict):
+            # 5, [] or null: nothing to dispatch on (and null must not read as end of stream)
+            raise ValueError(f"Expected an object, got {type(message).__name__}")
+        return message
+        
+    async def send(self, message):
+        """Queue a message for the next coalesced write"""
+        self.pending.append(self.codec.encode(message))
+        self.messages_sent += 1
+        
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            asyncio.get_event_loop().call_soon(self.flush)
+            
+        await self.writer.drain()
+        
+    def flush(self):
+        """Write every queued message at once"""
+        self.flush_scheduled = False
+        if not self.pending or self.writer.is_closing():
+            return
+            
+        self.writer.write(b''.join(self.pending))
+        self.pending.clear()
+        self.writes += 1
+        
+    async def negotiate(self, hello):
+        """Answer a hello message and switch to the agreed format"""
+        offered = hello.get('formats', [])
+        chosen = next((name for name in FORMAT_PREFERENCE if name in offered and name in CODECS), 'json')
+        
+        self.pending.append(self.codec.encode({'type': 'hello', 'format': chosen, 'formats': list(CODECS)}))
+        self.messages_sent += 1
+        
+        # Everything queued so far goes out in JSON, ending with the reply;
+        # nothing can be queued between this write and the switch
+        self.flush()
+        self.codec = CODECS[chosen]()
+        
+        await self.writer.drain()
+        return chosen
+        
+    async def close(self):
+        """Flush queued messages and close the writer"""
+        self.flush()
+        await self.writer.drain()
+        self.writer.close()
@@ -0,0 +1,292 @@
+"""
+Compact Q-Table
+Memory-mapped Q-table with interned messages and float32 values
+"""
+
+import math
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableMapping
+
+MAGIC = b'NYXQ'
+VERSION = 1
+
+# magic, version, reserved, intents, messages, intent bytes, message bytes, count, total
+HEADER = struct.Struct('<4sHHIIIIQd')
+
+MISSING = math.nan
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def _split_key(key):
+    """Split a "message:intent" key (intents never contain ':')"""
+    message, _, intent = key.rpartition(':')
+    return message, intent
+
+class CompactQTable(MutableMapping):
+    """
+    Q-table keyed by "message:intent" strings, like the plain dict
+    
+    The on-disk file holds the intent names, the messages sorted by their
+    UTF-8 bytes and a dense float32 matrix (one row per message, one column
+    per intent, NaN where nothing was learned). It is memory-mapped on open,
+    so nothing is decoded up front: lookups binary-search the message table
+    in place. Updates go to a small in-memory overlay of array('f') rows
+    until the next snapshot is written. Arrays use native byte order.
+    """
+    
+    def __init__(self):
+        self.intents = []
+        self.intent_index = {}
+        self.overlay = {}
+        self.count = 0
+        self.total = 0.0
+        
+        self.path = None
+        self._file = None
+        self._mmap = None
+        self._offsets = None
+        self._values = None
+        self._blob_start = 0
+        self._base_messages = 0
+        self._base_intents = 0
+        self._header_stats = (0, 0.0)
+        
+    @classmethod
+    def open(cls, path):
+        """Memory-map a table written by write_snapshot"""
+        table = cls()
+        table._map(path)
+        table.count, table.total = table._header_stats
+        return table
+        
+    @classmethod
+    def from_items(cls, items):
+        """Build an in-memory table from (key, value) pairs"""
+        table = cls()
+        for key, value in items:
+            table[key] = value
+        return table
+        
+    def _map(self, path):
+        f = open(path, 'rb')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, _, n_intents, n_messages, intent_bytes, blob_bytes, count, total = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            f.close()
+            raise ValueError(f"{path} is not a compact Q-table")
+            
+        position = HEADER.size
+        names = mm[position:position + intent_bytes].decode('utf-8')
+        position = _align(position + intent_bytes)
+        offsets = memoryview(mm)[position:position + (n_messages + 1) * 4].cast('I')
+        position = _align(position + (n_messages + 1) * 4)
+        blob_start = position
+        position = _align(position + blob_bytes)
+        values = memoryview(mm)[position:position + n_messages * n_intents * 4].cast('f')
+        
+        base_intents = names.split('\n') if n_intents else []
+        for name in base_intents:
+            if name not in self.intent_index:
+                self.intent_index[name] = len(self.intents)
+                self.intents.append(name)
+                
+        self.path = path
+        self._file = f
+        self._mmap = mm
+        self._offsets = offsets
+        self._values = values
+        self._blob_start = blob_start
+        self._base_messages = n_messages
+        self._base_intents = n_intents
+        self._header_stats = (count, total)
+        
+    def _unmap(self, mapping):
+        file, mm, offsets, values = mapping
+        if offsets is not None:
+            offsets.release()
+            values.release()
+            try:
+                mm.close()
+            except BufferError:
+                # A row handed out earlier (rows(), a paused iterator) still
+                # views the map: once it is dropped, the map is unmapped on
+                # garbage collection instead
+                pass
+            file.close()
+            
+    def close(self):
+        """Release the memory map"""
+        self._unmap((self._file, self._mmap, self._offsets, self._values))
+        self._file = self._mmap = self._offsets = self._values = None
+        self._base_messages = self._base_intents = 0
+        
+    def _find(self, message):
+        """Index of message in the mapped file, or -1"""
+        target = message.encode('utf-8')
+        mm = self._mmap
+        offsets = self._offsets
+        start = self._blob_start
+        
+        lo, hi = 0, self._base_messages
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = mm[start + offsets[mid]:start + offsets[mid + 1]]
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+        
+    def _base_row(self, index):
+        width = self._base_intents
+        return self._values[index * width:(index + 1) * width]
+        
+    def _row(self, message):
+        """Current row for message (overlay first), or None"""
+        row = self.overlay.get(message)
+        if row is not None:
+            return row
+        index = self._find(message) if self._base_messages else -1
+        if index < 0:
+            return None
+        return self._base_row(index)
+        
+    def get(self, key, default=None):
+        message, intent = _split_key(key)
+        column = self.intent_index.get(intent)
+        if column is None:
+            return default
+            
+        row = self._row(message)
+        if row is None or column >= len(row):
+            return default
+            
+        value = row[column]
+        if value != value:
+            return default
+        # Drop float32 noise so 0.1 reads back as 0.1
+        return float(f'{value:.7g}')
+        
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value != value:
+            raise KeyError(key)
+        return value
+        
+    def __contains__(self, key):
+        return self.get(key) is not None
+        
+    def _writable_row(self, message):
+        """Overlay row for message, copied from the mapped file on first write"""
+        row = self.overlay.get(message)
+        if row is None:
+            index = self._find(message) if self._base_messages else -1
+            row = array('f', self._base_row(index)) if index >= 0 else array('f')
+            self.overlay[message] = row
+        return row
+        
+    def __setitem__(self, key, value):
+        message, intent = _split_key(key)
+        column = self.intent_index.get(intent)
+        if column is None:
+            column = self.intent_index[intent] = len(self.intents)
+            self.intents.append(intent)
+            
+        row = self._writable_row(message)
+        if len(row) <= column:
+            row.extend([MISSING] * (column + 1 - len(row)))
+            
+        old = row[column]
+        row[column] = value
+        if old != old:
+            self.count += 1
+            self.total += row[column]
+        else:
+            self.total += row[column] - old
+            
+    def __delitem__(self, key):
+        old = self[key]
+        message, intent = _split_key(key)
+        self._writable_row(message)[self.intent_index[intent]] = MISSING
+        self.count -= 1
+        self.total -= old
+        
+    def rows(self):
+        """Yield (message, row) for every message, overlay first"""
+        yield from self.overlay.items()
+        for index in range(self._base_messages):
+            start = self._blob_start + self._offsets[index]
+            message = self._mmap[start:self._blob_start + self._offsets[index + 1]].decode('utf-8')
+            if message not in self.overlay:
+                yield message, self._base_row(index)
+                
+    def __iter__(self):
+        for message, row in self.rows():
+            for column, value in enumerate(row):
+                if value == value:
+                    yield f"{message}:{self.intents[column]}"
+                    
+    def __len__(self):
+        return self.count
+        
+    def snapshot(self):
+        """Capture state for write_snapshot; cheap enough for the event loop"""
+        overlay = {message: array('f', row) for message, row in self.overlay.items()}
+        return list(self.intents), overlay, self.count, self.total
+        
+    def write_snapshot(self, path, snapshot):
+        """Write a snapshot to path atomically (safe to run in a thread)"""
+        intents, overlay, count, total = snapshot
+        width = len(intents)
+        
+        merged = dict(overlay)
+        for index in range(self._base_messages):
+            start = self._blob_start + self._offsets[index]
+            message = self._mmap[start:self._blob_start + self._offsets[index + 1]].decode('utf-8')
+            if message not in merged:
+                merged[message] = self._base_row(index)
+                
+        encoded = sorted((message.encode('utf-8'), row) for message, row in merged.items())
+        
+        offsets = array('I', [0])
+        values = array('f')
+        for message, row in encoded:
+            offsets.append(offsets[-1] + len(message))
+            values.frombytes(row.tobytes())
+            if len(row) < width:
+                values.extend([MISSING] * (width - len(row)))
+                
+        names = '\n'.join(intents).encode('utf-8')
+        blob = b''.join(message for message, _ in encoded)
+        
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, width, len(encoded), len(names), len(blob), count, total))
+            for section in (names, offsets.tobytes(), blob):
+                f.write(section)
+                f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        
+    def rebase(self, path, snapshot):
+        """Switch to a freshly written snapshot, keeping newer overlay rows"""
+        written = snapshot[1]
+        old_mapping = (self._file, self._mmap, self._offsets, self._values)
+        
+        self._map(path)
+        self._unmap(old_mapping)
+        
+        for message, row in written.items():
+            current = self.overlay.get(message)
+            if current is not None and current.tobytes() == row.tobytes():
+                del self.overlay[message]
@@ -4,18 +4,30 @@ Manages user feedback and learning loop
 """
 
 import asyncio
+import sys
+
+from .pending_feedback import PendingFeedbackStore
 
 class FeedbackManager:
-    def __init__(self, q_learning, core):
+    def __init__(self, q_learning, core, feedback_ttl=300, max_pending=500, expired_reward=None, intent_learner=None):
         self.q_learning = q_learning
         self.core = core
         
+        # Trained on confirmed and corrected intents (e.g. the intent cascade)
+        self.intent_learner = intent_learner
+        
         # Confidence thresholds
         self.THRESHOLD_ASK = 0.70
         self.THRESHOLD_NOTIFY = 0.80
         self.THRESHOLD_CONFIDENT = 0.80
         
-        self.pending_feedbacks = {}
+        self.pending_feedbacks = PendingFeedbackStore(ttl=feedback_ttl, max_size=max_pending)
+        
+        # Reward for requests the user never answered (None = ignore them)
+        self.expired_reward = expired_reward
+        
+        self.requests = 0
+        self.responses = {'confirm': 0, 'reject': 0, 'correct': 0}
         
     def needs_feedback(self, intent, confidence):
         """Decide if we need user feedback"""
@@ -28,14 +40,16 @@ class FeedbackManager:
         
     async def request_feedback(self, message, intent, confidence, sid):
         """Request feedback from user"""
-        feedback_id = f"feedback_{int(asyncio.get_event_loop().time() * 1000)}"
+        await self.expire_stale()
         
-        self.pending_feedbacks[feedback_id] = {
+        feedback_id, evicted = self.pending_feedbacks.add({
             'message': message,
             'intent': intent,
             'confidence': confidence,
             'timestamp': asyncio.get_event_loop().time()
-        }
+        })
+        await self._apply_unanswered(evicted)
+        self.requests += 1
         
         # Send to frontend
         await self.core.sio.emit('request-feedback', {
@@ -48,33 +62,127 @@ class FeedbackManager:
             }
         }, room=sid)
         
-        print(f"❓ Requesting feedback: {message} → {intent['intent']}")
+        print(f"❓ Requesting feedback: {message} → {intent['intent']}", file=sys.stderr)
         
     async def process_feedback(self, feedback_id, response):
         """Process user feedback"""
+        await self.expire_stale()
+        
         if feedback_id not in self.pending_feedbacks:
             return
             
         pending = self.pending_feedbacks[feedback_id]
         message = pending['message']
-        intent = pending['intent']
-        
-        reward = 0
-        actual_intent = intent['intent']
+        actual_intent, reward = self._resolve_feedback(pending, response)
+        if not actual_intent:
+            # A correction without the right intent: nothing to learn, the
+            # request stays open for a usable answer
+            print(f"⚠️  Ignoring correction without an intent: {message}", file=sys.stderr)
+            return
+        self._count(response)
         
         if response['action'] == 'confirm':
-            reward = 1.0
-            print(f"✅ User confirmed: {message} → {actual_intent}")
+            print(f"✅ User confirmed: {message} → {actual_intent}", file=sys.stderr)
         elif response['action'] == 'reject':
-            reward = -0.5
-            print(f"❌ User rejected: {message} → {actual_intent}")
+            print(f"❌ User rejected: {message} → {actual_intent}", file=sys.stderr)
         elif response['action'] == 'correct':
-            actual_intent = response['correct_intent']
-            reward = 1.0
-            print(f"✏️  User corrected: {message} → {actual_intent}")
+            print(f"✏️  User corrected: {message} → {actual_intent}", file=sys.stderr)
             
         # Update Q-Learning
         await self.q_learning.update_q_value(message, actual_intent, reward)
         
+        if response['action'] in ('confirm', 'correct'):
+            await self._teach([(message, actual_intent)])
+            
         # Remove from pending
         del self.pending_feedbacks[feedback_id]
+        
+    async def process_feedback_batch(self, responses, sid=None):
+        """
+        Process many feedback responses (the 'feedback-batch' socket event)
+        
+        All rewards are applied to the Q-table in one pass and persisted with
+        a single write. Returns one result per response, in order.
+        """
+        await self.expire_stale()
+        
+        results = []
+        updates = []
+        examples = []
+        for response in responses:
+            feedback_id = response.get('feedbackId', response.get('feedback_id'))
+            if feedback_id not in self.pending_feedbacks:
+                results.append({'feedbackId': feedback_id, 'status': 'unknown'})
+                continue
+                
+            pending = self.pending_feedbacks[feedback_id]
+            actual_intent, reward = self._resolve_feedback(pending, response)
+            if not actual_intent:
+                results.append({'feedbackId': feedback_id, 'status': 'invalid'})
+                continue
+                
+            del self.pending_feedbacks[feedback_id]
+            self._count(response)
+            updates.append((pending['message'], actual_intent, reward))
+            if response['action'] in ('confirm', 'correct'):
+                examples.append((pending['message'], actual_intent))
+            results.append({
+                'feedbackId': feedback_id,
+                'status': 'applied',
+                'intent': actual_intent,
+                'reward': reward
+            })
+            
+        q_values = iter(await self.q_learning.update_q_values(updates))
+        await self._teach(examples)
+        for result in results:
+            if result['status'] == 'applied':
+                result['q_value'] = next(q_values)
+                
+        print(f"✅ Processed feedback batch: {len(updates)}/{len(results)} applied", file=sys.stderr)
+        
+        if sid is not None:
+            await self.core.sio.emit('feedback-batch-received', {'results': results}, room=sid)
+            
+        return results
+        
+    async def _teach(self, examples):
+        """Train the intent learner on (message, intent) pairs the user vouched for"""
+        examples = [(message, intent) for message, intent in examples if intent]
+        if self.intent_learner is not None and examples:
+            await self.intent_learner.learn(examples)
+        
+    def _count(self, response):
+        if response['action'] in self.responses:
+            self.responses[response['action']] += 1
+            
+    def _resolve_feedback(self, pending, response):
+        """Turn a user response into (intent to reinforce, reward); intent is None for a correction without one"""
+        actual_intent = pending['intent']['intent']
+        action = response['action']
+        
+        if action == 'confirm':
+            return actual_intent, 1.0
+        if action == 'reject':
+            return actual_intent, -0.5
+        if action == 'correct':
+            return response.get('correct_intent', response.get('correctIntent')), 1.0
+        return actual_intent, 0
+        
+    async def expire_stale(self):
+        """Drop feedback requests nobody answered in time"""
+        await self._apply_unanswered(self.pending_feedbacks.pop_expired())
+        
+    async def _apply_unanswered(self, entries):
+        """Apply the implicit reward policy to unanswered requests"""
+        if self.expired_reward is None:
+            return
+            
+        await self.q_learning.update_q_values([
+            (pending['message'], pending['intent']['intent'], self.expired_reward)
+            for pending in entries
+        ])
+        
+    def get_stats(self):
+        """Get statistics"""
+        return dict(self.pending_feedbacks.get_stats(), requests=self.requests, **self.responses)
@@ -0,0 +1,82 @@
+"""
+Pending Feedback Store
+Bounded, expiring storage for feedback requests awaiting an answer
+"""
+
+import heapq
+import time
+import uuid
+
+class PendingFeedbackStore:
+    """
+    Dict-like store of pending feedbacks with a TTL and a capacity
+    
+    Expiry times are kept in a min-heap, so removing stale entries costs
+    O(log n) each. Entries answered before they expire stay in the heap
+    until they surface or the heap is rebuilt.
+    """
+    
+    def __init__(self, ttl=300, max_size=500, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        
+        self.entries = {}
+        self.expiry_heap = []
+        
+        self.expired = 0
+        self.evicted = 0
+        
+    def __len__(self):
+        return len(self.entries)
+        
+    def __contains__(self, feedback_id):
+        return feedback_id in self.entries
+        
+    def __getitem__(self, feedback_id):
+        return self.entries[feedback_id]
+        
+    def __delitem__(self, feedback_id):
+        del self.entries[feedback_id]
+        
+        # Drop answered entries from the heap once they dominate it
+        if len(self.expiry_heap) > 2 * len(self.entries) + 64:
+            self.expiry_heap = [item for item in self.expiry_heap if item[1] in self.entries]
+            heapq.heapify(self.expiry_heap)
+            
+    def add(self, entry):
+        """Store entry under a new unique ID; return (id, evicted entries)"""
+        feedback_id = f"feedback_{uuid.uuid4().hex}"
+        self.entries[feedback_id] = entry
+        heapq.heappush(self.expiry_heap, (self.clock() + self.ttl, feedback_id))
+        
+        evicted = []
+        while len(self.entries) > self.max_size:
+            _, oldest_id = heapq.heappop(self.expiry_heap)
+            if oldest_id in self.entries:
+                evicted.append(self.entries.pop(oldest_id))
+                self.evicted += 1
+                
+        return feedback_id, evicted
+        
+    def pop_expired(self):
+        """Remove and return entries whose TTL has passed"""
+        now = self.clock()
+        expired = []
+        
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            _, feedback_id = heapq.heappop(self.expiry_heap)
+            if feedback_id in self.entries:
+                expired.append(self.entries.pop(feedback_id))
+                self.expired += 1
+                
+        return expired
+        
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'pending': len(self.entries),
+            'max_size': self.max_size,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
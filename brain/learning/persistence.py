@@ -0,0 +1,113 @@
+"""
+Persistence Scheduler
+Debounced, coalesced background writes for in-memory state
+"""
+
+import asyncio
+import sys
+
+class PersistenceScheduler:
+    """
+    Turns bursts of changes into a single write
+    
+    mark_dirty() (re)arms a timer for `delay` seconds, but never past
+    `max_staleness` seconds after the first unsaved change. When it fires,
+    snapshot() is called on the event loop and write(snapshot) runs in the
+    default thread executor, then on_written(snapshot), if given, back on
+    the loop. A failed write is retried after `retry_delay` seconds.
+    flush() writes anything pending right away.
+    """
+    
+    def __init__(self, snapshot, write, delay=0.5, max_staleness=5.0, on_written=None, retry_delay=5.0):
+        self.snapshot = snapshot
+        self.write = write
+        self.on_written = on_written
+        self.delay = delay
+        self.max_staleness = max_staleness
+        self.retry_delay = retry_delay
+        
+        self.dirty = False
+        self.dirty_since = None
+        self.timer = None
+        self.task = None
+        
+        self.writes = 0
+        self.changes = 0
+        self.failures = 0
+        
+    def mark_dirty(self):
+        """Record a change and schedule a write"""
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        self.changes += 1
+        
+        if not self.dirty:
+            self.dirty = True
+            self.dirty_since = now
+            
+        deadline = min(now + self.delay, self.dirty_since + self.max_staleness)
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = loop.call_at(deadline, self._on_timer)
+        
+    def _on_timer(self):
+        self.timer = None
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._write_pending())
+        # Otherwise the running write loop picks the change up
+        
+    async def _write_pending(self):
+        loop = asyncio.get_event_loop()
+        try:
+            while self.dirty:
+                self.dirty = False
+                self.dirty_since = None
+                try:
+                    snapshot = self.snapshot()
+                    await loop.run_in_executor(None, self.write, snapshot)
+                    if self.on_written is not None:
+                        self.on_written(snapshot)
+                    self.writes += 1
+                except Exception as e:
+                    print(f"✗ Background save failed: {e}", file=sys.stderr)
+                    self.failures += 1
+                    if not self.dirty:
+                        self.dirty = True
+                        self.dirty_since = loop.time()
+                    if self.timer is None:
+                        self.timer = loop.call_later(self.retry_delay, self._on_timer)
+                    break
+                    
+                # Newer changes are still being debounced
+                if self.timer is not None:
+                    break
+        finally:
+            self.task = None
+            
+    async def flush(self):
+        """Write pending changes now and wait for them to land"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+            
+        if self.task is not None:
+            await self.task
+            
+        if self.dirty:
+            self.task = asyncio.ensure_future(self._write_pending())
+            await self.task
+            
+    def cancel(self):
+        """Drop a scheduled write or retry; the changes stay marked dirty"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+            
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'changes': self.changes,
+            'writes': self.writes,
+            'failures': self.failures,
+            'dirty': self.dirty
+        }
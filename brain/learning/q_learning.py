@@ -3,28 +3,48 @@ Q-Learning System
 Learns from user feedback to improve intent classification
 """
 
-import json
-import os
+import asyncio
+import sys
 from pathlib import Path
 
+from .compact_table import CompactQTable
+from .q_storage import STORAGE_BACKENDS
+from .similarity_index import SimilarityIndex
+
 class QLearningSystem:
-    def __init__(self, data_dir='data'):
+    def __init__(self, data_dir='data', storage='json', similarity=False, storage_options=None):
         self.data_dir = Path(data_dir)
-        self.data_file = self.data_dir / 'q_learning.json'
+        self.storage = STORAGE_BACKENDS[storage](self.data_dir, **(storage_options or {}))
         self.q_table = {}
         self.learning_rate = 0.1
         self.discount_factor = 0.9
+        self.update_listeners = []
+        
+        # Generalize feedback to similar wordings of learned messages
+        self.similarity_index = SimilarityIndex() if similarity else None
+        self.similarity_k = 5
+        self.index_task = None
         
     async def initialize(self):
         """Load Q-table from disk"""
         self.data_dir.mkdir(exist_ok=True)
         
-        if self.data_file.exists():
-            with open(self.data_file, 'r') as f:
-                self.q_table = json.load(f)
-        else:
-            self.q_table = {}
+        self.q_table = self.storage.load()
+        
+        if self.similarity_index is not None:
+            # Kept so the build is not garbage collected halfway
+            self.index_task = asyncio.ensure_future(self.similarity_index.build(self._learned_messages()))
             
+    def _learned_messages(self):
+        """List every message that has at least one Q-value"""
+        if isinstance(self.q_table, CompactQTable):
+            return [message for message, _ in self.q_table.rows()]
+        return list({key.rpartition(':')[0] for key in self.q_table})
+        
+    def add_update_listener(self, callback):
+        """Call callback(message, intent, q_value) whenever a Q-value changes"""
+        self.update_listeners.append(callback)
+        
     def get_confidence_boost(self, message, intent):
         """Get confidence boost based on learned patterns"""
         key = f"{message.lower()}:{intent}"
@@ -34,10 +54,50 @@ class QLearningSystem:
             # Convert Q-value to confidence boost (-0.2 to +0.2)
             return min(0.2, max(-0.2, q_value * 0.2))
             
+        if self.similarity_index is not None:
+            q_value = self._similar_q_value(message.lower(), intent)
+            if q_value is not None:
+                return min(0.2, max(-0.2, q_value * 0.2))
+                
         return 0
         
+    def _similar_q_value(self, message, intent):
+        """Estimate a Q-value from the nearest learned messages"""
+        weighted = []
+        for neighbor, similarity in self.similarity_index.nearest(message, self.similarity_k):
+            q_value = self.q_table.get(f"{neighbor}:{intent}")
+            if q_value is not None:
+                weighted.append((similarity, q_value))
+                
+        if not weighted:
+            return None
+            
+        # Similarity-weighted mean, damped by how close the best match is
+        total_similarity = sum(similarity for similarity, _ in weighted)
+        mean = sum(similarity * q_value for similarity, q_value in weighted) / total_similarity
+        return mean * max(similarity for similarity, _ in weighted)
+        
     async def update_q_value(self, message, intent, reward):
         """Update Q-value based on feedback"""
+        key, new_q = self._apply_update(message, intent, reward)
+        
+        # Save to disk
+        await self.storage.record(key, new_q, self.q_table)
+        
+        print(f"📚 Q-Learning updated: {key} → {new_q:.2f}", file=sys.stderr)
+        
+    async def update_q_values(self, updates):
+        """Apply many (message, intent, reward) updates and persist once"""
+        records = [self._apply_update(message, intent, reward) for message, intent, reward in updates]
+        
+        if records:
+            await self.storage.record_many(records, self.q_table)
+            print(f"📚 Q-Learning updated: {len(records)} values", file=sys.stderr)
+            
+        return [new_q for _, new_q in records]
+        
+    def _apply_update(self, message, intent, reward):
+        """Apply the Q-learning rule in memory; return (key, new Q-value)"""
         key = f"{message.lower()}:{intent}"
         
         # Get current Q-value
@@ -48,19 +108,42 @@ class QLearningSystem:
         
         self.q_table[key] = new_q
         
-        # Save to disk
-        await self.save()
-        
-        print(f"📚 Q-Learning updated: {key} → {new_q:.2f}")
+        if self.similarity_index is not None:
+            self.similarity_index.add(message.lower())
+            
+        if new_q != current_q:
+            for callback in self.update_listeners:
+                callback(message.lower(), intent, new_q)
+                
+        return key, new_q
         
     async def save(self):
         """Save Q-table to disk"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.q_table, f, indent=2)
+        await self.storage.save(self.q_table)
+        
+    async def close(self):
+        """Flush pending writes and release storage"""
+        if self.index_task is not None and not self.index_task.done():
+            self.index_task.cancel()
+        await self.storage.close(self.q_table)
             
     def get_stats(self):
         """Get statistics"""
+        if isinstance(self.q_table, CompactQTable):
+            # Running total avoids scanning the memory-mapped values
+            total = self.q_table.total
+        else:
+            total = sum(self.q_table.values())
+            
         return {
             'known_messages': len(self.q_table),
-            'avg_q_value': sum(self.q_table.values()) / len(self.q_table) if self.q_table else 0
+            'avg_q_value': total / len(self.q_table) if self.q_table else 0
         }
+
+def build_q_learning(data_dir='data'):
+    """
+    The Q-learning setup both brains use on the same data directory
+    
+    Compact storage migrates a q_learning.json left by the JSON backend.
+    """
+    return QLearningSystem(data_dir, storage='compact', similarity=True)
@@ -0,0 +1,335 @@
+"""
+Q-Table Storage
+Persistence backends for the Q-learning table
+"""
+
+import json
+import os
+import shutil
+import sys
+
+from .compact_table import CompactQTable
+from .persistence import PersistenceScheduler
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON to a temporary file and atomically rename it over path"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class JsonStorage:
+    """
+    Whole Q-table in one JSON file
+    
+    Updates only mark the table dirty; a PersistenceScheduler coalesces
+    bursts into one rewrite that runs off the event loop.
+    """
+    
+    def __init__(self, data_dir, save_delay=0.5, max_staleness=5.0):
+        self.data_file = data_dir / 'q_learning.json'
+        self.q_table = {}
+        self.scheduler = PersistenceScheduler(
+            lambda: dict(self.q_table),
+            lambda snapshot: write_json_atomic(self.data_file, snapshot, indent=2),
+            delay=save_delay,
+            max_staleness=max_staleness
+        )
+        
+    def load(self):
+        """Load Q-table from disk"""
+        if self.data_file.exists():
+            with open(self.data_file, 'r') as f:
+                self.q_table = json.load(f)
+        else:
+            self.q_table = {}
+        return self.q_table
+        
+    async def record(self, key, value, q_table):
+        """Schedule persisting a single updated entry"""
+        self.q_table = q_table
+        self.scheduler.mark_dirty()
+        
+    async def record_many(self, records, q_table):
+        """Schedule persisting several updated entries"""
+        self.q_table = q_table
+        self.scheduler.mark_dirty()
+        
+    async def save(self, q_table):
+        """Save Q-table to disk"""
+        self.q_table = q_table
+        self.scheduler.mark_dirty()
+        await self.scheduler.flush()
+        
+    async def close(self, q_table):
+        """Flush pending writes"""
+        self.q_table = q_table
+        await self.scheduler.flush()
+        self.scheduler.cancel()
+
+class JournalStorage:
+    """
+    JSON snapshot plus an append-only log of updates
+    
+    Each update is one [key, value] line of q_learning.log. record_many()
+    only buffers the lines: an appender PersistenceScheduler writes and
+    fsyncs them off the event loop, coalescing the batches that arrive
+    while a write runs (or within append_delay seconds), and close()
+    flushes them. fsync=False only flushes to the OS, so the last updates
+    can be lost if the machine goes down, in exchange for less disk wait.
+    
+    Once compact_every records have accumulated, the appender also rotates
+    the log, then a second scheduler writes a fresh snapshot in the
+    background, retrying if the write fails. Records hold absolute values,
+    so replaying a log that is already folded into the snapshot is
+    harmless. Only the appender touches the log file, so a rotation never
+    races an append.
+    """
+    
+    def __init__(self, data_dir, compact_every=1000, fsync=True, append_delay=0.0):
+        self.snapshot_file = data_dir / 'q_learning.json'
+        self.log_file = data_dir / 'q_learning.log'
+        self.rotated_log_file = data_dir / 'q_learning.log.compacting'
+        self.compact_every = compact_every
+        self.fsync = fsync
+        
+        self.log = None
+        self.pending_records = 0
+        self.q_table = None
+        
+        # Batches of log lines not written yet, and whether to rotate after them
+        self.appends = []
+        self.rotation_due = False
+        self.appender = PersistenceScheduler(
+            self._take_appends,
+            self._append,
+            delay=append_delay,
+            max_staleness=append_delay,
+            on_written=self._appended
+        )
+        self.scheduler = PersistenceScheduler(
+            lambda: self._take_snapshot(self.q_table),
+            self._write_snapshot,
+            delay=0.0,
+            max_staleness=0.0,
+            on_written=self._compacted
+        )
+        
+    def load(self):
+        """Load the snapshot and replay the log tail"""
+        q_table = self._load_snapshot()
+        
+        # A rotated log means the last compaction never finished
+        interrupted = self.rotated_log_file.exists()
+        if interrupted:
+            self._replay(self.rotated_log_file, q_table)
+        self.pending_records = self._replay(self.log_file, q_table)
+        
+        if interrupted:
+            snapshot = self._take_snapshot(q_table)
+            self._write_snapshot(snapshot)
+            self._snapshot_written(q_table, snapshot)
+            open(self.log_file, 'w').close()
+            os.remove(self.rotated_log_file)
+            self.pending_records = 0
+            
+        self.log = open(self.log_file, 'a')
+        self.q_table = q_table
+        return q_table
+        
+    def _replay(self, path, q_table):
+        """Apply log records to q_table, truncating a torn final record"""
+        if not path.exists():
+            return 0
+            
+        count = 0
+        valid_bytes = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    key, value = json.loads(line)
+                except ValueError:
+                    break
+                q_table[key] = value
+                valid_bytes += len(line)
+                count += 1
+                
+        if valid_bytes < path.stat().st_size:
+            print(f"⚠️  Truncating torn record in {path.name}", file=sys.stderr)
+            with open(path, 'r+b') as f:
+                f.truncate(valid_bytes)
+                
+        return count
+        
+    async def record(self, key, value, q_table):
+        """Append a single updated entry to the log"""
+        await self.record_many([(key, value)], q_table)
+        
+    async def record_many(self, records, q_table):
+        """Queue several updated entries for one background append"""
+        self.appends.append(''.join(json.dumps([key, value]) + '\n' for key, value in records))
+        self.q_table = q_table
+        self.pending_records += len(records)
+        if self.pending_records >= self.compact_every and not self._compacting():
+            self.rotation_due = True
+            self.pending_records = 0
+        self.appender.mark_dirty()
+            
+    async def compact(self, q_table):
+        """Fold the log into a new snapshot"""
+        self.q_table = q_table
+        # A compaction already under way rotated before the latest records
+        await self.scheduler.flush()
+        
+        failures = self.appender.failures + self.scheduler.failures
+        self.rotation_due = True
+        self.pending_records = 0
+        self.appender.mark_dirty()
+        await self.appender.flush()
+        await self.scheduler.flush()
+        if self.appender.failures + self.scheduler.failures > failures:
+            raise OSError("Q-table snapshot could not be written")
+            
+    def _compacting(self):
+        return self.scheduler.dirty or self.scheduler.task is not None
+        
+    def _take_appends(self):
+        """What the next append writes (the appender's snapshot step, on the loop)"""
+        return len(self.appends), ''.join(self.appends), self.rotation_due
+        
+    def _append(self, batch):
+        """Write and sync queued lines, then rotate if due (in the executor)"""
+        _, lines, rotate = batch
+        if lines:
+            size = os.fstat(self.log.fileno()).st_size
+            try:
+                self.log.write(lines)
+                self.log.flush()
+                if self.fsync:
+                    os.fsync(self.log.fileno())
+            except OSError:
+                # Drop a partial write so the retry starts on a line boundary
+                try:
+                    self.log.close()
+                except OSError:
+                    pass
+                os.truncate(self.log_file, size)
+                self.log = open(self.log_file, 'a')
+                raise
+        if rotate:
+            self._rotate()
+            
+    def _appended(self, batch):
+        count, _, rotate = batch
+        # Batches queued during the write stay for the next one
+        del self.appends[:count]
+        if rotate:
+            self.rotation_due = False
+            # Taken from now on, the snapshot covers every rotated record
+            self.scheduler.mark_dirty()
+            
+    def _rotate(self):
+        """Move the log aside for the next snapshot to fold in"""
+        self.log.close()
+        try:
+            if self.rotated_log_file.exists():
+                # A previous compaction failed, keep its records until a snapshot lands
+                with open(self.log_file, 'rb') as log, open(self.rotated_log_file, 'ab') as rotated:
+                    shutil.copyfileobj(log, rotated)
+                os.remove(self.log_file)
+            else:
+                os.replace(self.log_file, self.rotated_log_file)
+        finally:
+            self.log = open(self.log_file, 'a')
+        
+    def _compacted(self, snapshot):
+        self._snapshot_written(self.q_table, snapshot)
+        os.remove(self.rotated_log_file)
+        
+    def _load_snapshot(self):
+        if self.snapshot_file.exists():
+            with open(self.snapshot_file, 'r') as f:
+                return json.load(f)
+        return {}
+        
+    def _take_snapshot(self, q_table):
+        return dict(q_table)
+        
+    def _write_snapshot(self, snapshot):
+        write_json_atomic(self.snapshot_file, snapshot)
+        
+    def _snapshot_written(self, q_table, snapshot):
+        pass
+        
+    async def save(self, q_table):
+        """Force a full snapshot"""
+        await self.compact(q_table)
+        
+    async def close(self, q_table):
+        """Write queued records, finish a due compaction and close the log"""
+        self.q_table = q_table
+        await self.appender.flush()
+        await self.scheduler.flush()
+        self.appender.cancel()
+        self.scheduler.cancel()
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+class CompactStorage(JournalStorage):
+    """
+    Journal whose snapshot is a memory-mapped CompactQTable file
+    
+    An existing q_learning.json is migrated to q_learning.bin on first load.
+    """
+    
+    def __init__(self, data_dir, compact_every=1000, fsync=True, append_delay=0.0):
+        super().__init__(data_dir, compact_every, fsync, append_delay)
+        self.json_file = data_dir / 'q_learning.json'
+        self.snapshot_file = data_dir / 'q_learning.bin'
+        
+    def load(self):
+        """Map the snapshot, migrating from JSON if needed, and replay the log"""
+        migrate = not self.snapshot_file.exists() and self.json_file.exists()
+        q_table = super().load()
+        
+        if migrate:
+            print(f"✓ Migrating {len(q_table)} Q-values to {self.snapshot_file.name}", file=sys.stderr)
+            snapshot = self._take_snapshot(q_table)
+            self._write_snapshot(snapshot)
+            self._snapshot_written(q_table, snapshot)
+            
+        return q_table
+        
+    def _load_snapshot(self):
+        if self.snapshot_file.exists():
+            return CompactQTable.open(self.snapshot_file)
+        if self.json_file.exists():
+            with open(self.json_file, 'r') as f:
+                return CompactQTable.from_items(json.load(f).items())
+        return CompactQTable()
+        
+    def _take_snapshot(self, q_table):
+        return q_table, q_table.snapshot()
+        
+    def _write_snapshot(self, snapshot):
+        q_table, state = snapshot
+        q_table.write_snapshot(self.snapshot_file, state)
+        
+    def _snapshot_written(self, q_table, snapshot):
+        q_table.rebase(self.snapshot_file, snapshot[1])
+        
+    async def close(self, q_table):
+        """Finish a due compaction, close the log and unmap the snapshot"""
+        await super().close(q_table)
+        q_table.close()
+
+STORAGE_BACKENDS = {
+    'json': JsonStorage,
+    'journal': JournalStorage,
+    'compact': CompactStorage
+}
@@ -0,0 +1,142 @@
+"""
+Similarity Index
+MinHash/LSH index over learned messages for approximate Q-value lookups
+"""
+
+import asyncio
+import heapq
+import operator
+import random
+import re
+from collections import deque
+
+WORD_PATTERN = re.compile(r'\w+')
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+class SimilarityIndex:
+    """
+    Finds learned messages similar to a new one
+    
+    Messages are reduced to shingles (words plus character trigrams of
+    words), hashed into a MinHash signature and bucketed by LSH bands.
+    Candidates from matching buckets are ranked by signature agreement,
+    which estimates the Jaccard similarity of their shingle sets. Buckets
+    are capped so lookups stay bounded however many messages are indexed.
+    """
+    
+    def __init__(self, num_perm=16, bands=8, bucket_size=32, threshold=0.5, seed=1):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.bucket_size = bucket_size
+        self.threshold = threshold
+        
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        
+        self.messages = []
+        self.message_ids = {}
+        self.signatures = []
+        self.buckets = {}
+        
+        # Words repeat across messages, so their shingle hashes are cached
+        self.word_hashes = {}
+        self.max_cached_words = 100000
+        
+    def __len__(self):
+        return len(self.messages)
+        
+    def __contains__(self, message):
+        return message in self.message_ids
+        
+    def _word_hashes(self, word):
+        """Per-permutation minimum over a word's shingles, cached per word"""
+        hashes = self.word_hashes.get(word)
+        if hashes is None:
+            if len(self.word_hashes) >= self.max_cached_words:
+                self.word_hashes.clear()
+            padded = f'#{word}#'
+            shingles = {word} | {padded[i:i + 3] for i in range(len(padded) - 2)}
+            hashes = self.word_hashes[word] = tuple(map(min, zip(*(
+                [(a * h + b) % MERSENNE_PRIME for a, b in self.permutations]
+                for h in (hash(shingle) & MERSENNE_PRIME for shingle in shingles)
+            ))))
+        return hashes
+        
+    def _signature(self, message):
+        words = set(WORD_PATTERN.findall(message))
+        if not words:
+            return None
+        return tuple(map(min, zip(*map(self._word_hashes, words))))
+        
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+        
+    def add(self, message):
+        """Index a lowercased message (no-op if already present)"""
+        if message in self.message_ids:
+            return
+            
+        signature = self._signature(message)
+        if signature is None:
+            return
+            
+        message_id = len(self.messages)
+        self.messages.append(message)
+        self.message_ids[message] = message_id
+        self.signatures.append(signature)
+        
+        for band_key in self._band_keys(signature):
+            bucket = self.buckets.get(band_key)
+            if bucket is None:
+                bucket = self.buckets[band_key] = deque(maxlen=self.bucket_size)
+            bucket.append(message_id)
+            
+    async def build(self, messages, chunk_size=250):
+        """Index many messages, yielding to the event loop between chunks"""
+        for count, message in enumerate(messages, 1):
+            self.add(message)
+            if count % chunk_size == 0:
+                await asyncio.sleep(0)
+                
+    def similar(self, message, candidates):
+        """Return the candidates (lowercased messages) that nearest() could pair with message"""
+        signature = self._signature(message)
+        if signature is None:
+            return []
+            
+        band_keys = set(self._band_keys(signature))
+        matches = []
+        for candidate in candidates:
+            other = self._signature(candidate)
+            if other is None or band_keys.isdisjoint(self._band_keys(other)):
+                continue
+            if sum(map(operator.eq, signature, other)) / self.num_perm >= self.threshold:
+                matches.append(candidate)
+        return matches
+        
+    def nearest(self, message, k=5):
+        """Return up to k (message, similarity) pairs above the threshold"""
+        signature = self._signature(message)
+        if signature is None:
+            return []
+            
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            bucket = self.buckets.get(band_key)
+            if bucket:
+                candidates.update(bucket)
+                
+        scored = []
+        for message_id in candidates:
+            agreement = sum(map(operator.eq, signature, self.signatures[message_id]))
+            similarity = agreement / self.num_perm
+            if similarity >= self.threshold:
+                scored.append((similarity, message_id))
+                
+        return [(self.messages[message_id], similarity) for similarity, message_id in heapq.nlargest(k, scored)]
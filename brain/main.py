@@ -4,38 +4,55 @@ Nyx Brain - Main AI Backend
 Handles intent classification, reasoning, and learning
 """
 
+import os
 import sys
 import json
 import asyncio
+import signal
 from datetime import datetime
+from pathlib import Path
 
-from nlu.intent_classifier import IntentClassifier
-from nlu.entity_extractor import EntityExtractor
+# Import through the brain package, as brain_core and the modules do, so
+# that shared state (the app gazetteer...) exists once per process
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from brain.nlu.intent_cascade import build_intent_cascade
+from brain.nlu.entity_extractor import EntityExtractor
 from reasoning.reasoner import Reasoner
 from reasoning.task_planner import TaskPlanner
-from learning.q_learning import QLearningSystem
-from memory import MemoryManager
-from context import ContextAnalyzer
+from brain.learning.q_learning import build_q_learning
+from brain.memory import MemoryManager
+from brain.context import ContextAnalyzer
+from brain.ipc import MessageChannel
+from brain.intent_router import default_router
+from brain.conversation import ConversationHistory
+from brain.pipeline import BrainPipeline
 
-class NyxBrain:
+class NyxBrain(BrainPipeline):
     def __init__(self):
-        self.intent_classifier = IntentClassifier()
+        self.intent_classifier = build_intent_cascade()
         self.entity_extractor = EntityExtractor()
         self.reasoner = Reasoner()
         self.task_planner = TaskPlanner()
-        self.q_learning = QLearningSystem()
+        self.q_learning = build_q_learning()
         self.memory = MemoryManager()
         self.context_analyzer = ContextAnalyzer()
+        self.router = default_router
         
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory(capacity=50)
         self.initialized = False
+        self.channel = None
+        
+        self._init_pipeline()
+        self.metrics.add_source('memory', self.memory.get_stats)
         
     async def initialize(self):
         """Initialize all brain components"""
         print("Initializing Nyx Brain...", file=sys.stderr)
         
         await self.memory.load()
-        await self.q_learning.load()
+        await self.q_learning.initialize()
+        await self.intent_classifier.load()
         
         self.initialized = True
         print("Brain initialized successfully", file=sys.stderr)
@@ -63,25 +80,24 @@ class NyxBrain:
             'timestamp': datetime.now().isoformat()
         }
         
-        # Classify intent
-        intent = self.intent_classifier.classify(message)
+        # Classify intent, apply the Q-Learning boost and extract entities
+        intent, entities = self._perceive_cached(message)
         perception['intent'] = intent
-        
-        # Apply Q-Learning boost
-        q_boost = self.q_learning.get_confidence_boost(message, intent['intent'])
-        if q_boost != 0:
-            old_conf = intent['confidence']
-            intent['confidence'] = max(0, min(1, intent['confidence'] + q_boost))
-            print(f"Q-Boost: {old_conf:.2f} -> {intent['confidence']:.2f}", file=sys.stderr)
-        
-        # Extract entities
-        entities = self.entity_extractor.extract(message)
         perception['entities'] = entities
         
         # Analyze context
-        context = self.context_analyzer.analyze(message, self.conversation_history)
+        context = self.context_analyzer.analyze(message, self.conversation_history, intent['intent'])
         perception['context'] = context
         
+        # Fill in what a follow-up ("close it", "louder") leaves out
+        follow_up = context['follow_up']
+        if follow_up:
+            if intent['intent'] == 'unknown':
+                perception['intent'] = {'intent': follow_up['intent'], 'confidence': follow_up['confidence']}
+            if perception['intent']['intent'] == follow_up['intent']:
+                for kind, value in follow_up['entities'].items():
+                    entities.setdefault(kind, value)
+        
         return perception
     
     async def reason(self, perception):
@@ -107,86 +123,150 @@ class NyxBrain:
     
     def map_intent_to_module(self, intent):
         """Map intent to appropriate module"""
-        intent_name = intent.get('intent', 'unknown')
-        
-        intent_map = {
-            'system.': 'system',
-            'time.': 'time',
-            'math.': 'calculator',
-            'info.weather': 'weather',
-            'music.': 'music',
-            'notes.': 'notes',
-            'unknown': 'ai'
-        }
-        
-        # Check for exact or prefix match
-        for prefix, module in intent_map.items():
-            if intent_name.startswith(prefix):
-                return module
-        
-        return 'ai'
+        return self.router.route(intent.get('intent', 'unknown'))
     
     async def learn(self, perception, decision):
         """Learning: Update from interaction"""
-        self.conversation_history.append({
-            'message': perception['raw_input'],
-            'intent': perception['intent'],
-            'timestamp': perception['timestamp']
-        })
-        
-        # Keep only last 50 messages
-        if len(self.conversation_history) > 50:
-            self.conversation_history = self.conversation_history[-50:]
+        intent = perception['intent']
+        self.conversation_history.record(
+            perception['raw_input'],
+            intent['intent'],
+            intent['confidence'],
+            decision['module'],
+            perception['entities'],
+            perception['timestamp']
+        )
         
         await self.memory.store_interaction(perception, decision)
     
-    def send_response(self, response):
+    async def send_response(self, response, request_id=None):
         """Send response to Node.js via stdout"""
         output = {
             'type': 'response',
             'data': response
         }
-        print(json.dumps(output), flush=True)
+        await self.send(output, request_id)
+        
+    async def send_error(self, error, request_id=None):
+        """Report a failed command to Node.js"""
+        await self.send({'type': 'error', 'error': error}, request_id)
+        
+    async def send_stats(self, data):
+        """Answer a 'stats' command: JSON statistics, or the text dump with format 'text'"""
+        if data.get('format') == 'text':
+            output = {'type': 'stats', 'format': 'text', 'data': self.metrics.render()}
+        else:
+            output = {'type': 'stats', 'data': self.metrics.get_stats()}
+        await self.send(output, data.get('id'))
+        
+    async def send(self, output, request_id=None):
+        """Write one message, tagged with the request ID if there is one"""
+        if request_id is not None:
+            output['id'] = request_id
+            
+        if self.channel is None:
+            print(json.dumps(output), flush=True)
+            return
+            
+        await self.channel.send(output)
+
+async def open_stdio():
+    """Attach a message channel to stdin/stdout (which must be pipes)"""
+    loop = asyncio.get_event_loop()
+    
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    
+    return MessageChannel(reader, writer)
+
+async def handle_command(brain, data):
+    """Process one command and build its response"""
+    message = data.get('message', '')
+                
+    # Process the message
+    decision = await brain.process(message)
+                
+    return {
+        'text': f"Processed: {message}",
+        'type': 'info',
+        'module': decision['module'],
+        'intent': decision['perception']['intent'],
+        'confidence': decision['confidence'],
+        'timestamp': datetime.now().isoformat()
+    }
+                
+async def run_command(brain, data, semaphore):
+    """Run a command and send its response, releasing its concurrency slot"""
+    request_id = data.get('id')
+    try:
+        response = await handle_command(brain, data)
+        await brain.send_response(response, request_id)
+    except Exception as e:
+        print(f"Error processing command: {e}", file=sys.stderr)
+        await brain.send_error(str(e), request_id)
+    finally:
+        semaphore.release()
 
 async def main():
     brain = NyxBrain()
     await brain.initialize()
     
+    brain.channel = await open_stdio()
+    
+    # SIGTERM (start-nyx.sh stopping the backend) ends input like EOF, so
+    # the flushes below still run
+    try:
+        asyncio.get_event_loop().add_signal_handler(signal.SIGTERM, brain.channel.reader.feed_eof)
+    except (NotImplementedError, RuntimeError):
+        pass
+        
+    # Commands run concurrently, so one slow command does not block the rest
+    max_concurrency = int(os.environ.get('NYX_MAX_CONCURRENCY', '8'))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    in_flight = set()
+    
     print("Brain ready, listening for commands...", file=sys.stderr)
     
     # Read commands from stdin
-    loop = asyncio.get_event_loop()
-    
     while True:
         try:
-            line = await loop.run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
+            data = await brain.channel.receive()
+        except ValueError as e:
+            print(f"Decode error: {e}", file=sys.stderr)
+            continue
             
-            data = json.loads(line.strip())
+        if data is None:
+            break
             
-            if data.get('type') == 'command':
-                message = data.get('message', '')
-                
-                # Process the message
-                decision = await brain.process(message)
-                
-                # Send response back
-                response = {
-                    'text': f"Processed: {message}",
-                    'type': 'info',
-                    'module': decision['module'],
-                    'intent': decision['perception']['intent'],
-                    'confidence': decision['confidence'],
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                brain.send_response(response)
-                
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}", file=sys.stderr)
-        except Exception as e:
-            print(f"Error processing command: {e}", file=sys.stderr)
+        if data.get('type') == 'hello':
+            wire_format = await brain.channel.negotiate(data)
+            print(f"Wire format: {wire_format}", file=sys.stderr)
+            continue
+            
+        if data.get('type') == 'stats':
+            await brain.send_stats(data)
+            continue
+            
+        if data.get('type') != 'command':
+            continue
+            
+        # Stop reading while the concurrency limit is reached
+        await semaphore.acquire()
+        task = asyncio.ensure_future(run_command(brain, data, semaphore))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        
+    if in_flight:
+        await asyncio.gather(*in_flight)
+            
+    # Make sure debounced Q-table and memory writes reach disk
+    await brain.q_learning.close()
+    await brain.intent_classifier.close()
+    await brain.memory.close()
+    await brain.channel.close()
 
 if __name__ == '__main__':
     try:
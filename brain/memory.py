@@ -0,0 +1,267 @@
+"""
+Memory Manager
+Long-term memory of interactions: recent ones in memory, all of them in SQLite
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from .learning.persistence import PersistenceScheduler
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    message TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    module TEXT,
+    entities TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interactions_by_time ON interactions (timestamp);
+CREATE INDEX IF NOT EXISTS interactions_by_intent ON interactions (intent, timestamp);
+
+CREATE TABLE IF NOT EXISTS interaction_entities (
+    interaction_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_by_value ON interaction_entities (kind, value, timestamp);
+'''
+
+COLUMNS = 'timestamp, message, intent, confidence, module, entities'
+
+def entity_values(value):
+    """Indexable string values of one entity (lists give one value per item)"""
+    if isinstance(value, list):
+        return [item for element in value for item in entity_values(element)]
+    if isinstance(value, dict):
+        return [json.dumps(value, sort_keys=True)]
+    return [str(value)]
+
+def day_range(days_ago=0):
+    """(since, until) timestamps of a local calendar day (1 = yesterday)"""
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days_ago)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+class MemoryManager:
+    """
+    Tiered interaction memory
+    
+    The hot tier is a deque of the most recent interactions, including ones
+    not written yet; queries it can answer completely never touch the disk.
+    The cold tier is a SQLite database indexed by time, by intent and time,
+    and by entity value and time, so recall ("what did I open yesterday")
+    is an index lookup. store_interaction() only queues the record: a
+    PersistenceScheduler writes queued records in batches from a thread.
+    """
+    
+    def __init__(self, path='data/memory.db', hot_size=200, delay=0.5, max_staleness=5.0):
+        self.path = Path(path)
+        self.hot = deque(maxlen=hot_size)
+        self.pending = []
+        self.writing = None
+        self.db = None
+        self.reader = None
+        
+        # Every interaction at or after this time is in the hot tier
+        self.hot_complete_since = float('inf')
+        
+        self.stored = 0
+        self.cold_queries = 0
+        self.hot_queries = 0
+        
+        self.scheduler = PersistenceScheduler(self._take_batch, self._write_batch, delay, max_staleness)
+        
+    async def load(self):
+        """Open the database and warm the hot tier with the latest interactions"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Writes happen in the scheduler's thread, reads in their own
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.reader = sqlite3.connect(str(self.path), check_same_thread=False)
+        
+        rows = self.reader.execute(
+            f'SELECT {COLUMNS} FROM interactions ORDER BY timestamp DESC LIMIT ?',
+            (self.hot.maxlen,)
+        ).fetchall()
+        self.hot.extend(self._row_to_record(row) for row in reversed(rows))
+        self._update_hot_bound()
+        
+    def _row_to_record(self, row):
+        timestamp, message, intent, confidence, module, entities = row
+        return {
+            'timestamp': timestamp,
+            'message': message,
+            'intent': intent,
+            'confidence': confidence,
+            'module': module,
+            'entities': json.loads(entities)
+        }
+        
+    def _update_hot_bound(self):
+        if len(self.hot) < self.hot.maxlen:
+            # Nothing was ever evicted: the hot tier holds everything
+            self.hot_complete_since = float('-inf')
+        else:
+            self.hot_complete_since = self.hot[0]['timestamp']
+            
+    async def store_interaction(self, perception, decision):
+        """Remember an interaction (returns immediately; written in the background)"""
+        intent = perception['intent']
+        record = {
+            'timestamp': time.time(),
+            'message': perception['raw_input'],
+            'intent': intent['intent'],
+            'confidence': intent['confidence'],
+            'module': decision.get('module'),
+            'entities': perception.get('entities') or {}
+        }
+        
+        self.hot.append(record)
+        self._update_hot_bound()
+        self.pending.append(record)
+        self.scheduler.mark_dirty()
+        
+    def _take_batch(self):
+        # A batch whose write failed goes out again with the new records
+        batch = (self.writing or []) + self.pending
+        self.pending = []
+        self.writing = batch
+        return batch
+        
+    def _write_batch(self, batch):
+        with self.db:
+            for record in batch:
+                cursor = self.db.execute(
+                    f'INSERT INTO interactions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                    (record['timestamp'], record['message'], record['intent'], record['confidence'],
+                     record['module'], json.dumps(record['entities']))
+                )
+                self.db.executemany(
+                    'INSERT INTO interaction_entities (interaction_id, kind, value, timestamp) VALUES (?, ?, ?, ?)',
+                    [
+                        (cursor.lastrowid, kind, value, record['timestamp'])
+                        for kind, entity in record['entities'].items()
+                        for value in entity_values(entity)
+                    ]
+                )
+        self.writing = None
+        self.stored += len(batch)
+        
+    async def recall(self, intent=None, entity=None, value=None, since=None, until=None, limit=20):
+        """
+        Interactions matching every given filter, newest first
+        
+        intent is an exact intent name or a prefix ending in '.', entity an
+        entity type (optionally with one of its values), since/until
+        timestamps.
+        """
+        if since is not None and since >= self.hot_complete_since:
+            self.hot_queries += 1
+            return self._recall_hot(intent, entity, value, since, until, limit)
+            
+        # Cold query: make queued records visible to SQL first
+        await self.flush()
+        self.cold_queries += 1
+        return await asyncio.to_thread(self._recall_cold, intent, entity, value, since, until, limit)
+        
+    def _recall_hot(self, intent, entity, value, since, until, limit):
+        results = []
+        for record in reversed(self.hot):
+            timestamp = record['timestamp']
+            if timestamp < since:
+                break
+            if until is not None and timestamp >= until:
+                continue
+            if intent is not None and not self._intent_matches(record['intent'], intent):
+                continue
+            if entity is not None:
+                if entity not in record['entities']:
+                    continue
+                if value is not None and str(value) not in entity_values(record['entities'][entity]):
+                    continue
+            results.append(record)
+            if len(results) >= limit:
+                break
+        return results
+        
+    def _intent_matches(self, name, intent):
+        return name.startswith(intent) if intent.endswith('.') else name == intent
+        
+    def _recall_cold(self, intent, entity, value, since, until, limit):
+        conditions = []
+        params = []
+        
+        if intent is not None:
+            if intent.endswith('.'):
+                # Prefix as a range, so the (intent, timestamp) index applies
+                conditions.append('intent >= ? AND intent < ?')
+                params += [intent, intent[:-1] + chr(ord('.') + 1)]
+            else:
+                conditions.append('intent = ?')
+                params.append(intent)
+        if since is not None:
+            conditions.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('timestamp < ?')
+            params.append(until)
+            
+        if entity is not None:
+            subquery = 'SELECT interaction_id FROM interaction_entities WHERE kind = ?'
+            params.append(entity)
+            if value is not None:
+                subquery += ' AND value = ?'
+                params.append(str(value))
+            if since is not None:
+                subquery += ' AND timestamp >= ?'
+                params.append(since)
+            if until is not None:
+                subquery += ' AND timestamp < ?'
+                params.append(until)
+            conditions.append(f'id IN ({subquery})')
+            
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.reader.execute(
+            f'SELECT {COLUMNS} FROM interactions {where} ORDER BY timestamp DESC LIMIT ?',
+            params + [limit]
+        ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+        
+    def recent(self, n=10):
+        """The last n interactions, newest first (hot tier only)"""
+        return list(islice(reversed(self.hot), n))
+        
+    async def flush(self):
+        """Write queued interactions now"""
+        await self.scheduler.flush()
+        
+    async def close(self):
+        """Flush and close the database"""
+        if self.db is None:
+            return
+        await self.flush()
+        self.reader.close()
+        self.db.close()
+        self.db = self.reader = None
+        
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'hot': len(self.hot),
+            'pending': len(self.pending),
+            'stored': self.stored,
+            'hot_queries': self.hot_queries,
+            'cold_queries': self.cold_queries,
+            'writes': self.scheduler.writes
+        }
@@ -0,0 +1,255 @@
+"""
+Brain Metrics
+Per-stage latency histograms and a dump of every brain counter
+"""
+
+import math
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Every power of two is split into 2**SUB_BUCKET_BITS buckets
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Enough buckets for any 64-bit duration
+BUCKETS = SUB_BUCKETS * 66
+
+# Quantiles reported by get_stats() and render()
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+STAGES = ('perceive', 'reason', 'learn')
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of durations in integer nanoseconds (HDR style)
+    
+    Values below 32 ns get a bucket each; above that, every power of two
+    is split into 16 equal buckets, so any reported quantile is within
+    1/16 of the true value whatever its magnitude. Recording costs a few
+    integer operations and one increment (batches are bucketed with
+    numpy when it is installed), and memory is fixed.
+    """
+    
+    def __init__(self):
+        self.counts = [0] * BUCKETS if np is None else np.zeros(BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        
+    def record(self, ns):
+        """Add one duration (nanoseconds)"""
+        shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+        if shift < 0:
+            shift = 0
+        self.counts[(shift << SUB_BUCKET_BITS) + (ns >> shift)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+            
+    def record_many(self, values):
+        """Add a list (or numpy array) of durations (nanoseconds)"""
+        if not len(values):
+            return
+            
+        if np is not None:
+            values = np.asarray(values, dtype=np.int64)
+            # frexp's exponent is the bit length (exact below 2**53 ns)
+            shifts = np.maximum(np.frexp(values)[1] - SUB_BUCKET_BITS - 1, 0)
+            self.counts += np.bincount((shifts << SUB_BUCKET_BITS) + (values >> shifts), minlength=BUCKETS)
+            self.count += len(values)
+            self.total += int(values.sum())
+            self.max = max(self.max, int(values.max()))
+            return
+            
+        counts = self.counts
+        for ns in values:
+            shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+            if shift < 0:
+                shift = 0
+            counts[(shift << SUB_BUCKET_BITS) + (ns >> shift)] += 1
+        self.count += len(values)
+        self.total += sum(values)
+        self.max = max(self.max, max(values))
+        
+    @staticmethod
+    def bucket_range(index):
+        """Lowest and highest value (ns) counted in a bucket"""
+        if index < 2 * SUB_BUCKETS:
+            return index, index
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        sub_bucket = index - (shift << SUB_BUCKET_BITS)
+        return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+        
+    def quantile(self, q):
+        """Duration (ns) that a fraction q of the recorded values do not exceed"""
+        if not self.count:
+            return 0
+            
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        counts = self.counts if np is None else self.counts.tolist()
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_range(index)[1], self.max)
+        return self.max
+        
+    def get_stats(self):
+        """Get statistics (latencies in milliseconds)"""
+        stats = {
+            'count': self.count,
+            'avg_ms': self.total / self.count / 1e6 if self.count else 0.0,
+            'max_ms': self.max / 1e6
+        }
+        for name, q in QUANTILES.items():
+            stats[f'{name}_ms'] = self.quantile(q) / 1e6
+        return stats
+
+def metrics_enabled():
+    """Latency timing is on unless NYX_METRICS=0"""
+    return os.environ.get('NYX_METRICS', '1') != '0'
+
+def metrics_sample_every():
+    """One request in NYX_METRICS_SAMPLE is timed (default 16)"""
+    return max(1, int(os.environ.get('NYX_METRICS_SAMPLE', '16')))
+
+class BrainMetrics:
+    """
+    Latency histograms for the brain pipeline, plus counter sources
+    
+    The brain swaps in a timed process() when enabled, so with
+    NYX_METRICS=0 requests run exactly the untimed code. Even then only
+    one request in sample_every reads the clock: the others just count
+    down `skip`, which keeps timing under 1% of a request (see
+    benchmarks/bench_metrics.py). Histograms hold the sampled requests;
+    the request count is exact. Counters are not kept here: each source is
+    a get_stats() callable of a component (perception cache, Q-learning,
+    feedback manager...), read only when stats are asked for.
+    
+    The brain does not run modules, so the per-module histograms are the
+    brain's pipeline time grouped by the module a request was routed to.
+    """
+    
+    def __init__(self, enabled=None, fold_every=1024, sample_every=None):
+        self.enabled = metrics_enabled() if enabled is None else enabled
+        self.sample_every = metrics_sample_every() if sample_every is None else sample_every
+        
+        # Requests to let through untimed before the next sample
+        self.skip = 0
+        self.samples = 0
+        
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+        self.pipeline_by_module = {}
+        self.sources = {}
+        
+        # Samples are queued as raw clock readings and bucketed in batches:
+        # (module code, start, perceived, reasoned, done) per request
+        self.pending = []
+        self.module_codes = {}
+        self.fold_every = fold_every
+        
+    def record_request(self, module, start, perceived, reasoned, done):
+        """Record one sampled request from perf_counter_ns() readings between stages"""
+        self.skip = self.sample_every - 1
+        self.samples += 1
+        
+        code = self.module_codes.get(module)
+        if code is None:
+            code = self.module_codes[module] = len(self.module_codes)
+            self.pipeline_by_module[module] = LatencyHistogram()
+            
+        pending = self.pending
+        pending += (code, start, perceived, reasoned, done)
+        if len(pending) >= 5 * self.fold_every:
+            self.fold()
+            
+    def fold(self):
+        """Move queued requests into the histograms"""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+            
+        if np is not None:
+            rows = np.fromiter(pending, dtype=np.int64, count=len(pending)).reshape(-1, 5)
+            durations = np.diff(rows[:, 1:], axis=1)
+            for column, name in enumerate(STAGES):
+                self.stages[name].record_many(durations[:, column])
+                
+            totals = rows[:, 4] - rows[:, 1]
+            for module, code in self.module_codes.items():
+                self.pipeline_by_module[module].record_many(totals[rows[:, 0] == code])
+            return
+            
+        for column, name in enumerate(STAGES):
+            self.stages[name].record_many(list(map(int.__sub__, pending[column + 2::5], pending[column + 1::5])))
+            
+        by_code = {}
+        for code, duration in zip(pending[0::5], map(int.__sub__, pending[4::5], pending[1::5])):
+            by_code.setdefault(code, []).append(duration)
+        for module, code in self.module_codes.items():
+            self.pipeline_by_module[module].record_many(by_code.get(code, []))
+            
+    @property
+    def requests(self):
+        """Requests seen, sampled or not"""
+        return self.samples * self.sample_every - self.skip if self.samples else 0
+            
+    def add_source(self, name, get_stats):
+        """Include a component's get_stats() in stats and dumps"""
+        self.sources[name] = get_stats
+        
+    def get_stats(self):
+        """Get statistics"""
+        self.fold()
+        stats = {
+            'enabled': self.enabled,
+            'requests': self.requests,
+            'sample_every': self.sample_every,
+            'stages': {name: histogram.get_stats() for name, histogram in self.stages.items()},
+            'pipeline_by_module': {str(name): histogram.get_stats() for name, histogram in self.pipeline_by_module.items()}
+        }
+        for name, get_stats in self.sources.items():
+            stats[name] = get_stats()
+        return stats
+        
+    def render(self, prefix='nyx'):
+        """Dump everything in the Prometheus text format (for a /metrics endpoint)"""
+        self.fold()
+        lines = [f'# TYPE {prefix}_requests counter', f'{prefix}_requests_total {self.requests}']
+        
+        for metric, label, histograms in (
+            ('stage_seconds', 'stage', self.stages),
+            ('pipeline_seconds', 'module', self.pipeline_by_module)
+        ):
+            lines.append(f'# TYPE {prefix}_{metric} summary')
+            for name, histogram in histograms.items():
+                if not histogram.count:
+                    continue
+                labels = f'{label}="{name}"'
+                for q in QUANTILES.values():
+                    lines.append(f'{prefix}_{metric}{{{labels},quantile="{q}"}} {histogram.quantile(q) / 1e9:.9f}')
+                lines.append(f'{prefix}_{metric}_sum{{{labels}}} {histogram.total / 1e9:.9f}')
+                lines.append(f'{prefix}_{metric}_count{{{labels}}} {histogram.count}')
+                
+        for name, get_stats in self.sources.items():
+            for key, value in flatten(get_stats(), f'{prefix}_{name}'):
+                lines.append(f'{key} {value}')
+                
+        return '\n'.join(lines) + '\n'
+
+def flatten(stats, prefix):
+    """(metric name, value) for every number in a nested stats dict"""
+    for key, value in stats.items():
+        name = re.sub(r'\W', '_', f'{prefix}_{key}')
+        if isinstance(value, dict):
+            yield from flatten(value, name)
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
@@ -0,0 +1,362 @@
+"""
+App Gazetteer - NLU Component
+Installed applications and their aliases, found in a message in one pass
+"""
+
+import json
+import os
+import plistlib
+import re
+import sys
+from pathlib import Path
+
+from .tokenizer import tokenize
+
+DEFAULT_APP_DIRS = ['/Applications', '/System/Applications', '~/Applications']
+
+# Known even where no application directory can be scanned
+BUILTIN_APPS = [
+    'Safari', 'Google Chrome', 'Firefox', 'Spotify', 'Music', 'Notes', 'Mail',
+    'Calendar', 'Finder', 'Terminal'
+]
+
+# Names people use that can't be derived from the bundle name
+ALIASES = {
+    'Google Chrome': ['chrome'],
+    'Music': ['itunes', 'apple music'],
+    'Messages': ['imessage'],
+    'Visual Studio Code': ['vscode', 'vs code'],
+    'System Settings': ['settings', 'system preferences'],
+    'System Preferences': ['preferences'],
+    'Microsoft Teams': ['teams']
+}
+
+# "Microsoft Word" is also just "word"
+VENDOR_PREFIXES = {'google', 'microsoft', 'adobe', 'apple', 'mozilla'}
+
+# "Adobe Photoshop 2024" is also "adobe photoshop"
+TRAILING_VERSION = re.compile(r'\s+\d+(?:\.\d+)*$')
+
+# App names that are also everyday words ("what's the weather", "my notes"):
+# alone, they only name the app after a verb like "open" or next to "app"
+COMMON_WORDS = frozenset({
+    'books', 'calculator', 'calendar', 'camera', 'chess', 'clock', 'contacts',
+    'dictionary', 'home', 'journal', 'keynote', 'mail', 'maps', 'messages',
+    'music', 'news', 'notes', 'numbers', 'pages', 'passwords', 'phone', 'photos',
+    'podcasts', 'preferences', 'preview', 'reminders', 'settings', 'shortcuts',
+    'stocks', 'teams', 'terminal', 'tips', 'translate', 'tv', 'weather', 'word'
+})
+APP_VERBS = frozenset({
+    'open', 'launch', 'start', 'close', 'quit', 'switch', 'focus', 'show', 'hide',
+    'ouvre', 'ouvrir', 'rouvre', 'lance', 'lancer', 'ferme', 'fermer', 'quitte',
+    'quitter', 'affiche', 'afficher'
+})
+APP_NOUNS = frozenset({'app', 'application', 'appli'})
+# May sit between the verb and the name: "switch to the notes app", "ouvre l'app notes"
+APP_FILLERS = frozenset({'to', 'the', 'my', 'le', 'la', 'les', 'l', 'mon', 'ma', 'mes'}) | APP_NOUNS
+
+CACHE_VERSION = 1
+
+def app_aliases(name, bundle_names=()):
+    """Lowercased phrases that refer to an app"""
+    aliases = {name.lower()}
+    aliases.update(alias.lower() for alias in bundle_names if alias)
+    aliases.update(ALIASES.get(name, []))
+    
+    for alias in list(aliases):
+        unversioned = TRAILING_VERSION.sub('', alias)
+        aliases.add(unversioned)
+        words = unversioned.split()
+        if len(words) > 1 and words[0] in VENDOR_PREFIXES:
+            aliases.add(' '.join(words[1:]))
+            
+    return sorted(aliases)
+
+def read_bundle_names(bundle):
+    """Display names declared in an app bundle's Info.plist"""
+    try:
+        with open(bundle / 'Contents' / 'Info.plist', 'rb') as f:
+            info = plistlib.load(f)
+    except (OSError, plistlib.InvalidFileException, ValueError):
+        return []
+    return [
+        value for value in (info.get('CFBundleDisplayName'), info.get('CFBundleName'))
+        if isinstance(value, str)
+    ]
+
+def names_app(tokens, position):
+    """Whether the word at position is used as an app name ("open notes", "the notes app")"""
+    if tokens[position + 1:position + 2] and tokens[position + 1] in APP_NOUNS:
+        return True
+    previous = position - 1
+    while previous >= 0 and tokens[previous] in APP_FILLERS and position - previous <= 3:
+        previous -= 1
+    return previous >= 0 and tokens[previous] in APP_VERBS
+
+def directory_stamp(path):
+    """mtime of a directory (changes when an entry is added, removed or renamed)"""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton whose alphabet is words
+    
+    Phrases are token sequences, so a match always covers whole words, and
+    finding every phrase in a message is one walk over its tokens whatever
+    the number of phrases.
+    """
+    
+    def __init__(self, phrases):
+        # state -> {token: state}; state 0 is the root
+        self.goto = [{}]
+        self.fail = [0]
+        # state -> (length, value) of the longest phrase ending there, or None
+        self.output = [None]
+        
+        for tokens, value in phrases.items():
+            state = 0
+            for token in tokens:
+                next_state = self.goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                state = next_state
+            self.output[state] = (len(tokens), value)
+            
+        # Failure links, breadth first: the longest proper suffix that is a prefix
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for token, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                if self.output[child] is None:
+                    self.output[child] = self.output[self.fail[child]]
+                queue.append(child)
+                
+        self.first_tokens = frozenset(self.goto[0])
+        
+        # One-word phrases no longer phrase starts with: found without a walk
+        self.single_words = {
+            token: self.output[state][1] for token, state in self.goto[0].items()
+            if not self.goto[state] and self.output[state] is not None
+        }
+        
+    def __len__(self):
+        return len(self.goto)
+        
+    def search(self, tokens, start=0):
+        """(start, length, value) of the leftmost (then longest) phrase from tokens[start], or None"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        root = goto[0]
+        
+        state = 0
+        best_start = len(tokens)
+        best = None
+        for position in range(start, len(tokens)):
+            token = tokens[position]
+            if state:
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0)
+            else:
+                if best is not None:
+                    # Any later phrase would start after the one found
+                    break
+                # Outside any phrase: one lookup in the root's transitions
+                state = root.get(token, 0)
+                if not state:
+                    continue
+                    
+            match = output[state]
+            if match is not None:
+                match_start = position - match[0] + 1
+                # Same start and a later end: a longer phrase
+                if match_start <= best_start:
+                    best_start = match_start
+                    best = match
+                    
+        return None if best is None else (best_start, best[0], best[1])
+
+class AppGazetteer:
+    """
+    Applications found by scanning app bundle directories
+    
+    Every *.app bundle in the directories (and in their plain
+    subdirectories, like Utilities) is an app; its aliases come from the
+    bundle name, its Info.plist and a few rules. The result is cached on
+    disk with the mtime of every directory scanned, so startup only rescans
+    after an app is installed, removed or renamed.
+    """
+    
+    def __init__(self, directories=None, cache_path='data/app_gazetteer.json'):
+        self.directories = [Path(d).expanduser() for d in (directories or DEFAULT_APP_DIRS)]
+        self.cache_path = Path(cache_path) if cache_path else None
+        
+        # app name -> aliases
+        self.apps = {}
+        # scanned directory -> mtime
+        self.stamps = {}
+        self.automaton = None
+        # Words an app name can start with (None until loaded)
+        self.first_tokens = None
+        
+        self.scans = 0
+        self.cache_loads = 0
+        
+    def load(self):
+        """Use the cached gazetteer if still valid, otherwise rescan"""
+        if not self._load_cache():
+            self._scan()
+            self._save_cache()
+        self._build()
+        return self
+        
+    def refresh(self):
+        """Rescan if a scanned directory changed; return whether it did"""
+        if self.automaton is not None and not self._stale(self.stamps):
+            return False
+        self._scan()
+        self._save_cache()
+        self._build()
+        return True
+        
+    def _stale(self, stamps):
+        return any(directory_stamp(Path(path)) != stamp for path, stamp in stamps.items())
+        
+    def _scan(self):
+        apps = {}
+        stamps = {}
+        
+        def scan_directory(directory, depth):
+            stamps[str(directory)] = directory_stamp(directory)
+            try:
+                entries = sorted(directory.iterdir())
+            except OSError:
+                return
+            for entry in entries:
+                if entry.suffix == '.app':
+                    apps.setdefault(entry.stem, read_bundle_names(entry))
+                elif depth and entry.is_dir():
+                    scan_directory(entry, depth - 1)
+                    
+        for directory in self.directories:
+            scan_directory(directory, 1)
+            
+        for name in BUILTIN_APPS:
+            apps.setdefault(name, [])
+            
+        self.apps = {name: app_aliases(name, bundle_names) for name, bundle_names in apps.items()}
+        self.stamps = stamps
+        self.scans += 1
+        
+    def _load_cache(self):
+        if self.cache_path is None:
+            return False
+        try:
+            cached = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return False
+            
+        directories = [str(directory) for directory in self.directories]
+        if cached.get('version') != CACHE_VERSION or cached.get('directories') != directories:
+            return False
+        if self._stale(cached['stamps']):
+            return False
+            
+        self.apps = cached['apps']
+        self.stamps = cached['stamps']
+        self.cache_loads += 1
+        return True
+        
+    def _save_cache(self):
+        if self.cache_path is None:
+            return
+        data = {
+            'version': CACHE_VERSION,
+            'directories': [str(directory) for directory in self.directories],
+            'stamps': self.stamps,
+            'apps': self.apps
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix('.tmp')
+            temp_path.write_text(json.dumps(data))
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️  Could not cache app gazetteer: {e}", file=sys.stderr)
+            
+    def _build(self):
+        phrases = {}
+        # Builtin names first so a scanned app can't take over their aliases
+        for name in sorted(self.apps, key=lambda name: name not in BUILTIN_APPS):
+            for alias in self.apps[name]:
+                tokens = tuple(tokenize(alias))
+                if tokens:
+                    phrases.setdefault(tokens, name)
+        self.automaton = PhraseAutomaton(phrases)
+        self.first_tokens = self.automaton.first_tokens
+        
+    def match(self, tokens):
+        """App named by a tokenized lowercased message, or None"""
+        automaton = self.automaton
+        if automaton is None:
+            automaton = self.load().automaton
+        # Most messages share no word with any app name: skip the walk
+        first_tokens = automaton.first_tokens
+        if first_tokens.isdisjoint(tokens):
+            return None
+            
+        # Most app names are one word: walk only from a word that may start a longer one
+        single_words = automaton.single_words
+        for position, token in enumerate(tokens):
+            if token not in first_tokens:
+                continue
+            name = single_words.get(token)
+            if name is None:
+                match = automaton.search(tokens, position)
+                if match is None:
+                    return None
+                position, length, name = match
+                if length > 1:
+                    return name
+                token = tokens[position]
+            # A common word only counts where it is used as an app's name
+            # ("open notes" is by far the most frequent)
+            if token not in COMMON_WORDS or (position and tokens[position - 1] in APP_VERBS) or names_app(tokens, position):
+                return name
+        return None
+        
+    def find(self, text):
+        """App named in a message, or None"""
+        return self.match(tokenize(text.lower()))
+        
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'apps': len(self.apps),
+            'aliases': sum(len(aliases) for aliases in self.apps.values()),
+            'states': len(self.automaton) if self.automaton is not None else 0,
+            'directories': len(self.stamps),
+            'scans': self.scans,
+            'cache_loads': self.cache_loads
+        }
+
+_shared_gazetteer = None
+
+def get_app_gazetteer():
+    """Return the gazetteer shared by the NLU and the modules"""
+    global _shared_gazetteer
+    if _shared_gazetteer is None:
+        directories = os.environ.get('NYX_APP_DIRS')
+        _shared_gazetteer = AppGazetteer(directories.split(os.pathsep) if directories else None)
+    return _shared_gazetteer
@@ -0,0 +1,25 @@
+"""
+Batch helpers - NLU Component
+Runs NLU stages over large lists of messages
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CHUNK_SIZE = 2000
+
+def map_batch(func, items, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply a list -> list function to items, optionally across a process pool"""
+    items = list(items)
+    
+    # Small inputs are cheaper to run in process than to pickle
+    if not workers or len(items) <= chunk_size:
+        return func(items)
+        
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_result in executor.map(func, chunks):
+            results.extend(chunk_result)
+            
+    return results
@@ -3,39 +3,176 @@ Entity Extractor - NLU Component
 Extracts entities from user input
 """
 
-import re
+from .app_gazetteer import get_app_gazetteer
+from .batching import map_batch
+from .tokenizer import tokenize
+
+# Unit word -> (canonical unit, seconds)
+UNITS = {}
+for _words, _unit, _seconds in [
+    (('second', 'seconds', 'sec', 'secs', 'seconde', 'secondes'), 'seconds', 1),
+    (('minute', 'minutes', 'min', 'mins'), 'minutes', 60),
+    (('hour', 'hours', 'hr', 'hrs', 'heure', 'heures'), 'hours', 3600)
+]:
+    for _word in _words:
+        UNITS[_word] = (_unit, _seconds)
+
+# Single-letter units only count when glued to a number ("10m", "2h")
+ATTACHED_UNITS = {'s': ('seconds', 1), 'm': ('minutes', 60), 'h': ('hours', 3600)}
+
+UNIT_SECONDS = {'seconds': 1, 'minutes': 60, 'hours': 3600}
+SMALLER_UNIT = {'hours': 'minutes', 'minutes': 'seconds'}
+
+# Spelled-out numbers (English and French); consecutive words add up
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'fifteen': 15,
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'ninety': 90,
+    'un': 1, 'une': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5, 'sept': 7,
+    'huit': 8, 'neuf': 9, 'dix': 10, 'onze': 11, 'douze': 12, 'quinze': 15,
+    'vingt': 20, 'trente': 30, 'quarante': 40, 'cinquante': 50, 'soixante': 60,
+    'a': 1, 'an': 1
+}
+
+# Words that may sit between the parts of one duration
+CONNECTORS = {'and', 'et'}
+HALVES = {'half', 'demi', 'demie'}
+ARTICLES = {'a', 'an', 'un', 'une'}
+
+# Every word that can be part of an entity -> (kind, value)
+WORDS = {}
+WORDS.update((word, ('unit', unit)) for word, unit in UNITS.items())
+WORDS.update((word, ('number', number)) for word, number in NUMBER_WORDS.items())
+WORDS.update((word, ('half', None)) for word in HALVES)
+WORDS.update((word, ('connector', None)) for word in CONNECTORS)
+
+UNIT_WORDS = frozenset(UNITS)
 
 class EntityExtractor:
+    def __init__(self, gazetteer=None):
+        self.gazetteer = gazetteer or get_app_gazetteer()
+        
     def extract(self, text):
         """Extract entities from text"""
+        tokens = tokenize(text.lower())
         entities = {}
         
-        # Numbers
-        numbers = re.findall(r'\d+', text)
+        # Most messages name no app: checked here, without calling the gazetteer
+        first_tokens = self.gazetteer.first_tokens
+        if first_tokens is None or not first_tokens.isdisjoint(tokens):
+            app = self.gazetteer.match(tokens)
+            if app is not None:
+                entities['app'] = app
+                
+        if UNIT_WORDS.isdisjoint(tokens):
+            # No unit, so no duration: only the numbers matter (number tokens
+            # sort before ':'; int() rejects one with a unit glued on, "10m")
+            try:
+                numbers = [int(token) for token in tokens if token < ':']
+                if numbers:
+                    entities['numbers'] = numbers
+                return entities
+            except ValueError:
+                pass
+            
+        numbers, total, smallest = self._scan(tokens)
         if numbers:
-            entities['numbers'] = [int(n) for n in numbers]
+            entities['numbers'] = numbers
+            
+        if total:
+            # Smallest unit mentioned, or finer if halves need it
+            unit = smallest
+            while total % UNIT_SECONDS[unit]:
+                unit = SMALLER_UNIT[unit]
+            entities['duration'] = {
+                'value': total // UNIT_SECONDS[unit],
+                'unit': unit,
+                'seconds': total
+            }
             
-        # Applications
-        apps = ['safari', 'chrome', 'spotify', 'music', 'notes', 'mail', 'calendar']
-        for app in apps:
-            if app in text.lower():
-                entities['app'] = app.capitalize()
-                break
+        return entities
+        
+    def extract_batch(self, texts, workers=None):
+        """Extract entities from many texts, optionally fanning out to a process pool"""
+        return map_batch(self._extract_chunk, list(texts), workers)
+        
+    def _extract_chunk(self, texts):
+        """Extract entities from one chunk of a batch"""
+        return [self.extract(text) for text in texts]
+        
+    def _scan(self, tokens):
+        """
+        Numbers, duration in seconds and smallest unit used, in one walk
+        
+        A quantity (digits or spelled-out words) followed by a unit adds to
+        the duration; parts that follow each other, optionally joined by
+        "and"/"et", form one compound duration ("1 hour 30 minutes", "une
+        heure et demie"). Any other word ends it, so a later quantity is not
+        folded in.
+        """
+        numbers = []
+        lookup = WORDS.get
+        
+        quantity = None
+        spelled = False
+        total = 0
+        smallest = None
+        last_unit = None
+        duration_open = True
+        
+        for token in tokens:
+            entry = lookup(token)
+            
+            if entry is None:
+                if token > ':':
+                    # Any other word ends the duration and drops a dangling quantity
+                    if quantity is not None or total:
+                        quantity = None
+                        spelled = False
+                        if total:
+                            duration_open = False
+                    continue
+                    
+                if token.isdecimal():
+                    quantity = int(token)
+                    spelled = False
+                    numbers.append(quantity)
+                    continue
+                    
+                # A number with its unit glued on ("10m", "2h")
+                quantity = int(token[:-1])
+                numbers.append(quantity)
+                kind, value = 'unit', ATTACHED_UNITS[token[-1]]
+            else:
+                kind, value = entry
                 
-        # Time expressions
-        time_patterns = [
-            (r'(\d+)\s*minutes?', 'minutes'),
-            (r'(\d+)\s*hours?', 'hours'),
-            (r'(\d+)\s*seconds?', 'seconds')
-        ]
-        
-        for pattern, unit in time_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                entities['duration'] = {
-                    'value': int(match.group(1)),
-                    'unit': unit
-                }
-                break
+            if kind == 'unit':
+                if quantity is not None and duration_open:
+                    name, seconds = value
+                    total += int(quantity * seconds)
+                    if smallest is None or seconds < UNIT_SECONDS[smallest]:
+                        smallest = name
+                    last_unit = value
+                quantity = None
+                spelled = False
                 
-        return entities
+            elif kind == 'number':
+                if quantity == 0.5 and token in ARTICLES:
+                    # "half an hour"
+                    continue
+                # "vingt cinq" -> 25
+                quantity = quantity + value if spelled and quantity is not None else value
+                spelled = True
+                
+            elif kind == 'half':
+                if last_unit is not None and duration_open:
+                    # "an hour and a half": half of the unit just used
+                    total += last_unit[1] // 2
+                    last_unit = None
+                    quantity = None
+                else:
+                    # "half an hour", "une demi-heure"
+                    quantity = 0.5
+                    spelled = False
+                    
+        return numbers, total, smallest
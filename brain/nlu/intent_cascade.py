@@ -0,0 +1,144 @@
+"""
+Intent Cascade - NLU Component
+Chains intent engines from cheapest to most expensive
+"""
+
+import time
+
+from .intent_classifier import IntentClassifier
+from .intent_model import IntentModel, np
+
+class IntentCascade:
+    """
+    Asks each engine in turn until one is sure
+    
+    Stages are (engine, threshold) pairs. An answer whose confidence
+    reaches the stage's threshold is final; otherwise the next engine is
+    asked, and the most confident answer seen wins. Engines have a `name`,
+    classify(text) and classify_batch(texts, workers) returning
+    {'intent', 'confidence'} or None (no opinion); engines with a learn()
+    are trained by learn(). The answer is returned as the engine gave it;
+    which engine answered, and the time spent in each, are only recorded
+    in the stats.
+    """
+    
+    def __init__(self, stages):
+        self.stages = stages
+        self.update_listeners = []
+        
+        # engine name -> [calls, messages, seconds, slowest call]
+        self.timings = {engine.name: [0, 0, 0.0, 0.0] for engine, _ in stages}
+        # engine name -> messages it gave the final answer for
+        self.answers = {engine.name: 0 for engine, _ in stages}
+        
+    def _timed(self, engine, method, texts, *args):
+        start = time.perf_counter()
+        result = method(texts, *args)
+        elapsed = time.perf_counter() - start
+        
+        timing = self.timings[engine.name]
+        timing[0] += 1
+        timing[1] += len(texts) if isinstance(texts, list) else 1
+        timing[2] += elapsed
+        timing[3] = max(timing[3], elapsed)
+        return result
+        
+    def classify(self, text):
+        """Classify intent from text"""
+        best = best_engine = None
+        for engine, threshold in self.stages:
+            result = self._timed(engine, engine.classify, text)
+            if result is None:
+                continue
+            if best is None or result['confidence'] > best['confidence']:
+                best, best_engine = result, engine.name
+            if best['confidence'] >= threshold:
+                break
+                
+        if best is None:
+            return {'intent': 'unknown', 'confidence': 0.3}
+        self.answers[best_engine] += 1
+        return best
+        
+    def classify_batch(self, texts, workers=None):
+        """Classify many texts; each stage only sees the ones still unsure"""
+        texts = list(texts)
+        results = [None] * len(texts)
+        engines = [None] * len(texts)
+        unsure = list(range(len(texts)))
+        
+        for engine, threshold in self.stages:
+            if not unsure:
+                break
+            answers = self._timed(engine, engine.classify_batch, [texts[i] for i in unsure], workers)
+            
+            still_unsure = []
+            for i, result in zip(unsure, answers):
+                if result is not None and (results[i] is None or result['confidence'] > results[i]['confidence']):
+                    results[i], engines[i] = result, engine.name
+                if results[i] is None or results[i]['confidence'] < threshold:
+                    still_unsure.append(i)
+            unsure = still_unsure
+            
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = {'intent': 'unknown', 'confidence': 0.3}
+            else:
+                self.answers[engines[i]] += 1
+        return results
+        
+    def add_update_listener(self, callback):
+        """Call callback() after learn() changed an engine"""
+        self.update_listeners.append(callback)
+        
+    async def learn(self, examples):
+        """Train the engines that learn on (message, intent) pairs"""
+        examples = list(examples)
+        if not examples:
+            return
+            
+        learned = False
+        for engine, _ in self.stages:
+            if hasattr(engine, 'learn'):
+                await engine.learn(examples)
+                learned = True
+                
+        if learned:
+            for callback in self.update_listeners:
+                callback()
+                
+    async def load(self):
+        """Load the engines' saved state"""
+        for engine, _ in self.stages:
+            if hasattr(engine, 'load'):
+                await engine.load()
+                
+    async def close(self):
+        """Save the engines' state"""
+        for engine, _ in self.stages:
+            if hasattr(engine, 'close'):
+                await engine.close()
+                
+    def get_stats(self):
+        """Get statistics (latencies in milliseconds)"""
+        engines = {}
+        for engine, threshold in self.stages:
+            calls, messages, seconds, slowest = self.timings[engine.name]
+            engines[engine.name] = {
+                'threshold': threshold,
+                'calls': calls,
+                'answers': self.answers[engine.name],
+                'avg_ms': seconds * 1000 / calls if calls else 0.0,
+                'per_message_ms': seconds * 1000 / messages if messages else 0.0,
+                'max_ms': slowest * 1000
+            }
+            if hasattr(engine, 'get_stats'):
+                engines[engine.name].update(engine.get_stats())
+        return {'engines': engines}
+
+def build_intent_cascade(model_path='data/intent_model.npz', threshold=0.80):
+    """Regex patterns first, then the learned model when numpy is available"""
+    stages = [(IntentClassifier(), threshold)]
+    if np is not None:
+        stages.append((IntentModel(model_path), 1.0))
+    return IntentCascade(stages)
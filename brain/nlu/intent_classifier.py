@@ -5,9 +5,14 @@ Classifies user intent from natural language
 
 import re
 
+from .batching import map_batch
+
 class IntentClassifier:
+    name = 'regex'
+    
     def __init__(self):
         self.patterns = self._init_patterns()
+        self._compile_patterns()
         
     def _init_patterns(self):
         """Initialize intent patterns"""
@@ -78,25 +83,58 @@ class IntentClassifier:
             ]
         }
         
+    def _compile_patterns(self):
+        """Compile all patterns once into the matching engine"""
+        self._intent_names = list(self.patterns)
+        
+        # Anchored alternation, one named group per intent, tried in
+        # declaration order so the first full match wins
+        anchored = []
+        searchers = []
+        for index, intent in enumerate(self._intent_names):
+            patterns = self.patterns[intent]
+            full = '|'.join(f'^{pattern}$' for pattern in patterns)
+            anchored.append(f'(?P<i{index}>{full})')
+            searchers.append((intent, re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))))
+            
+        self._anchored = re.compile('|'.join(anchored))
+        self._searchers = searchers
+        self._any = re.compile('|'.join(f'(?:{regex.pattern})' for _, regex in searchers))
+        
     def classify(self, text):
         """Classify intent from text"""
-        text_lower = text.lower()
+        return self._classify_lower(text.lower())
         
-        best_match = {
-            'intent': 'unknown',
-            'confidence': 0.3
-        }
+    def classify_batch(self, texts, workers=None):
+        """Classify many texts, optionally fanning out to a process pool"""
+        return map_batch(self._classify_chunk, [text.lower() for text in texts], workers)
+        
+    def _classify_chunk(self, texts_lower):
+        """Classify already lowercased texts, matching each distinct text once"""
+        seen = {}
+        results = []
+        for text_lower in texts_lower:
+            result = seen.get(text_lower)
+            if result is None:
+                result = seen[text_lower] = self._classify_lower(text_lower)
+            results.append(dict(result))
+            
+        return results
         
-        for intent, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    # Calculate confidence based on pattern match quality
-                    confidence = 0.85 if re.match(f'^{pattern}$', text_lower) else 0.70
-                    
-                    if confidence > best_match['confidence']:
-                        best_match = {
-                            'intent': intent,
-                            'confidence': confidence
-                        }
-                        
-        return best_match
+    def _classify_lower(self, text_lower):
+        """Classify intent from lowercased text"""
+        # Single pass rejects messages no pattern can match
+        if not self._any.search(text_lower):
+            return {'intent': 'unknown', 'confidence': 0.3}
+            
+        # Calculate confidence based on pattern match quality
+        match = self._anchored.match(text_lower)
+        if match:
+            intent = self._intent_names[int(match.lastgroup[1:])]
+            return {'intent': intent, 'confidence': 0.85}
+            
+        for intent, regex in self._searchers:
+            if regex.search(text_lower):
+                return {'intent': intent, 'confidence': 0.70}
+                
+        return {'intent': 'unknown', 'confidence': 0.3}
\ No newline at end of file
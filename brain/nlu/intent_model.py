@@ -0,0 +1,277 @@
+"""
+Intent Model - NLU Component
+Linear intent classifier over hashed TF-IDF n-grams, learned from feedback
+"""
+
+import math
+import os
+import random
+import sys
+import zlib
+from collections import Counter, deque
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..learning.persistence import PersistenceScheduler
+
+from .tokenizer import tokenize
+
+MODEL_VERSION = 1
+
+class IntentModel:
+    """
+    Softmax regression on hashed word, bigram and character trigram features
+    
+    Features are hashed into a fixed number of buckets, weighted by
+    sublinear term frequency times IDF and L2-normalized, so the model
+    never needs a vocabulary. A batch of messages is scored with one
+    gather and one segmented sum over the weight matrix. learn() takes one
+    minibatch gradient step on the new examples plus a sample of earlier
+    ones (kept in a bounded replay buffer), so a correction sticks without
+    making the model forget what it knew. Intents are added as they appear.
+    """
+    
+    name = 'model'
+    
+    def __init__(self, path='data/intent_model.npz', n_features=2 ** 14, learning_rate=1.0,
+                 replay_size=2000, replay_sample=31, steps=3, min_examples=10,
+                 min_confidence=0.5):
+        if np is None:
+            raise RuntimeError('IntentModel needs numpy')
+            
+        self.path = Path(path) if path else None
+        self.n_features = n_features
+        self.learning_rate = learning_rate
+        self.replay_sample = replay_sample
+        self.steps = steps
+        # Below this many examples, or this probability, the model does not answer
+        self.min_examples = min_examples
+        self.min_confidence = min_confidence
+        
+        self.intents = []
+        self.intent_ids = {}
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+        
+        # Document frequencies of the features, for IDF
+        self.doc_freq = np.zeros(n_features, dtype=np.float32)
+        self.documents = 0
+        self.idf = np.ones(n_features, dtype=np.float32)
+        
+        # (text_lower, intent) pairs learned so far, oldest dropped first
+        self.replay = deque(maxlen=replay_size)
+        self.rng = random.Random(1)
+        
+        # Words repeat across messages, so their feature hashes are cached
+        self.word_features = {}
+        self.max_cached_words = 50000
+        
+        self.scheduler = None
+        self.examples = 0
+        self.predictions = 0
+        
+    def _word_hashes(self, word):
+        hashes = self.word_features.get(word)
+        if hashes is None:
+            marked = f'<{word}>'
+            hashes = [zlib.crc32(f'w:{word}'.encode())] + [
+                zlib.crc32(f'c:{marked[i:i + 3]}'.encode()) for i in range(len(marked) - 2)
+            ]
+            if len(self.word_features) < self.max_cached_words:
+                self.word_features[word] = hashes
+        return hashes
+        
+    def _hashes(self, text_lower):
+        """Feature buckets of a message, with counts"""
+        words = tokenize(text_lower)
+        counts = Counter()
+        previous = None
+        for word in words:
+            hashes = self._word_hashes(word)
+            counts.update(hash_value % self.n_features for hash_value in hashes)
+            if previous is not None:
+                counts[((previous * 1000003) ^ hashes[0]) % self.n_features] += 1
+            previous = hashes[0]
+        return counts
+        
+    def _vectorize(self, texts_lower):
+        """
+        Sparse rows of a batch: (bucket indices, values, row start offsets)
+        
+        Rows follow each other in the flat arrays; every row has at least
+        one entry (an empty message gets bucket 0 with weight 0).
+        """
+        indices = []
+        raw_values = []
+        offsets = []
+        for text_lower in texts_lower:
+            offsets.append(len(indices))
+            counts = self._hashes(text_lower)
+            if not counts:
+                indices.append(0)
+                raw_values.append(0.0)
+                continue
+            indices.extend(counts)
+            raw_values.extend(1.0 + math.log(count) for count in counts.values())
+            
+        indices = np.fromiter(indices, dtype=np.int64, count=len(indices))
+        values = np.fromiter(raw_values, dtype=np.float32, count=len(raw_values)) * self.idf[indices]
+        offsets = np.fromiter(offsets, dtype=np.int64, count=len(offsets))
+        
+        # L2-normalize each row
+        norms = np.sqrt(np.add.reduceat(values * values, offsets))
+        norms[norms == 0] = 1.0
+        rows = np.repeat(np.arange(len(offsets)), np.diff(np.append(offsets, len(indices))))
+        values /= norms[rows]
+        return indices, values, offsets, rows
+        
+    def _scores(self, indices, values, offsets):
+        # Gather the weight rows of every entry, then sum them per message
+        return np.add.reduceat(self.weights[indices] * values[:, None], offsets) + self.bias
+        
+    def _softmax(self, scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+        
+    @property
+    def ready(self):
+        return len(self.intents) >= 2 and self.examples >= self.min_examples
+        
+    def classify(self, text):
+        """Most likely intent and its probability, or None when unsure or untrained"""
+        return self.classify_batch([text])[0]
+        
+    def classify_batch(self, texts, workers=None):
+        """Classify many texts with one matrix product (workers is ignored)"""
+        texts = list(texts)
+        if not self.ready or not texts:
+            return [None] * len(texts)
+            
+        indices, values, offsets, _ = self._vectorize([text.lower() for text in texts])
+        probabilities = self._softmax(self._scores(indices, values, offsets))
+        best = probabilities.argmax(axis=1)
+        self.predictions += len(texts)
+        
+        results = []
+        for row, intent_id in enumerate(best):
+            confidence = float(probabilities[row, intent_id])
+            if confidence < self.min_confidence:
+                results.append(None)
+            else:
+                results.append({'intent': self.intents[intent_id], 'confidence': round(confidence, 4)})
+        return results
+        
+    def _intent_id(self, intent):
+        intent_id = self.intent_ids.get(intent)
+        if intent_id is None:
+            intent_id = self.intent_ids[intent] = len(self.intents)
+            self.intents.append(intent)
+            self.weights = np.hstack([self.weights, np.zeros((self.n_features, 1), dtype=np.float32)])
+            self.bias = np.append(self.bias, np.float32(0))
+        return intent_id
+        
+    def _update_idf(self, texts_lower):
+        for text_lower in texts_lower:
+            buckets = list(self._hashes(text_lower))
+            self.doc_freq[buckets] += 1
+        self.documents += len(texts_lower)
+        self.idf = (np.log((1 + self.documents) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        
+    def train(self, examples):
+        """Learn (message, intent) pairs: a few gradient steps with replayed examples"""
+        examples = [(message.lower(), intent) for message, intent in examples if intent]
+        if not examples:
+            return
+            
+        for _, intent in examples:
+            self._intent_id(intent)
+        self._update_idf([text_lower for text_lower, _ in examples])
+        
+        sample = self.rng.sample(list(self.replay), min(self.replay_sample, len(self.replay)))
+        batch = examples + sample
+        self.replay.extend(examples)
+        self.examples += len(examples)
+        
+        indices, values, offsets, rows = self._vectorize([text_lower for text_lower, _ in batch])
+        targets = np.fromiter((self.intent_ids[intent] for _, intent in batch), dtype=np.int64, count=len(batch))
+        step = self.learning_rate / len(batch)
+        
+        for _ in range(self.steps):
+            gradient = self._softmax(self._scores(indices, values, offsets))
+            gradient[np.arange(len(batch)), targets] -= 1.0
+            # Sparse outer product: each entry moves its weight row
+            np.add.at(self.weights, indices, (-step * values)[:, None] * gradient[rows])
+            self.bias -= step * gradient.sum(axis=0)
+            
+    async def learn(self, examples):
+        """train() and schedule saving the model"""
+        self.train(examples)
+        if self.scheduler is not None:
+            self.scheduler.mark_dirty()
+            
+    async def load(self):
+        """Load the saved model, if any, and start persisting changes"""
+        if self.path is None:
+            return
+        self.scheduler = PersistenceScheduler(self._snapshot, self._write, delay=2.0, max_staleness=30.0)
+        
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                if int(saved['version']) != MODEL_VERSION or saved['weights'].shape[0] != self.n_features:
+                    return
+                self.intents = [str(intent) for intent in saved['intents']]
+                self.intent_ids = {intent: i for i, intent in enumerate(self.intents)}
+                self.weights = saved['weights'].astype(np.float32)
+                self.bias = saved['bias'].astype(np.float32)
+                self.doc_freq = saved['doc_freq'].astype(np.float32)
+                self.documents = int(saved['documents'])
+                self.examples = int(saved['examples'])
+                self.replay.extend(zip(saved['replay_texts'].tolist(), saved['replay_intents'].tolist()))
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️  Could not load intent model: {e}", file=sys.stderr)
+            return
+            
+        self.idf = (np.log((1 + self.documents) / (1 + self.doc_freq)) + 1).astype(np.float32)
+        
+    def _snapshot(self):
+        replay = list(self.replay)
+        return {
+            'version': np.array(MODEL_VERSION),
+            'intents': np.array(self.intents, dtype=str),
+            'weights': self.weights.copy(),
+            'bias': self.bias.copy(),
+            'doc_freq': self.doc_freq.copy(),
+            'documents': np.array(self.documents),
+            'examples': np.array(self.examples),
+            'replay_texts': np.array([text for text, _ in replay], dtype=str),
+            'replay_intents': np.array([intent for _, intent in replay], dtype=str)
+        }
+        
+    def _write(self, snapshot):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.stem + '.tmp.npz')
+        np.savez(temp_path, **snapshot)
+        os.replace(temp_path, self.path)
+        
+    async def close(self):
+        """Write unsaved changes"""
+        if self.scheduler is not None:
+            await self.scheduler.flush()
+            
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'intents': len(self.intents),
+            'examples': self.examples,
+            'replay': len(self.replay),
+            'predictions': self.predictions,
+            'ready': self.ready
+        }
@@ -0,0 +1,12 @@
+"""
+Tokenizer - NLU Component
+Splits lowercased text into the words and numbers the NLU stages look up
+"""
+
+import re
+
+# Words and numbers, splitting "5min" and "demi-heure"; a single-letter
+# unit stays glued to its number ("10m") so it is never read on its own
+TOKEN_PATTERN = re.compile(r'[^\W\d]+|\d+(?:[smh](?![^\W\d]))?')
+
+tokenize = TOKEN_PATTERN.findall
@@ -0,0 +1,81 @@
+"""
+Perception Cache
+Bounded LRU cache of classification and entity results
+"""
+
+from collections import OrderedDict
+
+def copy_value(value):
+    """Deep copy of plain data (dicts, lists, tuples of scalars), cheaper than copy.deepcopy"""
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(copy_value(item) for item in value)
+    return value
+
+class PerceptionCache:
+    """
+    LRU cache of (intent, entities, boosted) per normalized message
+    
+    boosted records whether the Q-table changed the cached confidence, so
+    a hit can be counted like the miss that computed it. Entries are deep
+    copies, both ways: callers may change what they put or get (follow-up
+    resolution fills in entities) without touching the cached results.
+    """
+    
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        
+    @staticmethod
+    def normalize(message):
+        """Normalize a message into a cache key"""
+        return message.lower()
+        
+    def get(self, key):
+        """Return cached (intent, entities, boosted) for key, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+            
+        self.entries.move_to_end(key)
+        self.hits += 1
+        intent, entities, boosted = entry
+        return copy_value(intent), copy_value(entities), boosted
+        
+    def put(self, key, intent, entities, boosted=False):
+        """Store results for key, evicting the least recently used entry"""
+        self.entries[key] = (copy_value(intent), copy_value(entities), boosted)
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+            
+    def invalidate(self, key):
+        """Drop the entry for key if present"""
+        if self.entries.pop(key, None) is not None:
+            self.invalidations += 1
+            
+    def clear(self):
+        """Drop all entries"""
+        self.entries.clear()
+        
+    def get_stats(self):
+        """Get statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0
+        }
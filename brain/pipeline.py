@@ -0,0 +1,101 @@
+"""
+Brain Pipeline
+Perception caching, Q-boosts and request timing shared by both brains
+"""
+
+import sys
+import time
+
+from .metrics import BrainMetrics
+from .perception_cache import PerceptionCache
+
+class BrainPipeline:
+    """
+    Mixin for brain_core's and main.py's NyxBrain
+    
+    The brain sets intent_classifier, entity_extractor and q_learning,
+    then calls _init_pipeline(). Its perceive() gets the intent and
+    entities of a message from _perceive_cached(), and its process() is
+    swapped for _process_timed() when metrics are enabled.
+    """
+    
+    def _init_pipeline(self):
+        # Repeated commands skip classification and extraction
+        self.perception_cache = PerceptionCache(max_size=256)
+        self.q_learning.add_update_listener(self._on_q_value_update)
+        self.intent_classifier.add_update_listener(self.perception_cache.clear)
+        
+        # Perceptions whose confidence the Q-table changed, cached or not
+        self.q_boosts = 0
+        
+        self.metrics = BrainMetrics()
+        self.metrics.add_source('brain', lambda: {'q_boosts': self.q_boosts})
+        self.metrics.add_source('perception_cache', self.perception_cache.get_stats)
+        self.metrics.add_source('intent_classifier', self.intent_classifier.get_stats)
+        self.metrics.add_source('q_learning', self.q_learning.get_stats)
+        if self.metrics.enabled:
+            # Only the timed pipeline pays for timing
+            self.process = self._process_timed
+            
+    def _on_q_value_update(self, message, intent, q_value):
+        """Drop cached perceptions whose Q-boost may have changed"""
+        self.perception_cache.invalidate(message)
+        similarity_index = self.q_learning.similarity_index
+        if similarity_index is not None:
+            # Cached messages that may borrow this Q-value as a neighbour
+            for key in similarity_index.similar(message, list(self.perception_cache.entries)):
+                self.perception_cache.invalidate(key)
+                
+    async def _process_timed(self, message, context=None):
+        """process(), timing each stage of one request in metrics.sample_every"""
+        if not self.initialized:
+            await self.initialize()
+            
+        metrics = self.metrics
+        if metrics.skip:
+            # Not sampled: the untimed pipeline plus one decrement
+            metrics.skip -= 1
+            perception = await self.perceive(message)
+            decision = await self.reason(perception)
+            await self.learn(perception, decision)
+            return decision
+            
+        clock = time.perf_counter_ns
+        start = clock()
+        perception = await self.perceive(message)
+        perceived = clock()
+        decision = await self.reason(perception)
+        reasoned = clock()
+        await self.learn(perception, decision)
+        metrics.record_request(decision['module'], start, perceived, reasoned, clock())
+        
+        return decision
+        
+    def _apply_q_boost(self, message, intent):
+        """Shift intent's confidence by the Q-table's boost; True if it changed"""
+        q_boost = self.q_learning.get_confidence_boost(message, intent['intent'])
+        if q_boost == 0:
+            return False
+        self.q_boosts += 1
+        intent['confidence'] = max(0, min(1, intent['confidence'] + q_boost))
+        return True
+        
+    def _perceive_cached(self, message):
+        """Boosted intent and entities of a message, from the cache when possible"""
+        cache_key = self.perception_cache.normalize(message)
+        cached = self.perception_cache.get(cache_key)
+        if cached is not None:
+            intent, entities, boosted = cached
+            if boosted:
+                self.q_boosts += 1
+            return intent, entities
+            
+        intent = self.intent_classifier.classify(message)
+        old_conf = intent['confidence']
+        boosted = self._apply_q_boost(message, intent)
+        if boosted:
+            print(f"🎓 Q-Boost: {int(old_conf*100)}% → {int(intent['confidence']*100)}%", file=sys.stderr)
+            
+        entities = self.entity_extractor.extract(message)
+        self.perception_cache.put(cache_key, intent, entities, boosted)
+        return intent, entities
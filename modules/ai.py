@@ -4,6 +4,8 @@ Fallback module for general conversation
 """
 
 class AiModule:
+    intents = ['unknown']
+    
     def __init__(self, core):
         self.core = core
         self.name = 'ai'
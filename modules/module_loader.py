@@ -1,54 +1,323 @@
 """
 Module Loader
-Dynamically loads and manages modules
+Discovers modules from their source, loads them on first use and hot-reloads them
 """
 
-import importlib
+import ast
+import asyncio
+import importlib.util
 import sys
 from pathlib import Path
 
+def file_stamp(file_path):
+    """Change marker for a file: (mtime in ns, size)"""
+    stat = file_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+def read_manifest(file_path):
+    """
+    Read a module's manifest from its source without executing it
+    
+    A module file defines a class named after the file (notes.py ->
+    NotesModule) whose `intents` class attribute lists the intents it
+    handles as a literal. Returns None for helper files without one.
+    """
+    module_name = file_path.stem
+    class_name = ''.join(word.capitalize() for word in module_name.split('_')) + 'Module'
+    
+    tree = ast.parse(file_path.read_bytes(), str(file_path))
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            intents = []
+            for statement in node.body:
+                if isinstance(statement, ast.Assign) and any(
+                    isinstance(target, ast.Name) and target.id == 'intents' for target in statement.targets
+                ):
+                    intents = list(ast.literal_eval(statement.value))
+            return {
+                'name': module_name,
+                'class_name': class_name,
+                'intents': intents,
+                'path': file_path
+            }
+            
+    return None
+
 class ModuleLoader:
-    def __init__(self, core):
+    """
+    Lazy, manifest-driven module registry
+    
+    scan() reads every manifest up front, which costs a parse per file but
+    runs no module code. A module is imported (in a worker thread, so the
+    event loop keeps serving) and instantiated the first time it is needed;
+    concurrent first uses share one load. warm_up() loads the remaining
+    modules in the background, one at a time, once the first response is out.
+    
+    watch() polls file stamps and re-imports only the modules whose file
+    changed. The new instance replaces the old one in a single assignment:
+    calls already running finish on the old instance, later calls get the
+    new one. If the new code fails to parse, import or instantiate, the old
+    version stays in service.
+    
+    Intents are routed by an IntentRouter re-declared from the manifests on
+    every scan and reload. Passing the brain's router (default_router) keeps
+    its routing in step with reloads.
+    """
+    
+    def __init__(self, core, modules_dir=None, router=None):
+        # Imported here: brain.intent_router builds its router with a loader
+        from brain.intent_router import IntentRouter
+        
         self.core = core
-        self.modules_dir = Path(__file__).parent.parent / 'modules'
+        self.modules_dir = Path(modules_dir) if modules_dir else Path(__file__).parent
+        self.package = 'modules' if modules_dir is None else self.modules_dir.name
         
-    async def load_all(self):
-        """Load all modules"""
-        modules = {}
+        self.manifests = {}
+        self.router = router if router is not None else IntentRouter(default=None)
+        self.modules = {}
+        self.loading = {}
+        self.warm_up_task = None
+        
+        self.stamps = {}
+        self.watch_task = None
+        self.reload_listeners = []
+        self.reloads = 0
+        self.failed_reloads = 0
+        
+    def scan(self):
+        """Read the manifests of every module file"""
+        self.manifests = {}
+        self.stamps = {}
         
         if not self.modules_dir.exists():
-            print("⚠️  Modules directory not found")
-            return modules
+            print("⚠️  Modules directory not found", file=sys.stderr)
+            return self.manifests
             
-        # Add modules directory to Python path
-        sys.path.insert(0, str(self.modules_dir.parent))
-        
-        for file_path in self.modules_dir.glob('*.py'):
+        for file_path in sorted(self.modules_dir.glob('*.py')):
             if file_path.name.startswith('_'):
                 continue
                 
-            module_name = file_path.stem
             try:
-                # Import module
-                spec = importlib.util.spec_from_file_location(
-                    f"modules.{module_name}",
-                    file_path
-                )
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Get module class (assume it's named after file with capitalization)
-                class_name = ''.join(word.capitalize() for word in module_name.split('_')) + 'Module'
-                
-                if hasattr(module, class_name):
-                    module_class = getattr(module, class_name)
-                    instance = module_class(self.core)
-                    modules[module_name] = instance
-                    print(f"✓ Loaded module: {module_name}")
+                self.stamps[file_path.stem] = file_stamp(file_path)
+                manifest = read_manifest(file_path)
+            except (OSError, SyntaxError, ValueError) as e:
+                print(f"✗ Invalid module {file_path.stem}: {e}", file=sys.stderr)
+                continue
+                
+            if manifest:
+                self.manifests[manifest['name']] = manifest
+                
+        self._index_intents()
+        return self.manifests
+        
+    def _index_intents(self):
+        self.router.declare_manifests(self.manifests.values())
+        
+    def module_for_intent(self, intent):
+        """Name of the module handling an intent (exact, then by domain), or the router's default"""
+        return self.router.route(intent)
+        
+    def _import(self, manifest, changed=False):
+        """Import a module file (safe to run in a thread)"""
+        # Relative imports inside modules resolve against the package
+        package_parent = str(self.modules_dir.parent)
+        if package_parent not in sys.path:
+            sys.path.insert(0, package_parent)
+            
+        if changed:
+            # Bytecode is validated by whole-second mtime and size, which an
+            # edit can leave unchanged: drop it so the new source is compiled
+            # (and cached again)
+            try:
+                Path(importlib.util.cache_from_source(str(manifest['path']))).unlink()
+            except (OSError, NotImplementedError):
+                pass
+                
+        spec = importlib.util.spec_from_file_location(
+            f"{self.package}.{manifest['name']}",
+            manifest['path']
+        )
+        module = importlib.util.module_from_spec(spec)
+        previous = sys.modules.get(spec.name)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            if previous is None:
+                del sys.modules[spec.name]
+            else:
+                sys.modules[spec.name] = previous
+            raise
+        return module
+        
+    async def _instantiate(self, manifest, changed=False):
+        module_name = f"{self.package}.{manifest['name']}"
+        previous = sys.modules.get(module_name)
+        
+        module = await asyncio.to_thread(self._import, manifest, changed)
+        try:
+            return getattr(module, manifest['class_name'])(self.core)
+        except Exception:
+            if previous is not None:
+                sys.modules[module_name] = previous
+            raise
+            
+    async def _load(self, name):
+        instance = await self._instantiate(self.manifests[name])
+        self.modules[name] = instance
+        print(f"✓ Loaded module: {name}", file=sys.stderr)
+        return instance
+        
+    async def get(self, name):
+        """Return a module instance, loading it on first use (None if unknown)"""
+        instance = self.modules.get(name)
+        if instance is not None:
+            return instance
+            
+        if name not in self.manifests:
+            return None
+            
+        task = self.loading.get(name)
+        if task is None:
+            task = self.loading[name] = asyncio.ensure_future(self._load(name))
+            
+        try:
+            return await task
+        finally:
+            if self.loading.get(name) is task and task.done():
+                del self.loading[name]
+                
+    async def execute(self, name, message, decision):
+        """Load a module if needed and run it"""
+        module = await self.get(name)
+        if module is None:
+            return {'text': f'Module {name} is not available', 'type': 'error'}
+        return await module.execute(message, decision)
+        
+    def warm_up(self):
+        """Start loading every module not loaded yet, in the background"""
+        if self.warm_up_task is None:
+            self.warm_up_task = asyncio.ensure_future(self._warm_up())
+        return self.warm_up_task
+        
+    async def _warm_up(self):
+        for name in list(self.manifests):
+            if name not in self.modules:
+                try:
+                    await self.get(name)
+                except Exception as e:
+                    print(f"✗ Failed to load {name}: {e}", file=sys.stderr)
                     
+    async def load_all(self):
+        """Load every module now and return them by name"""
+        if not self.manifests:
+            self.scan()
+            
+        for name in self.manifests:
+            try:
+                await self.get(name)
             except Exception as e:
-                print(f"✗ Failed to load {module_name}: {e}")
+                print(f"✗ Failed to load {name}: {e}", file=sys.stderr)
                 import traceback
                 traceback.print_exc()
                 
-        return modules
+        return self.modules
+
+    def add_reload_listener(self, callback):
+        """Register callback(name) called after a module is reloaded"""
+        self.reload_listeners.append(callback)
+        
+    async def reload(self, name):
+        """Re-import a module from its file; returns False if the old version stays"""
+        file_path = self.modules_dir / f'{name}.py'
+        try:
+            manifest = read_manifest(file_path)
+        except (OSError, SyntaxError, ValueError) as e:
+            self.failed_reloads += 1
+            print(f"✗ Reload of {name} failed, keeping the previous version: {e}", file=sys.stderr)
+            return False
+            
+        if manifest is None:
+            return False
+            
+        if name in self.modules:
+            try:
+                instance = await self._instantiate(manifest, changed=True)
+            except Exception as e:
+                self.failed_reloads += 1
+                print(f"✗ Reload of {name} failed, keeping the previous version: {e}", file=sys.stderr)
+                return False
+            self.modules[name] = instance
+            
+        # Modules never used just pick up the new manifest
+        self.manifests[name] = manifest
+        self._index_intents()
+        
+        self.reloads += 1
+        print(f"🔄 Reloaded module: {name}", file=sys.stderr)
+        for callback in self.reload_listeners:
+            callback(name)
+        return True
+        
+    async def check_for_changes(self):
+        """Reload changed modules, pick up new ones and drop deleted ones"""
+        reloaded = []
+        seen = set()
+        
+        for file_path in sorted(self.modules_dir.glob('*.py')):
+            name = file_path.stem
+            if file_path.name.startswith('_'):
+                continue
+            seen.add(name)
+            
+            try:
+                stamp = file_stamp(file_path)
+            except OSError:
+                continue
+            if self.stamps.get(name) == stamp or name in self.loading:
+                continue
+                
+            self.stamps[name] = stamp
+            if await self.reload(name):
+                reloaded.append(name)
+                
+        for name in set(self.stamps) - seen:
+            del self.stamps[name]
+            if self.manifests.pop(name, None):
+                self.modules.pop(name, None)
+                self._index_intents()
+                print(f"🗑️  Removed module: {name}", file=sys.stderr)
+                
+        return reloaded
+        
+    def watch(self, interval=1.0):
+        """Start polling module files for changes"""
+        if self.watch_task is None:
+            self.watch_task = asyncio.ensure_future(self._watch(interval))
+        return self.watch_task
+        
+    async def _watch(self, interval):
+        if not self.stamps:
+            self.scan()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_for_changes()
+            except Exception as e:
+                print(f"⚠️  Module watch failed: {e}", file=sys.stderr)
+                
+    def stop_watching(self):
+        """Stop polling"""
+        if self.watch_task is not None:
+            self.watch_task.cancel()
+            self.watch_task = None
+            
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'available': len(self.manifests),
+            'loaded': len(self.modules),
+            'reloads': self.reloads,
+            'failed_reloads': self.failed_reloads,
+            'watching': self.watch_task is not None
+        }
@@ -3,12 +3,33 @@ Notes Module
 Apple Notes integration
 """
 
-import asyncio
 import re
 
+from .notes_index import NotesIndex
+from .script_templates import ScriptTemplate, get_script_templates
+
+CREATE_NOTE = ScriptTemplate('create_note', '''
+    tell application "Notes"
+        tell account "iCloud"
+            set newNote to make new note at folder "Notes" with properties {body:note_text}
+            return (id of newNote) & tab & (name of newNote) & tab & ((modification date of newNote) as string)
+        end tell
+    end tell
+''', note_text=str)
+
+# Words around a search query ("show me my notes about ...")
+QUERY_STOPWORDS = {
+    'read', 'show', 'list', 'search', 'find', 'me', 'my', 'the', 'all', 'a',
+    'note', 'notes', 'for', 'about', 'called', 'named', 'in', 'on', 'with'
+}
+
 class NotesModule:
+    intents = ['notes.create', 'notes.read']
+    
     def __init__(self, core):
         self.core = core
+        self.templates = get_script_templates()
+        self.index = NotesIndex()
         self.name = 'notes'
         self.description = 'Apple Notes integration'
         
@@ -20,23 +41,27 @@ class NotesModule:
             if 'create' in message_lower or 'make' in message_lower:
                 content = self._extract_content(message)
                 if content:
-                    await self._run_applescript(f'''
-                        tell application "Notes"
-                            tell account "iCloud"
-                                make new note at folder "Notes" with properties {{body:"{content}"}}
-                            end tell
-                        end tell
-                    ''')
+                    created = await self._run_template(CREATE_NOTE, note_text=content)
+                    if created.count('\t') >= 2:
+                        note_id, name, modified = created.split('\t', 2)
+                        self.index.add(note_id, name, modified, content)
                     return {'text': f'Note created: {content}', 'type': 'success'}
                     
-            elif 'read' in message_lower or 'show' in message_lower or 'list' in message_lower:
-                notes = await self._run_applescript('''
-                    tell application "Notes"
-                        tell account "iCloud"
-                            get name of notes in folder "Notes"
-                        end tell
-                    end tell
-                ''')
+            elif any(word in message_lower for word in ('read', 'show', 'list', 'search', 'find')):
+                await self.index.refresh()
+                query = self._extract_query(message)
+                
+                if query:
+                    matches = self.index.search(query)
+                    if not matches:
+                        return {'text': f'No notes matching "{query}"', 'type': 'success'}
+                    if len(matches) == 1:
+                        name, body = matches[0]
+                        return {'text': f'{name}: {body}', 'type': 'success'}
+                    names = ', '.join(name for name, _ in matches)
+                    return {'text': f'Notes matching "{query}": {names}', 'type': 'success'}
+                    
+                notes = ', '.join(self.index.recent())
                 return {'text': f'Recent notes: {notes}', 'type': 'success'}
                 
             return {'text': 'Could not understand notes command', 'type': 'error'}
@@ -44,20 +69,10 @@ class NotesModule:
         except Exception as e:
             return {'text': f'Error: {str(e)}', 'type': 'error'}
             
-    async def _run_applescript(self, script):
-        """Run AppleScript command"""
-        escaped_script = script.replace("'", "'\\''")
-        process = await asyncio.create_subprocess_shell(
-            f"osascript -e '{escaped_script}'",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        
-        if stderr:
-            raise Exception(stderr.decode())
-            
-        return stdout.decode().strip()
+    async def _run_template(self, template, **args):
+        """Run a compiled AppleScript template on the shared worker pool"""
+        result = await self.templates.run(template, **args)
+        return result.strip()
         
     def _extract_content(self, message):
         """Extract note content from message"""
@@ -71,6 +86,15 @@ class NotesModule:
         for pattern in patterns:
             match = re.search(pattern, message, re.IGNORECASE)
             if match:
-                return match.group(1).strip().replace('"', '\\"')
+                return match.group(1).strip()
                 
         return None
+
+    def _extract_query(self, message):
+        """Extract a search query, or None for a plain listing"""
+        words = re.findall(r'\w+', message.lower())
+        while words and words[0] in QUERY_STOPWORDS:
+            words.pop(0)
+        while words and words[-1] in QUERY_STOPWORDS:
+            words.pop()
+        return ' '.join(words) or None
@@ -0,0 +1,223 @@
+"""
+Notes Index
+Local full-text index of Apple Notes, synced incrementally
+"""
+
+import asyncio
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from .script_templates import ScriptTemplate, get_script_templates
+
+WORD_PATTERN = re.compile(r'\w+')
+
+LIST_NOTE_STAMPS = ScriptTemplate('list_note_stamps', '''
+    set output to {}
+    tell application "Notes"
+        tell account "iCloud"
+            set noteIds to id of notes in folder "Notes"
+            set noteNames to name of notes in folder "Notes"
+            set noteDates to modification date of notes in folder "Notes"
+        end tell
+    end tell
+    repeat with i from 1 to count of noteIds
+        set end of output to (item i of noteIds) & tab & (item i of noteNames) & tab & ((item i of noteDates) as string)
+    end repeat
+    set AppleScript's text item delimiters to linefeed
+    return output as text
+''')
+
+FETCH_NOTE_BODY = ScriptTemplate('fetch_note_body', '''
+    tell application "Notes"
+        return plaintext of note id note_id
+    end tell
+''', note_id=str)
+
+class AppleNotesSource:
+    """
+    Reads notes from the Notes app through script templates
+    
+    Any object with the same two coroutines can stand in for it:
+    list_notes() -> [(id, name, modified)] in display order, where modified
+    is an opaque version stamp, and fetch(ids) -> {id: body}.
+    """
+    
+    def __init__(self, templates=None):
+        self.templates = templates or get_script_templates()
+        
+    async def list_notes(self):
+        output = await self.templates.run(LIST_NOTE_STAMPS)
+        return [tuple(line.split('\t', 2)) for line in output.splitlines() if line.count('\t') >= 2]
+        
+    async def fetch(self, ids):
+        bodies = await asyncio.gather(*(self.templates.run(FETCH_NOTE_BODY, note_id=note_id) for note_id in ids))
+        return dict(zip(ids, bodies))
+
+class NotesIndex:
+    """
+    On-disk cache of note names, version stamps and bodies
+    
+    A sync lists the notes (names and stamps only) and re-fetches bodies for
+    the notes whose stamp changed, so its cost grows with the changes rather
+    than the size of the library. Reads never wait for the Notes app once
+    the index has been filled: a stale index is served as-is while a sync
+    runs in the background. A note add()ed while a sync is under way is
+    kept at the top even if the listing was taken before it existed.
+    Search uses SQLite FTS5 when available.
+    """
+    
+    def __init__(self, source=None, path='data/notes_index.db', max_age=30.0):
+        self.source = source or AppleNotesSource()
+        self.path = Path(path)
+        self.max_age = max_age
+        self.last_sync = None
+        self.sync_task = None
+        
+        # add() sequence number per note, for syncs that overlap an add
+        self.added = {}
+        self.adds = 0
+        self.syncing = 0
+        
+        self.syncs = 0
+        self.fetched = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS notes (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                modified TEXT NOT NULL,
+                body TEXT NOT NULL,
+                position INTEGER NOT NULL
+            )
+        ''')
+        
+        try:
+            self.db.execute('CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(name, body)')
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE scans
+            self.fts = False
+        self.db.commit()
+        
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM notes').fetchone()[0]
+        
+    async def sync(self):
+        """Bring the index up to date, fetching only changed notes"""
+        started = self.adds
+        self.syncing += 1
+        try:
+            listing = await self.source.list_notes()
+            known = dict(self.db.execute('SELECT id, modified FROM notes'))
+            listed = {note_id for note_id, _, _ in listing}
+            
+            changed = [note_id for note_id, _, modified in listing if known.get(note_id) != modified]
+            removed = set(known) - listed
+            bodies = await self.source.fetch(changed) if changed else {}
+            
+            # Notes added since the listing was taken are missing from it, not deleted
+            fresh = {note_id for note_id, sequence in self.added.items() if sequence > started} - listed
+            removed -= fresh
+            
+            with self.db:
+                for position, (note_id, name, modified) in enumerate(listing, len(fresh)):
+                    if note_id in bodies:
+                        self._write(note_id, name, modified, bodies[note_id], position)
+                    else:
+                        self.db.execute('UPDATE notes SET position = ? WHERE id = ?', (position, note_id))
+                    
+                for note_id in removed:
+                    self._delete(note_id)
+        finally:
+            self.syncing -= 1
+            if not self.syncing:
+                self.added.clear()
+                
+        self.last_sync = time.monotonic()
+        self.syncs += 1
+        self.fetched += len(bodies)
+        return {'notes': len(listing), 'changed': len(bodies), 'removed': len(removed)}
+        
+    async def refresh(self):
+        """Sync if the index was never filled, or start a background sync if stale"""
+        if self.last_sync is None and not len(self):
+            await self._sync_once()
+        elif self.last_sync is None or time.monotonic() - self.last_sync > self.max_age:
+            if self.sync_task is None:
+                self.sync_task = asyncio.ensure_future(self._sync_once())
+                
+    async def _sync_once(self):
+        try:
+            await self.sync()
+        except Exception as e:
+            print(f"⚠️  Notes sync failed: {e}", file=sys.stderr)
+        finally:
+            self.sync_task = None
+            
+    def add(self, note_id, name, modified, body):
+        """Index a note just created, ahead of the next sync"""
+        self.adds += 1
+        self.added[note_id] = self.adds
+        with self.db:
+            self.db.execute('UPDATE notes SET position = position + 1')
+            self._write(note_id, name, modified, body, 0)
+            
+    def _write(self, note_id, name, modified, body, position):
+        # Upsert keeps the rowid, which the full-text row shares
+        (rowid,) = self.db.execute(
+            '''INSERT INTO notes (id, name, modified, body, position) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (id) DO UPDATE SET name = excluded.name, modified = excluded.modified,
+               body = excluded.body, position = excluded.position RETURNING rowid''',
+            (note_id, name, modified, body, position)
+        ).fetchone()
+        if self.fts:
+            self.db.execute('INSERT OR REPLACE INTO notes_fts (rowid, name, body) VALUES (?, ?, ?)', (rowid, name, body))
+            
+    def _delete(self, note_id):
+        row = self.db.execute('DELETE FROM notes WHERE id = ? RETURNING rowid', (note_id,)).fetchone()
+        if row and self.fts:
+            self.db.execute('DELETE FROM notes_fts WHERE rowid = ?', row)
+            
+    def recent(self, limit=10):
+        """Return names of the first notes in display order"""
+        rows = self.db.execute('SELECT name FROM notes ORDER BY position LIMIT ?', (limit,))
+        return [name for (name,) in rows]
+        
+    def search(self, query, limit=10):
+        """Return (name, body) pairs matching every word of query, best first"""
+        words = WORD_PATTERN.findall(query.lower())
+        if not words:
+            return []
+            
+        if self.fts:
+            match = ' '.join(f'"{word}"*' for word in words)
+            rows = self.db.execute(
+                'SELECT name, body FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rank LIMIT ?',
+                (match, limit)
+            )
+        else:
+            conditions = ' AND '.join(['(name LIKE ? OR body LIKE ?)'] * len(words))
+            params = [f'%{word}%' for word in words for _ in range(2)]
+            rows = self.db.execute(
+                f'SELECT name, body FROM notes WHERE {conditions} ORDER BY position LIMIT ?',
+                params + [limit]
+            )
+        return rows.fetchall()
+        
+    def close(self):
+        """Close the database"""
+        self.db.close()
+        
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'notes': len(self),
+            'syncs': self.syncs,
+            'fetched': self.fetched,
+            'full_text': self.fts
+        }
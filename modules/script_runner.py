@@ -0,0 +1,162 @@
+"""
+Script Runner
+Pool of long-lived osascript workers shared by the modules
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import shlex
+from pathlib import Path
+
+# Outside modules/: core/index.js require()s every modules/*.js
+WORKER_SCRIPT = Path(__file__).parent.parent / 'scripts' / 'osa_worker.js'
+
+DEFAULT_COMMAND = ['osascript', '-l', 'JavaScript', str(WORKER_SCRIPT)]
+
+class ScriptError(Exception):
+    """A script ran but reported an error"""
+
+class ScriptTimeout(ScriptError):
+    """A script did not answer in time (its worker is restarted)"""
+
+class ScriptNotDelivered(ConnectionError):
+    """A request never reached its worker, so it is safe to send again"""
+
+class ScriptWorker:
+    """One interpreter process, answering one JSON request per line"""
+    
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+        self.request_ids = itertools.count()
+        
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+        
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=2 ** 20
+        )
+        
+    async def run(self, request, timeout):
+        """Send a request and wait for the matching response"""
+        if self.alive and self.process.stdout.at_eof():
+            # Exited while idle: replace it before sending anything
+            await self.stop()
+        if not self.alive:
+            await self.start()
+            
+        request = dict(request, id=next(self.request_ids))
+        try:
+            self.process.stdin.write(json.dumps(request).encode() + b'\n')
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            await self.stop()
+            raise ScriptNotDelivered("Script worker exited before the request was sent")
+            
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise ScriptTimeout(f"Script timed out after {timeout}s")
+        except (BrokenPipeError, ConnectionResetError):
+            line = b''
+            
+        if not line:
+            # The script may have run: not retried, it could have side effects
+            await self.stop()
+            raise ConnectionError("Script worker exited")
+            
+        response = json.loads(line)
+        if response.get('id') != request['id']:
+            await self.stop()
+            raise ConnectionError("Script worker answered out of order")
+            
+        if 'error' in response:
+            raise ScriptError(response['error'])
+        return response.get('result', '')
+        
+    async def stop(self):
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+class ScriptRunner:
+    """
+    Runs scripts on a small pool of persistent workers
+    
+    The pool size bounds concurrency: callers wait for an idle worker.
+    Workers start lazily and are restarted after a crash. A request is
+    retried once only if it never reached the worker: one that may have
+    run is not sent again, as scripts are not idempotent (a second note,
+    a second screenshot). The command defaults to an osascript JXA worker
+    and can be overridden (e.g. with NYX_OSASCRIPT) by any program that
+    speaks the same line protocol.
+    """
+    
+    def __init__(self, command=None, pool_size=2, timeout=10.0):
+        self.command = command or DEFAULT_COMMAND
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.workers = None
+        self.idle = None
+        
+        self.requests = 0
+        self.restarts = 0
+        
+    def _ensure_pool(self):
+        if self.workers is None:
+            self.workers = [ScriptWorker(self.command) for _ in range(self.pool_size)]
+            self.idle = asyncio.Queue()
+            for worker in self.workers:
+                self.idle.put_nowait(worker)
+                
+    async def run(self, script, timeout=None):
+        """Run AppleScript source and return its result as text"""
+        return await self.request({'script': script}, timeout)
+        
+    async def request(self, request, timeout=None):
+        """Send a raw request to an idle worker"""
+        self._ensure_pool()
+        worker = await self.idle.get()
+        self.requests += 1
+        try:
+            try:
+                return await worker.run(request, timeout or self.timeout)
+            except ScriptNotDelivered:
+                # Dead before it read anything: restart it and retry once
+                self.restarts += 1
+                return await worker.run(request, timeout or self.timeout)
+        finally:
+            self.idle.put_nowait(worker)
+            
+    async def close(self):
+        """Stop every worker"""
+        if self.workers:
+            await asyncio.gather(*(worker.stop() for worker in self.workers))
+            
+    def get_stats(self):
+        """Get statistics"""
+        return {
+            'pool_size': self.pool_size,
+            'running': sum(worker.alive for worker in self.workers or []),
+            'requests': self.requests,
+            'restarts': self.restarts
+        }
+
+_shared_runner = None
+
+def get_script_runner():
+    """Return the runner shared by all modules"""
+    global _shared_runner
+    if _shared_runner is None:
+        command = os.environ.get('NYX_OSASCRIPT')
+        _shared_runner = ScriptRunner(shlex.split(command) if command else None)
+    return _shared_runner
@@ -0,0 +1,182 @@
+"""
+Script Templates
+AppleScript declared once, compiled once and run with separate arguments
+"""
+
+import asyncio
+import hashlib
+import os
+import shlex
+import textwrap
+from pathlib import Path
+
+from .script_runner import ScriptError, get_script_runner
+
+HANDLER_NAME = 'run_template'
+
+# AppleScript reserved words, plus built-in class names that do not compile
+# as handler parameters either ("app" is short for application)
+RESERVED_WORDS = frozenset('''
+    about above after against and apart around as aside at back before beginning
+    behind below beneath beside between but by considering contain contains
+    continue copy div does eighth else end equal equals error every exit false
+    fifth first for fourth from front get given global if ignoring in instead
+    into is it its last local me middle mod my ninth not of on onto or out over
+    prop property put ref reference repeat return returning script second set
+    seventh since sixth some tell tenth that the then third through thru timeout
+    times to transaction true try until where while whose with without
+    alias app application class date file integer item list number real record
+    result string text
+'''.split())
+
+# Every template declared, by name (see TemplateRegistry.compile_all)
+DECLARED_TEMPLATES = {}
+
+class ScriptTemplate:
+    """
+    AppleScript source with typed parameters
+    
+    The body is wrapped in a handler taking the parameters in declaration
+    order, so values are passed as handler arguments at run time instead of
+    being interpolated (and escaped) into the source:
+    
+        ACTIVATE_APP = ScriptTemplate('activate_app', 'tell application app_name to activate', app_name=str)
+        
+    Parameter names must not be AppleScript terms (ValueError otherwise).
+    """
+    
+    def __init__(self, name, body, **params):
+        reserved = [param for param in params if param.lower() in RESERVED_WORDS]
+        if reserved:
+            raise ValueError(f"Template {name}: {', '.join(reserved)} is reserved in AppleScript")
+            
+        self.name = name
+        self.params = params
+        
+        body = textwrap.indent(textwrap.dedent(body).strip(), '    ')
+        self.source = f"on {HANDLER_NAME}({', '.join(params)})\n{body}\nend {HANDLER_NAME}\n"
+        self.digest = hashlib.sha1(self.source.encode('utf-8')).hexdigest()
+        DECLARED_TEMPLATES[name] = self
+        
+    def bind(self, args):
+        """Return the argument list in parameter order, checking types"""
+        missing = set(self.params) - set(args)
+        unknown = set(args) - set(self.params)
+        if missing or unknown:
+            raise TypeError(f"Template {self.name} expects {', '.join(self.params) or 'no arguments'}")
+            
+        values = []
+        for param, kind in self.params.items():
+            value = args[param]
+            if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+                try:
+                    value = kind(value)
+                except (TypeError, ValueError):
+                    raise TypeError(f"Template {self.name}: {param} must be {kind.__name__}, got {value!r}")
+            values.append(value)
+        return values
+
+class OsaCompiler:
+    """Compiles AppleScript source with osacompile (or a stand-in command)"""
+    
+    def __init__(self, command=None):
+        self.command = command or ['osacompile']
+        
+    async def compile(self, source, artifact):
+        """Compile source into the artifact path"""
+        source_path = artifact.with_suffix('.applescript')
+        tmp_path = artifact.with_name(artifact.stem + '.tmp' + artifact.suffix)
+        source_path.write_text(source, encoding='utf-8')
+        
+        process = await asyncio.create_subprocess_exec(
+            *self.command, '-o', str(tmp_path), str(source_path),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        
+        if process.returncode != 0 or not tmp_path.exists():
+            raise ScriptError(stderr.decode().strip() or f"Could not compile {artifact.name}")
+        os.replace(tmp_path, artifact)
+
+class TemplateRegistry:
+    """
+    Runs script templates from compiled artifacts
+    
+    Artifacts are cached by template digest: in memory for the lifetime of
+    the registry and on disk (cache_dir/<digest>.scpt) across restarts.
+    Concurrent first runs of a template share one compilation. Workers keep
+    loaded artifacts, so a repeated command is neither parsed nor compiled.
+    """
+    
+    def __init__(self, runner=None, compiler=None, cache_dir='data/scripts'):
+        self.runner = runner or get_script_runner()
+        self.compiler = compiler or OsaCompiler()
+        self.cache_dir = Path(cache_dir)
+        self.artifacts = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.compilations = 0
+        
+    async def _compile(self, template):
+        artifact = self.cache_dir / f'{template.digest}.scpt'
+        if not artifact.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            await self.compiler.compile(template.source, artifact)
+            self.compilations += 1
+        return artifact.resolve()
+        
+    async def artifact(self, template):
+        """Return the compiled artifact path for a template"""
+        task = self.artifacts.get(template.digest)
+        if task is None:
+            self.misses += 1
+            task = self.artifacts[template.digest] = asyncio.ensure_future(self._compile(template))
+        else:
+            self.hits += 1
+            
+        try:
+            return await task
+        except Exception:
+            # Let the next run try again
+            if self.artifacts.get(template.digest) is task:
+                del self.artifacts[template.digest]
+            raise
+            
+    async def compile_all(self, templates=None):
+        """Compile every template (all declared ones by default), raising ScriptError on the first that fails"""
+        for template in list(templates or DECLARED_TEMPLATES.values()):
+            await self.artifact(template)
+            
+    async def run(self, template, **args):
+        """Run a template with keyword arguments and return its result as text"""
+        values = template.bind(args)
+        artifact = await self.artifact(template)
+        
+        return await self.runner.request({
+            'path': str(artifact),
+            'handler': HANDLER_NAME,
+            'args': values
+        })
+        
+    def get_stats(self):
+        """Get statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'templates': len(self.artifacts),
+            'hits': self.hits,
+            'misses': self.misses,
+            'compilations': self.compilations,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+_shared_registry = None
+
+def get_script_templates():
+    """Return the registry shared by all modules"""
+    global _shared_registry
+    if _shared_registry is None:
+        command = os.environ.get('NYX_OSACOMPILE')
+        _shared_registry = TemplateRegistry(compiler=OsaCompiler(shlex.split(command) if command else None))
+    return _shared_registry
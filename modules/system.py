@@ -3,13 +3,25 @@ System Module
 Controls macOS system functions via AppleScript
 """
 
-import asyncio
-import subprocess
 import re
 
+from brain.nlu.app_gazetteer import get_app_gazetteer
+
+from .script_templates import ScriptTemplate, get_script_templates
+
+ACTIVATE_APP = ScriptTemplate('activate_app', 'tell application app_name to activate', app_name=str)
+QUIT_APP = ScriptTemplate('quit_app', 'tell application app_name to quit', app_name=str)
+SET_VOLUME = ScriptTemplate('set_volume', 'set volume output volume level', level=int)
+SCREENSHOT = ScriptTemplate('screenshot', 'do shell script "screencapture -c"')
+LOCK_SCREEN = ScriptTemplate('lock_screen', 'do shell script "/System/Library/CoreServices/Menu\\\\ Extras/User.menu/Contents/Resources/CGSession -suspend"')
+
 class SystemModule:
+    intents = ['system.open', 'system.close', 'system.volume', 'system.brightness']
+    
     def __init__(self, core):
         self.core = core
+        self.templates = get_script_templates()
+        self.gazetteer = get_app_gazetteer()
         self.name = 'system'
         self.description = 'System control and information'
         
@@ -22,28 +34,28 @@ class SystemModule:
             if 'open' in message_lower:
                 app = entities.get('app', self._extract_app_name(message))
                 if app:
-                    await self._run_applescript(f'tell application "{app}" to activate')
+                    await self._run_template(ACTIVATE_APP, app_name=app)
                     return {'text': f'Opening {app}', 'type': 'success'}
                     
             elif 'close' in message_lower:
                 app = entities.get('app', self._extract_app_name(message))
                 if app:
-                    await self._run_applescript(f'tell application "{app}" to quit')
+                    await self._run_template(QUIT_APP, app_name=app)
                     return {'text': f'Closing {app}', 'type': 'success'}
                     
             elif 'volume' in message_lower:
                 numbers = entities.get('numbers', [])
                 if numbers:
                     volume = numbers[0]
-                    await self._run_applescript(f'set volume output volume {volume}')
+                    await self._run_template(SET_VOLUME, level=volume)
                     return {'text': f'Volume set to {volume}%', 'type': 'success'}
                     
             elif 'screenshot' in message_lower:
-                await self._run_applescript('do shell script "screencapture -c"')
+                await self._run_template(SCREENSHOT)
                 return {'text': 'Screenshot taken to clipboard', 'type': 'success'}
                 
             elif 'lock' in message_lower:
-                await self._run_applescript('do shell script "/System/Library/CoreServices/Menu\\\\ Extras/User.menu/Contents/Resources/CGSession -suspend"')
+                await self._run_template(LOCK_SCREEN)
                 return {'text': 'Locking screen', 'type': 'success'}
                 
             return {'text': 'Could not understand system command', 'type': 'error'}
@@ -51,28 +63,11 @@ class SystemModule:
         except Exception as e:
             return {'text': f'Error: {str(e)}', 'type': 'error'}
             
-    async def _run_applescript(self, script):
-        """Run AppleScript command"""
-        escaped_script = script.replace("'", "'\\''")
-        process = await asyncio.create_subprocess_shell(
-            f"osascript -e '{escaped_script}'",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        
-        if stderr:
-            raise Exception(stderr.decode())
-            
-        return stdout.decode().strip()
+    async def _run_template(self, template, **args):
+        """Run a compiled AppleScript template on the shared worker pool"""
+        result = await self.templates.run(template, **args)
+        return result.strip()
         
     def _extract_app_name(self, message):
         """Extract application name from message"""
-        apps = ['Safari', 'Chrome', 'Firefox', 'Spotify', 'Music', 'Notes', 'Mail', 'Calendar', 'Finder']
-        message_lower = message.lower()
-        
-        for app in apps:
-            if app.lower() in message_lower:
-                return app
-                
-        return None
+        return self.gazetteer.find(message)
@@ -0,0 +1,120 @@
+// Nyx script worker
+// Long-lived osascript process used by modules/script_runner.py.
+// Reads one JSON request per line on stdin and writes one JSON response per
+// line on stdout ({"id", "result"} or {"id", "error"}). A request either
+// carries AppleScript source ({"id", "script"}) or names a compiled script
+// and a handler to call with arguments ({"id", "path", "handler", "args"});
+// compiled scripts stay loaded for the life of the worker.
+
+ObjC.import('Foundation');
+ObjC.import('OSAKit');
+
+const stdin = $.NSFileHandle.fileHandleWithStandardInput;
+const stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+const appleScript = $.OSALanguage.languageForName('AppleScript');
+
+function write(message) {
+  const line = JSON.stringify(message) + '\n';
+  stdout.writeData($(line).dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function describe(descriptor) {
+  // Lists come back as "a, b, c", like osascript -e prints them
+  const count = descriptor.numberOfItems;
+  if (count > 0 && descriptor.stringValue.isNil()) {
+    const items = [];
+    for (let i = 1; i <= count; i++) {
+      items.push(describe(descriptor.descriptorAtIndex(i)));
+    }
+    return items.join(', ');
+  }
+  return descriptor.stringValue.isNil() ? '' : descriptor.stringValue.js;
+}
+
+function errorMessage(error) {
+  const info = ObjC.deepUnwrap(error) || {};
+  return info.OSAScriptErrorMessageKey || info.OSAScriptErrorBriefMessageKey || JSON.stringify(info);
+}
+
+function execute(source) {
+  const script = $.OSAScript.alloc.initWithSourceLanguage(source, appleScript);
+  const error = Ref();
+  const result = script.executeAndReturnError(error);
+  if (result.isNil()) {
+    throw new Error(errorMessage(error[0]));
+  }
+  return describe(result);
+}
+
+const loaded = {};
+
+function load(path) {
+  if (!loaded[path]) {
+    const error = Ref();
+    const url = $.NSURL.fileURLWithPath(path);
+    const script = $.OSAScript.alloc.initWithContentsOfURLError(url, error);
+    if (script.isNil()) {
+      throw new Error(errorMessage(error[0]));
+    }
+    loaded[path] = script;
+  }
+  return loaded[path];
+}
+
+function argument(value) {
+  if (typeof value === 'boolean') {
+    return $.NSAppleEventDescriptor.descriptorWithBoolean(value);
+  }
+  if (Number.isInteger(value)) {
+    return $.NSAppleEventDescriptor.descriptorWithInt32(value);
+  }
+  return $.NSAppleEventDescriptor.descriptorWithString(String(value));
+}
+
+function call(path, handler, args) {
+  const error = Ref();
+  const result = load(path).executeHandlerWithNameArgumentsError(handler, $((args || []).map(argument)), error);
+  if (result.isNil()) {
+    throw new Error(errorMessage(error[0]));
+  }
+  return describe(result);
+}
+
+function handle(line) {
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (e) {
+    write({ id: null, error: 'Invalid request: ' + e.message });
+    return;
+  }
+
+  try {
+    const result = request.path
+      ? call(request.path, request.handler, request.args)
+      : execute(request.script);
+    write({ id: request.id, result: result });
+  } catch (e) {
+    write({ id: request.id, error: e.message });
+  }
+}
+
+function run() {
+  let buffer = '';
+  while (true) {
+    const data = stdin.availableData;
+    if (data.length === 0) {
+      return;
+    }
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline);
+      buffer = buffer.slice(newline + 1);
+      if (line.trim()) {
+        handle(line);
+      }
+    }
+  }
+}
@@ -0,0 +1,12 @@
+"""
+Test configuration
+Makes the brain and modules packages importable from the repository root
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,100 @@
+"""
+App gazetteer tests
+"""
+
+import os
+
+from brain.nlu.app_gazetteer import AppGazetteer, PhraseAutomaton, app_aliases
+
+def automaton(*phrases):
+    return PhraseAutomaton({tuple(phrase.split()): phrase for phrase in phrases})
+
+def test_leftmost_match_wins_over_a_longer_later_one():
+    phrases = automaton('studio', 'visual studio code', 'code')
+    
+    assert phrases.search('open studio then visual studio code'.split()) == (1, 1, 'studio')
+
+def test_longest_match_wins_at_the_same_start():
+    phrases = automaton('visual studio', 'visual studio code', 'studio')
+    
+    assert phrases.search('open visual studio code now'.split()) == (1, 3, 'visual studio code')
+    assert phrases.search('open visual studio now'.split()) == (1, 2, 'visual studio')
+
+def test_failed_long_match_falls_back_to_an_overlapping_phrase():
+    phrases = automaton('adobe photoshop express', 'photoshop lightroom')
+    
+    assert phrases.search('adobe photoshop lightroom'.split()) == (1, 2, 'photoshop lightroom')
+    assert phrases.search('adobe photoshop'.split()) is None
+
+def test_search_starts_at_the_given_position():
+    phrases = automaton('safari', 'chrome')
+    
+    assert phrases.search('safari or chrome'.split(), 1) == (2, 1, 'chrome')
+
+def test_aliases_drop_versions_and_vendor_prefixes():
+    aliases = app_aliases('Microsoft Word 2019', ['Word'])
+    
+    assert {'microsoft word 2019', 'microsoft word', 'word'} <= set(aliases)
+    assert 'chrome' in app_aliases('Google Chrome')
+    assert 'vs code' in app_aliases('Visual Studio Code')
+
+def make_app(directory, name):
+    (directory / f'{name}.app' / 'Contents').mkdir(parents=True)
+
+def bump_mtime(directory):
+    stamp = directory.stat().st_mtime_ns + 10 ** 9
+    os.utime(directory, ns=(stamp, stamp))
+
+def test_cache_is_reused_until_a_directory_changes(tmp_path):
+    applications = tmp_path / 'Applications'
+    make_app(applications, 'Affinity Photo 2')
+    cache_path = tmp_path / 'gazetteer.json'
+    
+    first = AppGazetteer([applications], cache_path).load()
+    assert first.scans == 1
+    assert first.find('open affinity photo') == 'Affinity Photo 2'
+    
+    cached = AppGazetteer([applications], cache_path).load()
+    assert (cached.scans, cached.cache_loads) == (0, 1)
+    assert cached.find('open affinity photo') == 'Affinity Photo 2'
+    assert not cached.refresh()
+    
+    make_app(applications, 'Obsidian')
+    bump_mtime(applications)
+    
+    assert cached.refresh()
+    assert cached.find('open obsidian') == 'Obsidian'
+    
+    # refresh() rewrote the cache
+    reloaded = AppGazetteer([applications], cache_path).load()
+    assert (reloaded.scans, reloaded.cache_loads) == (0, 1)
+    assert reloaded.find('open obsidian') == 'Obsidian'
+
+def test_subdirectory_changes_invalidate_the_cache(tmp_path):
+    utilities = tmp_path / 'Applications' / 'Utilities'
+    make_app(utilities, 'Console')
+    cache_path = tmp_path / 'gazetteer.json'
+    AppGazetteer([tmp_path / 'Applications'], cache_path).load()
+    
+    make_app(utilities, 'Disk Utility')
+    bump_mtime(utilities)
+    
+    gazetteer = AppGazetteer([tmp_path / 'Applications'], cache_path).load()
+    assert gazetteer.scans == 1
+    assert gazetteer.find('open disk utility') == 'Disk Utility'
+
+def test_common_words_need_an_app_context(tmp_path):
+    make_app(tmp_path, 'Weather')
+    gazetteer = AppGazetteer([tmp_path], cache_path=None)
+    
+    assert gazetteer.find("what's the weather like") is None
+    assert gazetteer.find('add milk to my notes') is None
+    assert gazetteer.find('open weather') == 'Weather'
+    assert gazetteer.find('close the notes app') == 'Notes'
+    assert gazetteer.find("ouvre l'app météo et ferme les notes") == 'Notes'
+
+def test_common_word_does_not_hide_a_later_app(tmp_path):
+    gazetteer = AppGazetteer([tmp_path], cache_path=None)
+    
+    assert gazetteer.find('play some music on spotify') == 'Spotify'
+    assert gazetteer.find('search my notes in google chrome') == 'Google Chrome'
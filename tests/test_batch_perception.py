@@ -0,0 +1,67 @@
+"""
+Batch perception tests
+extract_batch and perceive_batch must match the single-message paths,
+in process and across the process pool
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from brain.brain_core import NyxBrain
+from brain.nlu.app_gazetteer import AppGazetteer
+from brain.nlu.batching import DEFAULT_CHUNK_SIZE
+from brain.nlu.entity_extractor import EntityExtractor
+
+WORDS = [
+    'open', 'close', 'ouvre', 'ferme', 'the', 'app', 'safari', 'notes', 'google', 'chrome', 'visual',
+    'studio', 'code', 'timer', 'for', 'minutes', 'minute', 'seconds', 'hour', 'and', 'a', 'half', 'et',
+    'demie', 'volume', 'to', 'à', 'twenty', 'five', 'vingt', 'cinq', '40', '3.5', '12', 'weather',
+    'play', 'jazz', 'please', 'in'
+]
+
+FIXED = [
+    '', 'open safari', 'Open Google Chrome', 'timer for 5 minutes', 'set a timer for an hour and a half',
+    'minuteur de vingt minutes', 'volume à 40', "what's the weather", 'close the notes app',
+    'open visual studio code please', '12 + 3.5'
+]
+
+def messages(count, seed=11):
+    rng = random.Random(seed)
+    return FIXED + [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))) for _ in range(count)]
+
+@pytest.fixture
+def extractor(tmp_path):
+    for name in ('Safari', 'Google Chrome', 'Visual Studio Code', 'Notes'):
+        (tmp_path / f'{name}.app').mkdir()
+    return EntityExtractor(AppGazetteer([tmp_path], cache_path=None))
+
+def test_extract_batch_matches_extract(extractor):
+    texts = messages(500)
+    assert extractor.extract_batch(texts) == [extractor.extract(text) for text in texts]
+
+def test_extract_batch_matches_extract_across_processes(extractor):
+    # Enough messages for several chunks, so the pool is used
+    texts = messages(2 * DEFAULT_CHUNK_SIZE)
+    assert extractor.extract_batch(texts, workers=2) == [extractor.extract(text) for text in texts]
+
+@pytest.mark.parametrize('workers, count', [(None, 300), (2, 2 * DEFAULT_CHUNK_SIZE)], ids=['in process', 'pool'])
+def test_perceive_batch_matches_perceive(tmp_path, monkeypatch, workers, count):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('NYX_APP_DIRS', str(tmp_path))
+    brain = NyxBrain(None)
+    # Learned values, so the Q-boost path is compared too
+    brain.q_learning.q_table.update({'open safari:system.open': 0.5, 'volume à 40:system.volume': -0.5})
+    texts = messages(count)
+    
+    async def scenario():
+        batch = await brain.perceive_batch(texts, workers)
+        boosts = brain.q_boosts
+        single = [await brain.perceive(text) for text in texts]
+        return batch, boosts, single
+        
+    batch, batch_boosts, single = asyncio.run(scenario())
+    assert [(p['intent'], p['entities']) for p in batch] == [(p['intent'], p['entities']) for p in single]
+    assert batch_boosts * 2 == brain.q_boosts
+    assert batch_boosts > 0
@@ -0,0 +1,55 @@
+"""
+Compact Q-table tests
+Snapshots, rebasing and rows handed out across a rebase
+"""
+
+import gc
+
+from brain.learning.compact_table import CompactQTable
+
+def written_table(path, items):
+    table = CompactQTable.from_items(items)
+    table.write_snapshot(path, table.snapshot())
+    table.close()
+    return CompactQTable.open(path)
+
+def test_lookups_read_the_mapped_file(tmp_path):
+    table = written_table(tmp_path / 'q.bin', [('open safari:system.open', 0.1), ('bonjour:unknown', -0.5)])
+    assert table['open safari:system.open'] == 0.1
+    assert table.get('bonjour:unknown') == -0.5
+    assert table.get('bonjour:system.open') is None
+    assert len(table) == 2
+    table.close()
+
+def test_rebase_keeps_newer_overlay_rows(tmp_path):
+    path = tmp_path / 'q.bin'
+    table = written_table(path, [('a:x', 0.1)])
+    table['b:x'] = 0.2
+    snapshot = table.snapshot()
+    table['c:x'] = 0.3
+    table.write_snapshot(path, snapshot)
+    table.rebase(path, snapshot)
+    
+    assert set(table.overlay) == {'c'}
+    assert dict(table.items()) == {'c:x': 0.3, 'a:x': 0.1, 'b:x': 0.2}
+    table.close()
+
+def test_rebase_and_close_with_rows_still_held(tmp_path):
+    path = tmp_path / 'q.bin'
+    table = written_table(path, [('a:x', 0.1), ('b:x', 0.2)])
+    held = dict(table.rows())
+    rows = table.rows()
+    next(rows)
+    
+    table['c:x'] = 0.3
+    snapshot = table.snapshot()
+    table.write_snapshot(path, snapshot)
+    table.rebase(path, snapshot)
+    assert table['c:x'] == 0.3
+    
+    # The old map stays readable through the views handed out
+    assert round(held['a'][0], 5) == 0.1
+    table.close()
+    
+    del held, rows
+    gc.collect()
@@ -0,0 +1,75 @@
+"""
+Context analyzer tests
+Follow-up resolution and the rolling state kept from the history
+"""
+
+import pytest
+
+from brain.context import ContextAnalyzer
+from brain.conversation import ConversationHistory
+
+def analyzer_after(*interactions):
+    """An analyzer caught up on (message, intent, entities) interactions"""
+    history = ConversationHistory(capacity=10)
+    for message, intent, entities in interactions:
+        history.record(message, intent, 0.9, 'system', entities, 0.0)
+    analyzer = ContextAnalyzer()
+    analyzer.analyze('', history)
+    return analyzer, history
+
+def follow_up(message):
+    analyzer, history = analyzer_after(('ouvre safari', 'system.open', {'app': 'Safari'}))
+    return analyzer.analyze(message, history)['follow_up']
+
+@pytest.mark.parametrize('message', [
+    'ferme-le', 'ferme-la', 'tu peux le fermer', "l'ouvrir à nouveau", 'je le ferme', 'ferme ça'
+])
+def test_french_clitics_are_follow_ups(message):
+    resolved = follow_up(message)
+    assert resolved['entities'] == {'app': 'Safari'}
+    assert resolved['intent'] in ('system.close', 'system.open')
+
+@pytest.mark.parametrize('message', ['close it', 'quit that', 'close that please', 'open it again'])
+def test_english_pronouns_are_follow_ups(message):
+    assert follow_up(message)['entities'] == {'app': 'Safari'}
+
+@pytest.mark.parametrize('message', [
+    'ferme la porte', 'ouvre le dossier', 'ferme les volets', "ouvre l'album", 'close that window',
+    'open this folder'
+])
+def test_articles_before_a_noun_are_not_follow_ups(message):
+    assert follow_up(message) is None
+
+def test_no_follow_up_without_a_previous_app():
+    analyzer = ContextAnalyzer()
+    assert analyzer.analyze('ferme-le')['follow_up'] is None
+
+def test_volume_and_repeat_follow_ups():
+    analyzer, history = analyzer_after(
+        ('volume à 40', 'system.volume', {'numbers': [40]}),
+        ('timer 5 minutes', 'timer.set', {'duration': 300})
+    )
+    assert analyzer.analyze('plus fort', history)['follow_up'] == {
+        'intent': 'system.volume', 'confidence': 0.75, 'entities': {'numbers': [50]}
+    }
+    assert analyzer.analyze('encore', history)['follow_up'] == {
+        'intent': 'timer.set', 'confidence': 0.7, 'entities': {'duration': 300}
+    }
+
+def test_state_follows_the_history():
+    analyzer, history = analyzer_after(
+        ('open safari', 'system.open', {'app': 'Safari'}),
+        ('play jazz', 'music.play', {}),
+        ('play rock', 'music.play', {})
+    )
+    context = analyzer.analyze('play blues', history, intent='music.play')
+    assert context['last_app'] == 'Safari'
+    assert context['recent_intents'] == {'system.open': pytest.approx(1 / 3), 'music.play': pytest.approx(2 / 3)}
+    assert (context['topic'], context['topic_streak'], context['topic_continues']) == ('music', 2, True)
+    
+    # A cleared history starts the analyzer over
+    history.clear()
+    history.record('hello', 'unknown', 0.3, None, {}, 0.0)
+    context = analyzer.analyze('hi', history)
+    assert context['last_app'] is None
+    assert context['recent_intents'] == {'unknown': 1.0}
@@ -0,0 +1,62 @@
+"""
+Conversation history tests
+Ring-buffer wrap-around and the order of recent entries
+"""
+
+from brain.conversation import ConversationHistory
+
+def record(history, index, entities=None):
+    history.record(f'message {index}', f'intent.{index}', 0.9, 'system', entities, float(index))
+
+def test_latest_is_newest_first():
+    history = ConversationHistory(capacity=5)
+    for index in range(3):
+        record(history, index)
+        
+    assert len(history) == 3
+    assert [interaction.message for interaction in history.latest(2)] == ['message 2', 'message 1']
+    # Asking for more than is recorded returns what there is
+    assert history.last_intents(10) == ['intent.2', 'intent.1', 'intent.0']
+    assert [interaction.message for interaction in history] == ['message 0', 'message 1', 'message 2']
+
+def test_wraps_around_at_capacity():
+    history = ConversationHistory(capacity=3)
+    records = list(history.records)
+    for index in range(7):
+        record(history, index)
+        
+    assert len(history) == 3
+    assert history.count == 7
+    assert history.last_intents(5) == ['intent.6', 'intent.5', 'intent.4']
+    assert [interaction.sequence for interaction in history] == [4, 5, 6]
+    # Slots are rewritten in place, never reallocated
+    assert all(new is old for new, old in zip(history.records, records))
+
+def test_last_entity_expires_with_its_interaction():
+    history = ConversationHistory(capacity=3)
+    record(history, 0, {'app': 'Safari'})
+    record(history, 1, {'app': 'Notes', 'numbers': [5]})
+    
+    assert history.last_entity('app') == 'Notes'
+    assert history.last_entity('duration') is None
+    
+    for index in range(2, 4):
+        record(history, index)
+    assert history.last_entity('numbers') == [5]
+    
+    # Interaction 1 is overwritten
+    record(history, 4)
+    assert history.last_entity('numbers') is None
+
+def test_clear_forgets_everything():
+    history = ConversationHistory(capacity=3)
+    for index in range(4):
+        record(history, index, {'app': 'Safari'})
+    history.clear()
+    
+    assert len(history) == 0
+    assert list(history.latest(3)) == []
+    assert history.last_entity('app') is None
+    
+    record(history, 9)
+    assert history.last_intents() == ['intent.9']
@@ -0,0 +1,53 @@
+"""
+Feedback manager tests
+Corrections that do not name an intent are not learned
+"""
+
+import asyncio
+
+from brain.learning.feedback_manager import FeedbackManager
+
+class RecordingQLearning:
+    def __init__(self):
+        self.updates = []
+        
+    async def update_q_value(self, message, intent, reward):
+        self.updates.append((message, intent, reward))
+        
+    async def update_q_values(self, updates):
+        self.updates.extend(updates)
+        return [reward for _, _, reward in updates]
+
+def pending_manager():
+    q_learning = RecordingQLearning()
+    manager = FeedbackManager(q_learning, core=None)
+    feedback_id, _ = manager.pending_feedbacks.add({
+        'message': 'open safari',
+        'intent': {'intent': 'system.open', 'confidence': 0.6},
+        'confidence': 0.6,
+        'timestamp': 0
+    })
+    return manager, q_learning, feedback_id
+
+def test_correction_without_intent_is_ignored():
+    manager, q_learning, feedback_id = pending_manager()
+    asyncio.run(manager.process_feedback(feedback_id, {'action': 'correct'}))
+    
+    assert q_learning.updates == []
+    assert feedback_id in manager.pending_feedbacks
+    assert manager.responses['correct'] == 0
+    
+    asyncio.run(manager.process_feedback(feedback_id, {'action': 'correct', 'correctIntent': 'app.launch'}))
+    assert q_learning.updates == [('open safari', 'app.launch', 1.0)]
+    assert feedback_id not in manager.pending_feedbacks
+
+def test_batch_marks_correction_without_intent_invalid():
+    manager, q_learning, feedback_id = pending_manager()
+    results = asyncio.run(manager.process_feedback_batch([
+        {'feedbackId': feedback_id, 'action': 'correct', 'correct_intent': None},
+        {'feedbackId': 'feedback_missing', 'action': 'confirm'}
+    ]))
+    
+    assert [result['status'] for result in results] == ['invalid', 'unknown']
+    assert q_learning.updates == []
+    assert feedback_id in manager.pending_feedbacks
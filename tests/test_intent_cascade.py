@@ -0,0 +1,117 @@
+"""
+Intent cascade tests
+The learned model, and falling back from one engine to the next
+"""
+
+import asyncio
+
+import pytest
+
+from brain.nlu.intent_cascade import IntentCascade
+from brain.nlu.intent_model import IntentModel, np
+
+needs_numpy = pytest.mark.skipif(np is None, reason='IntentModel needs numpy')
+
+EXAMPLES = [
+    ('open safari', 'system.open'), ('launch spotify', 'system.open'), ('ouvre notes', 'system.open'),
+    ('start the terminal', 'system.open'), ('open mail please', 'system.open'),
+    ('play some jazz', 'music.play'), ('play music', 'music.play'), ('joue du rock', 'music.play'),
+    ('play the latest album', 'music.play'), ('play my playlist', 'music.play')
+]
+
+class FixedEngine:
+    """Answers every message with the same result, and counts the calls"""
+    
+    def __init__(self, name, result):
+        self.name = name
+        self.result = result
+        self.calls = 0
+        
+    def classify(self, text):
+        self.calls += 1
+        return dict(self.result) if self.result else None
+        
+    def classify_batch(self, texts, workers=None):
+        return [self.classify(text) for text in texts]
+
+@needs_numpy
+def test_model_does_not_answer_until_trained():
+    model = IntentModel(path=None)
+    assert model.classify('open safari') is None
+    
+    model.train(EXAMPLES[:3])
+    # Under min_examples, and a single intent
+    assert not model.ready
+    assert model.classify('open safari') is None
+
+@needs_numpy
+def test_model_learns_intents_from_examples():
+    model = IntentModel(path=None)
+    for _ in range(5):
+        model.train(EXAMPLES)
+        
+    assert model.ready
+    assert model.classify('open safari')['intent'] == 'system.open'
+    assert model.classify('play some rock')['intent'] == 'music.play'
+    assert model.classify_batch(['launch mail', 'play jazz']) == [
+        model.classify('launch mail'), model.classify('play jazz')
+    ]
+
+@needs_numpy
+def test_model_is_saved_and_reloaded(tmp_path):
+    path = tmp_path / 'intent_model.npz'
+    
+    async def scenario():
+        model = IntentModel(path)
+        await model.load()
+        for _ in range(5):
+            await model.learn(EXAMPLES)
+        await model.close()
+        
+        reloaded = IntentModel(path)
+        await reloaded.load()
+        return model, reloaded
+        
+    model, reloaded = asyncio.run(scenario())
+    assert reloaded.intents == model.intents
+    assert reloaded.examples == model.examples
+    assert reloaded.classify('play jazz') == model.classify('play jazz')
+
+def test_confident_first_engine_ends_the_cascade():
+    regex = FixedEngine('regex', {'intent': 'system.open', 'confidence': 0.85})
+    model = FixedEngine('model', {'intent': 'music.play', 'confidence': 0.99})
+    cascade = IntentCascade([(regex, 0.80), (model, 1.0)])
+    
+    assert cascade.classify('open safari') == {'intent': 'system.open', 'confidence': 0.85}
+    assert model.calls == 0
+
+def test_unsure_answer_falls_through_to_the_next_engine():
+    regex = FixedEngine('regex', {'intent': 'system.open', 'confidence': 0.70})
+    model = FixedEngine('model', {'intent': 'music.play', 'confidence': 0.90})
+    cascade = IntentCascade([(regex, 0.80), (model, 1.0)])
+    
+    assert cascade.classify('play jazz') == {'intent': 'music.play', 'confidence': 0.90}
+    
+    # A less confident later answer does not replace the earlier one
+    model.result = {'intent': 'music.play', 'confidence': 0.60}
+    assert cascade.classify('open safari') == {'intent': 'system.open', 'confidence': 0.70}
+    
+    engines = cascade.get_stats()['engines']
+    assert (engines['regex']['answers'], engines['model']['answers']) == (1, 1)
+    assert (engines['regex']['calls'], engines['model']['calls']) == (2, 2)
+
+def test_no_answer_is_unknown():
+    cascade = IntentCascade([(FixedEngine('regex', None), 0.80), (FixedEngine('model', None), 1.0)])
+    
+    assert cascade.classify('hmm') == {'intent': 'unknown', 'confidence': 0.3}
+    assert cascade.classify_batch(['hmm', 'what']) == [{'intent': 'unknown', 'confidence': 0.3}] * 2
+
+def test_batch_matches_single_classification():
+    regex = FixedEngine('regex', {'intent': 'system.open', 'confidence': 0.70})
+    model = FixedEngine('model', {'intent': 'music.play', 'confidence': 0.90})
+    single = IntentCascade([(regex, 0.80), (model, 1.0)])
+    batched = IntentCascade([(regex, 0.80), (model, 1.0)])
+    texts = ['play jazz', 'open safari', 'hello']
+    
+    assert batched.classify_batch(texts) == [single.classify(text) for text in texts]
+    assert batched.get_stats()['engines']['model']['answers'] == 3
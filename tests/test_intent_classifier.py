@@ -0,0 +1,57 @@
+"""
+Intent classifier tests
+The compiled matching engine must answer exactly like the original
+pattern-by-pattern loop
+"""
+
+import random
+import re
+
+from brain.nlu.intent_classifier import IntentClassifier
+
+def baseline_classify(patterns, text):
+    """The classifier as it was before its patterns were compiled together"""
+    text_lower = text.lower()
+    best_match = {'intent': 'unknown', 'confidence': 0.3}
+    for intent, intent_patterns in patterns.items():
+        for pattern in intent_patterns:
+            if re.search(pattern, text_lower):
+                confidence = 0.85 if re.match(f'^{pattern}$', text_lower) else 0.70
+                if confidence > best_match['confidence']:
+                    best_match = {'intent': intent, 'confidence': confidence}
+    return best_match
+
+WORDS = [
+    'open', 'launch', 'start', 'ouvre', 'lance', 'close', 'quit', 'ferme', 'volume', 'set', 'to', 'à',
+    'timer', 'for', 'minuteur', 'weather', 'météo', 'what', 'is', 'the', 'quel', 'temps', 'time',
+    'quelle', 'heure', 'current', 'calculate', 'calcul', 'combien', 'fait', 'dérivée', 'derivative',
+    'dérive', 'create', 'make', 'note', 'note:', 'crée', 'nouvelle', 'read', 'show', 'list', 'notes',
+    'lis', 'montre', 'play', 'music', 'musique', 'joue', 'safari', 'please', '12', '3', '+', '*', '/'
+]
+
+FIXED = [
+    '', 'open safari', 'Open Safari', 'open safari please', 'please open safari', 'set volume to 40',
+    'volume à 20', 'timer 5', 'what is the weather', 'weather', 'quelle heure', '12 + 3', '12+3 please',
+    'calculate 4 * 5', 'create note buy milk', 'note: eggs', 'list notes', 'play music', 'play jazz',
+    'joue du jazz', 'lance musique', 'lance safari', 'hello there', 'open\nsafari', 'open safari\n'
+]
+
+def messages(count, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))
+
+def test_matches_baseline_on_fixed_messages():
+    classifier = IntentClassifier()
+    for message in FIXED:
+        assert classifier.classify(message) == baseline_classify(classifier.patterns, message), message
+
+def test_matches_baseline_on_random_messages():
+    classifier = IntentClassifier()
+    for message in messages(5000):
+        assert classifier.classify(message) == baseline_classify(classifier.patterns, message), message
+
+def test_batch_matches_single_classification():
+    classifier = IntentClassifier()
+    texts = list(messages(500)) + FIXED
+    assert classifier.classify_batch(texts) == [classifier.classify(text) for text in texts]
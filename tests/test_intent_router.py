@@ -0,0 +1,44 @@
+"""
+Intent router tests
+Routing comes from the module manifests and follows module reloads
+"""
+
+import asyncio
+import os
+
+from brain.intent_router import default_router
+from modules.module_loader import ModuleLoader
+
+def test_default_router_follows_the_manifests():
+    assert default_router.route('system.open') == 'system'
+    assert default_router.route('system.volume.up') == 'system'
+    assert default_router.route('system.sleep') == 'system'
+    assert default_router.route('notes.create') == 'notes'
+    assert default_router.route('unknown') == 'ai'
+    assert default_router.route('info.weather') == 'ai'
+
+def write_module(directory, name, intents, version=0):
+    class_name = name.capitalize() + 'Module'
+    path = directory / f'{name}.py'
+    path.write_text(f'class {class_name}:\n    intents = {intents!r}\n')
+    # Distinct stamps even within one mtime tick
+    os.utime(path, ns=(version * 10 ** 9, version * 10 ** 9))
+    return path
+
+def test_loader_routes_through_its_router_and_redeclares_on_reload(tmp_path):
+    write_module(tmp_path, 'clock', ['time.now'])
+    loader = ModuleLoader(None, tmp_path)
+    loader.scan()
+    
+    assert loader.module_for_intent('time.now') == 'clock'
+    assert loader.module_for_intent('time.zone') == 'clock'
+    assert loader.module_for_intent('weather.today') is None
+    
+    write_module(tmp_path, 'clock', ['weather.today'], version=1)
+    assert asyncio.run(loader.check_for_changes()) == ['clock']
+    assert loader.module_for_intent('weather.today') == 'clock'
+    assert loader.module_for_intent('time.now') is None
+    
+    (tmp_path / 'clock.py').unlink()
+    asyncio.run(loader.check_for_changes())
+    assert loader.module_for_intent('weather.today') is None
@@ -0,0 +1,117 @@
+"""
+IPC channel tests
+Framing, coalesced writes and the switch to msgpack
+"""
+
+import asyncio
+import json
+
+import msgpack
+import pytest
+
+from brain.ipc import FRAME_HEADER, MAX_FRAME_SIZE, MessageChannel, MsgpackFrameCodec
+
+class RecordingWriter:
+    """Stream writer stand-in keeping every write; drain() yields to other tasks"""
+    
+    def __init__(self):
+        self.writes = []
+        
+    def write(self, data):
+        self.writes.append(data)
+        
+    async def drain(self):
+        await asyncio.sleep(0)
+        
+    def is_closing(self):
+        return False
+        
+    def close(self):
+        pass
+        
+    @property
+    def data(self):
+        return b''.join(self.writes)
+
+def frame(message):
+    payload = msgpack.packb(message, use_bin_type=True)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def read_frames(data):
+    messages = []
+    while data:
+        (size,) = FRAME_HEADER.unpack_from(data)
+        messages.append(msgpack.unpackb(data[FRAME_HEADER.size:FRAME_HEADER.size + size], raw=False))
+        data = data[FRAME_HEADER.size + size:]
+    return messages
+
+def channel_with(data=b''):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return MessageChannel(reader, RecordingWriter())
+
+def test_json_lines_are_read_and_burst_written_once():
+    async def scenario():
+        channel = channel_with(b'{"type": "command", "id": 1}\n{"type": "stats"}\n')
+        received = [await channel.receive(), await channel.receive(), await channel.receive()]
+        await asyncio.gather(*(channel.send({'type': 'response', 'id': i}) for i in range(3)))
+        return channel, received
+        
+    channel, received = asyncio.run(scenario())
+    assert received == [{'type': 'command', 'id': 1}, {'type': 'stats'}, None]
+    assert channel.writes == 1
+    assert [json.loads(line) for line in channel.writer.data.splitlines()] == [
+        {'type': 'response', 'id': i} for i in range(3)
+    ]
+
+def test_non_object_message_is_a_decode_error():
+    async def scenario():
+        channel = channel_with(b'null\n{"type": "stats"}\n')
+        with pytest.raises(ValueError):
+            await channel.receive()
+        return await channel.receive()
+        
+    assert asyncio.run(scenario()) == {'type': 'stats'}
+
+def test_oversized_frame_is_skipped_and_stream_stays_aligned():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1) + b'\0' * (MAX_FRAME_SIZE + 1) + frame({'type': 'stats'}))
+        reader.feed_eof()
+        codec = MsgpackFrameCodec()
+        with pytest.raises(ValueError):
+            await codec.read(reader)
+        return codec.decode(await codec.read(reader)), await codec.read(reader)
+        
+    assert asyncio.run(scenario()) == ({'type': 'stats'}, None)
+
+def test_negotiation_flushes_json_before_switching():
+    async def scenario():
+        channel = channel_with(frame({'type': 'command', 'id': 2}))
+        
+        # Queued in JSON before the hello arrived
+        queued = asyncio.ensure_future(channel.send({'type': 'response', 'id': 0}))
+        await asyncio.sleep(0)
+        
+        # A response sent while the reply is being drained
+        async def respond_during_negotiation():
+            await asyncio.sleep(0)
+            await channel.send({'type': 'response', 'id': 1})
+            
+        concurrent = asyncio.ensure_future(respond_during_negotiation())
+        chosen = await channel.negotiate({'type': 'hello', 'formats': ['msgpack', 'json']})
+        await asyncio.gather(queued, concurrent)
+        channel.flush()
+        return channel, chosen, await channel.receive()
+        
+    channel, chosen, received = asyncio.run(scenario())
+    assert chosen == 'msgpack'
+    assert received == {'type': 'command', 'id': 2}
+    
+    data = channel.writer.data
+    first, second, msgpack_part = data.split(b'\n', 2)
+    lines = [json.loads(first), json.loads(second)]
+    assert lines[0] == {'type': 'response', 'id': 0}
+    assert lines[1]['type'] == 'hello' and lines[1]['format'] == 'msgpack'
+    assert read_frames(msgpack_part) == [{'type': 'response', 'id': 1}]
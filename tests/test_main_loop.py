@@ -0,0 +1,65 @@
+"""
+Brain process tests
+brain/main.py over its stdin/stdout protocol, with stand-in reasoning modules
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+STAND_INS = ROOT / 'benchmarks' / 'stand_ins'
+
+def run_brain(tmp_path, lines, timeout=60):
+    """Feed lines to brain/main.py; return the JSON messages it wrote"""
+    env = dict(os.environ, PYTHONPATH=str(STAND_INS), NYX_APP_DIRS=str(tmp_path))
+    result = subprocess.run(
+        [sys.executable, str(ROOT / 'brain' / 'main.py')],
+        cwd=tmp_path,
+        env=env,
+        input=''.join(line + '\n' for line in lines),
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    assert result.returncode == 0, result.stderr
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+def test_messages_that_are_not_objects_are_skipped(tmp_path):
+    command = json.dumps({'type': 'command', 'id': 7, 'message': 'open safari'})
+    messages = run_brain(tmp_path, ['5', '[]', '"x"', 'null', command])
+    
+    assert [(message['type'], message['id']) for message in messages] == [('response', 7)]
+
+SINGLE_IMPORT_PATH = '''
+import runpy, sys
+runpy.run_path(sys.argv[1], run_name='brain_main')
+import modules.system
+from brain.nlu import app_gazetteer
+top_level = sorted(name for name in sys.modules if name.split('.')[0] in ('nlu', 'learning', 'memory', 'ipc', 'metrics'))
+assert not top_level, top_level
+assert modules.system.get_app_gazetteer is app_gazetteer.get_app_gazetteer
+'''
+
+def test_main_and_modules_share_one_import_path(tmp_path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(STAND_INS), str(ROOT)]))
+    result = subprocess.run(
+        [sys.executable, '-c', SINGLE_IMPORT_PATH, str(ROOT / 'brain' / 'main.py')],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_main_uses_the_core_brain_q_storage(tmp_path):
+    # A table left by the JSON backend is migrated, as brain_core does
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'q_learning.json').write_text(json.dumps({'open safari:system.open': 0.5}))
+    command = json.dumps({'type': 'command', 'id': 1, 'message': 'open safari'})
+    run_brain(tmp_path, [command])
+    
+    assert (tmp_path / 'data' / 'q_learning.bin').exists()
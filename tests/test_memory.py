@@ -0,0 +1,139 @@
+"""
+Memory manager tests
+Hot and cold recall, indexed queries and retried batch writes
+"""
+
+import asyncio
+import itertools
+import sqlite3
+import types
+
+import pytest
+
+from brain import memory
+from brain.memory import MemoryManager
+
+INTERACTIONS = [
+    ('open safari', 'system.open', {'app': 'Safari'}),
+    ('set volume to 40', 'system.volume', {'numbers': [40]}),
+    ('play jazz', 'music.play', {}),
+    ('open notes', 'system.open', {'app': 'Notes'}),
+    ('close safari', 'system.close', {'app': 'Safari'}),
+    ('systems check', 'systems.check', {})
+]
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Interaction i is stored at timestamp 1000 + i"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(memory, 'time', types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+async def store_all(manager, interactions=INTERACTIONS):
+    for message, intent, entities in interactions:
+        perception = {'raw_input': message, 'intent': {'intent': intent, 'confidence': 0.9}, 'entities': entities}
+        await manager.store_interaction(perception, {'module': intent.split('.')[0]})
+
+def messages(records):
+    return [record['message'] for record in records]
+
+def test_recent_queries_stay_in_the_hot_tier(tmp_path, clock):
+    async def scenario():
+        manager = MemoryManager(tmp_path / 'memory.db', hot_size=3, delay=60.0)
+        await manager.load()
+        await store_all(manager)
+        
+        hot = await manager.recall(since=1003)
+        hot_stats = manager.get_stats()
+        cold = await manager.recall(since=1001)
+        stats = manager.get_stats()
+        await manager.close()
+        return hot, hot_stats, cold, stats
+        
+    hot, hot_stats, cold, stats = asyncio.run(scenario())
+    assert messages(hot) == ['systems check', 'close safari', 'open notes']
+    # Answered before anything was written
+    assert (hot_stats['hot_queries'], hot_stats['cold_queries'], hot_stats['stored']) == (1, 0, 0)
+    
+    # Older than the hot tier: queued records are flushed, then read back
+    assert messages(cold) == ['systems check', 'close safari', 'open notes', 'play jazz', 'set volume to 40']
+    assert (stats['cold_queries'], stats['stored']) == (1, len(INTERACTIONS))
+
+@pytest.mark.parametrize('hot_size', [100, 2], ids=['hot', 'cold'])
+def test_intent_prefix_and_entity_queries(tmp_path, clock, hot_size):
+    async def scenario():
+        manager = MemoryManager(tmp_path / 'memory.db', hot_size=hot_size, delay=60.0)
+        await manager.load()
+        await store_all(manager)
+        
+        results = {
+            'prefix': await manager.recall(intent='system.', since=1000),
+            'exact': await manager.recall(intent='system.open', since=1000),
+            'until': await manager.recall(intent='system.', since=1000, until=1003),
+            'app': await manager.recall(entity='app', since=1000),
+            'safari': await manager.recall(entity='app', value='Safari', since=1000),
+            'number': await manager.recall(entity='numbers', value=40, since=1000),
+            'limit': await manager.recall(intent='system.', since=1000, limit=2)
+        }
+        await manager.close()
+        return results
+        
+    results = asyncio.run(scenario())
+    # 'systems.check' shares the characters but not the 'system.' domain
+    assert messages(results['prefix']) == ['close safari', 'open notes', 'set volume to 40', 'open safari']
+    assert messages(results['exact']) == ['open notes', 'open safari']
+    assert messages(results['until']) == ['set volume to 40', 'open safari']
+    assert messages(results['app']) == ['close safari', 'open notes', 'open safari']
+    assert messages(results['safari']) == ['close safari', 'open safari']
+    assert messages(results['number']) == ['set volume to 40']
+    assert messages(results['limit']) == ['close safari', 'open notes']
+
+def test_hot_tier_is_warmed_from_the_database(tmp_path, clock):
+    async def scenario():
+        manager = MemoryManager(tmp_path / 'memory.db', hot_size=3, delay=60.0)
+        await manager.load()
+        await store_all(manager)
+        await manager.close()
+        
+        reopened = MemoryManager(tmp_path / 'memory.db', hot_size=3)
+        await reopened.load()
+        recent = reopened.recent(5)
+        await reopened.close()
+        return recent
+        
+    recent = asyncio.run(scenario())
+    assert messages(recent) == ['systems check', 'close safari', 'open notes']
+    assert recent[1]['entities'] == {'app': 'Safari'}
+
+def test_failed_batch_is_written_with_the_next_one(tmp_path, clock):
+    async def scenario():
+        manager = MemoryManager(tmp_path / 'memory.db', delay=60.0)
+        manager.scheduler.retry_delay = 60.0
+        await manager.load()
+        
+        real_write = manager.scheduler.write
+        failures = []
+        
+        def write(batch):
+            if not failures:
+                failures.append(len(batch))
+                raise sqlite3.OperationalError('database is locked')
+            real_write(batch)
+            
+        manager.scheduler.write = write
+        await store_all(manager, INTERACTIONS[:2])
+        await manager.flush()
+        failed_stats = manager.get_stats()
+        
+        await store_all(manager, INTERACTIONS[2:4])
+        await manager.flush()
+        stats = manager.get_stats()
+        rows = manager.reader.execute('SELECT message FROM interactions ORDER BY timestamp').fetchall()
+        await manager.close()
+        return failures, failed_stats, stats, rows
+        
+    failures, failed_stats, stats, rows = asyncio.run(scenario())
+    assert failures == [2]
+    assert failed_stats['stored'] == 0
+    # Both batches land once each, in order
+    assert [message for message, in rows] == [message for message, _, _ in INTERACTIONS[:4]]
+    assert (stats['stored'], stats['pending'], stats['writes']) == (4, 0, 1)
@@ -0,0 +1,89 @@
+"""
+Brain metrics tests
+"""
+
+import math
+import random
+
+from brain import metrics
+from brain.metrics import BrainMetrics, LatencyHistogram
+
+def exact_quantile(values, q):
+    """Nearest-rank quantile, the definition LatencyHistogram.quantile() follows"""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q * len(ordered))) - 1]
+
+def sample_durations():
+    rng = random.Random(3)
+    # From sub-microsecond to seconds, so every bucket scale is exercised
+    return [int(rng.lognormvariate(13, 3)) + 1 for _ in range(5000)]
+
+def assert_quantiles_close(histogram, values):
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 1.0):
+        expected = exact_quantile(values, q)
+        assert expected <= histogram.quantile(q) <= expected * (1 + 1 / metrics.SUB_BUCKETS)
+
+def test_quantiles_within_one_sub_bucket():
+    values = sample_durations()
+    histogram = LatencyHistogram()
+    for ns in values:
+        histogram.record(ns)
+        
+    assert histogram.count == len(values)
+    assert histogram.max == max(values)
+    assert_quantiles_close(histogram, values)
+
+def test_batched_recording_matches_single():
+    values = sample_durations()
+    single, batched = LatencyHistogram(), LatencyHistogram()
+    for ns in values:
+        single.record(ns)
+    batched.record_many(values[:1234])
+    batched.record_many(values[1234:])
+    
+    assert list(batched.counts) == list(single.counts)
+    assert (batched.count, batched.total, batched.max) == (single.count, single.total, single.max)
+    assert_quantiles_close(batched, values)
+
+def test_batched_recording_without_numpy(monkeypatch):
+    monkeypatch.setattr(metrics, 'np', None)
+    values = sample_durations()
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    
+    assert_quantiles_close(histogram, values)
+
+def record(brain_metrics, module='system'):
+    """What the timed pipeline does for one request"""
+    if brain_metrics.skip:
+        brain_metrics.skip -= 1
+        return
+    brain_metrics.record_request(module, 0, 100, 300, 600)
+
+def test_sampling_counts_every_request():
+    brain_metrics = BrainMetrics(enabled=True, sample_every=4)
+    assert brain_metrics.requests == 0
+    
+    for count in range(1, 11):
+        record(brain_metrics)
+        assert brain_metrics.requests == count
+        
+    stats = brain_metrics.get_stats()
+    assert stats['requests'] == 10
+    assert stats['sample_every'] == 4
+    # Requests 1, 5 and 9
+    assert stats['stages']['reason']['count'] == 3
+    assert stats['pipeline_by_module']['system']['count'] == 3
+
+def test_render_names_pipeline_time_by_module():
+    brain_metrics = BrainMetrics(enabled=True, sample_every=1)
+    brain_metrics.add_source('perception_cache', lambda: {'hits': 2, 'misses': 1})
+    record(brain_metrics, 'system')
+    record(brain_metrics, None)
+    
+    lines = brain_metrics.render().splitlines()
+    assert 'nyx_requests_total 2' in lines
+    assert 'nyx_pipeline_seconds_count{module="system"} 1' in lines
+    assert 'nyx_pipeline_seconds_sum{module="None"} 0.000000600' in lines
+    assert 'nyx_stage_seconds_count{stage="learn"} 2' in lines
+    assert 'nyx_perception_cache_hits 2' in lines
@@ -0,0 +1,122 @@
+"""
+Module loader tests
+Manifests are read without importing, modules load on first use and
+hot reloads keep a working version serving
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+from modules.module_loader import ModuleLoader
+
+MODULE = '''
+from pathlib import Path
+
+# Every import of this file leaves a line here
+with open(Path(__file__).with_name('imports.log'), 'a') as log:
+    log.write('clock\\n')
+{body}
+class ClockModule:
+    intents = ['time.now', 'time.zone']
+    
+    def __init__(self, core):
+        self.core = core
+        
+    async def execute(self, message, decision):
+        return {{'text': {reply!r}, 'type': 'info'}}
+'''
+
+def write_clock(directory, reply, version=0, body=''):
+    path = directory / 'clock.py'
+    path.write_text(MODULE.format(reply=reply, body=body))
+    # Distinct stamps even within one mtime tick
+    os.utime(path, ns=(version * 10 ** 9, version * 10 ** 9))
+    return path
+
+def imports(directory):
+    log = directory / 'imports.log'
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+def test_scan_reads_manifests_without_importing(tmp_path):
+    write_clock(tmp_path, 'tick')
+    (tmp_path / 'helpers.py').write_text('raise RuntimeError("not a module")\n')
+    loader = ModuleLoader(None, tmp_path)
+    
+    manifests = loader.scan()
+    
+    assert set(manifests) == {'clock'}
+    assert manifests['clock']['class_name'] == 'ClockModule'
+    assert manifests['clock']['intents'] == ['time.now', 'time.zone']
+    assert loader.module_for_intent('time.zone') == 'clock'
+    assert imports(tmp_path) == 0
+    assert f'{tmp_path.name}.clock' not in sys.modules
+    assert loader.get_stats()['loaded'] == 0
+
+def test_first_execute_imports_the_module_once(tmp_path):
+    write_clock(tmp_path, 'tick')
+    loader = ModuleLoader(None, tmp_path)
+    loader.scan()
+    
+    async def scenario():
+        # Concurrent first uses share one load
+        first = await asyncio.gather(*(loader.execute('clock', 'time', {}) for _ in range(3)))
+        return first, await loader.execute('clock', 'time', {})
+        
+    first, later = asyncio.run(scenario())
+    assert [result['text'] for result in first] == ['tick'] * 3
+    assert later['text'] == 'tick'
+    assert imports(tmp_path) == 1
+    assert loader.get_stats()['loaded'] == 1
+
+def test_unknown_module_is_reported():
+    loader = ModuleLoader(None, '/nonexistent/modules')
+    loader.scan()
+    
+    result = asyncio.run(loader.execute('clock', 'time', {}))
+    assert result['type'] == 'error'
+
+def test_edited_module_is_picked_up(tmp_path):
+    write_clock(tmp_path, 'tick')
+    loader = ModuleLoader(None, tmp_path)
+    loader.scan()
+    
+    async def scenario():
+        before = await loader.execute('clock', 'time', {})
+        write_clock(tmp_path, 'tock', version=1)
+        reloaded = await loader.check_for_changes()
+        return before, reloaded, await loader.execute('clock', 'time', {})
+        
+    before, reloaded, after = asyncio.run(scenario())
+    assert (before['text'], after['text']) == ('tick', 'tock')
+    assert reloaded == ['clock']
+    assert loader.get_stats()['reloads'] == 1
+
+@pytest.mark.parametrize('broken', [
+    {'reply': 'tock', 'body': 'def unfinished(:\n'},
+    {'reply': 'tock', 'body': 'raise ImportError("missing dependency")\n'}
+], ids=['syntax error', 'import error'])
+def test_failed_reload_keeps_the_previous_version(tmp_path, broken):
+    write_clock(tmp_path, 'tick')
+    loader = ModuleLoader(None, tmp_path)
+    loader.scan()
+    
+    async def scenario():
+        await loader.execute('clock', 'time', {})
+        write_clock(tmp_path, version=1, **broken)
+        reloaded = await loader.check_for_changes()
+        after_failure = await loader.execute('clock', 'time', {})
+        
+        # A fixed file is picked up again
+        write_clock(tmp_path, 'tock', version=2)
+        await loader.check_for_changes()
+        return reloaded, after_failure, await loader.execute('clock', 'time', {})
+        
+    reloaded, after_failure, fixed = asyncio.run(scenario())
+    assert reloaded == []
+    assert after_failure['text'] == 'tick'
+    assert loader.get_stats()['failed_reloads'] == 1
+    assert loader.manifests['clock']['intents'] == ['time.now', 'time.zone']
+    assert fixed['text'] == 'tock'
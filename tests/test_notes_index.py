@@ -0,0 +1,70 @@
+"""
+Notes index tests
+Incremental sync, and notes added while a sync is running
+"""
+
+import asyncio
+
+from modules.notes_index import NotesIndex
+
+class FakeSource:
+    """Notes source whose listing can be held back to interleave an add()"""
+    
+    def __init__(self, notes):
+        self.notes = notes
+        self.listed = None
+        self.release = None
+        self.fetched = []
+        
+    async def list_notes(self):
+        listing = [(note_id, name, modified) for note_id, (name, modified, _) in self.notes.items()]
+        if self.release is not None:
+            self.listed.set()
+            await self.release.wait()
+        return listing
+        
+    async def fetch(self, ids):
+        self.fetched.extend(ids)
+        return {note_id: self.notes[note_id][2] for note_id in ids}
+
+def test_sync_fetches_only_changed_notes(tmp_path):
+    source = FakeSource({'1': ('Groceries', 'v1', 'milk'), '2': ('Ideas', 'v1', 'nyx')})
+    index = NotesIndex(source, path=tmp_path / 'notes.db')
+    
+    asyncio.run(index.sync())
+    source.notes['2'] = ('Ideas', 'v2', 'nyx and notes')
+    del source.notes['1']
+    stats = asyncio.run(index.sync())
+    
+    assert stats == {'notes': 1, 'changed': 1, 'removed': 1}
+    assert source.fetched == ['1', '2', '2']
+    assert index.search('notes') == [('Ideas', 'nyx and notes')]
+    index.close()
+
+def test_note_added_during_sync_is_kept(tmp_path):
+    source = FakeSource({'1': ('Groceries', 'v1', 'milk')})
+    index = NotesIndex(source, path=tmp_path / 'notes.db')
+    asyncio.run(index.sync())
+    
+    async def scenario():
+        source.listed = asyncio.Event()
+        source.release = asyncio.Event()
+        sync = asyncio.ensure_future(index.sync())
+        await source.listed.wait()
+        
+        # Created after the listing was taken
+        index.add('2', 'Call Alex', 'v1', 'about the trip')
+        source.notes['2'] = ('Call Alex', 'v1', 'about the trip')
+        source.release.set()
+        return await sync
+        
+    stats = asyncio.run(scenario())
+    assert stats['removed'] == 0
+    assert index.recent() == ['Call Alex', 'Groceries']
+    assert index.search('trip') == [('Call Alex', 'about the trip')]
+    
+    # The next sync sees it in the listing
+    source.listed = source.release = None
+    asyncio.run(index.sync())
+    assert index.recent() == ['Groceries', 'Call Alex']
+    index.close()
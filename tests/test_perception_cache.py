@@ -0,0 +1,64 @@
+"""
+Perception cache tests
+"""
+
+import pytest
+
+from brain.brain_core import NyxBrain
+from brain.perception_cache import PerceptionCache
+
+def test_get_returns_independent_nested_copies():
+    cache = PerceptionCache()
+    cache.put('timer 5 minutes', {'intent': 'time.timer', 'confidence': 0.85},
+              {'numbers': [5], 'duration': {'value': 5, 'unit': 'minutes', 'seconds': 300}})
+              
+    intent, entities, _ = cache.get('timer 5 minutes')
+    intent['confidence'] = 0.1
+    entities['numbers'].append(99)
+    entities['duration']['seconds'] = 0
+    entities.setdefault('app', 'Safari')
+    
+    intent, entities, _ = cache.get('timer 5 minutes')
+    assert intent == {'intent': 'time.timer', 'confidence': 0.85}
+    assert entities == {'numbers': [5], 'duration': {'value': 5, 'unit': 'minutes', 'seconds': 300}}
+
+def test_put_does_not_keep_caller_objects():
+    cache = PerceptionCache()
+    entities = {'numbers': [40]}
+    cache.put('volume 40', {'intent': 'system.volume', 'confidence': 0.85}, entities)
+    entities['numbers'][0] = 0
+    
+    assert cache.get('volume 40')[1] == {'numbers': [40]}
+
+def test_evicts_least_recently_used():
+    cache = PerceptionCache(max_size=2)
+    for key in ('a', 'b'):
+        cache.put(key, {'intent': 'unknown', 'confidence': 0.3}, {})
+    cache.get('a')
+    cache.put('c', {'intent': 'unknown', 'confidence': 0.3}, {})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.evictions == 1
+
+def test_boost_flag_is_kept_with_the_entry():
+    cache = PerceptionCache()
+    cache.put('open safari', {'intent': 'system.open', 'confidence': 0.95}, {}, boosted=True)
+    cache.put('play jazz', {'intent': 'music.play', 'confidence': 0.85}, {})
+    
+    assert cache.get('open safari')[2] is True
+    assert cache.get('play jazz')[2] is False
+
+def test_cache_hits_count_q_boosts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    brain = NyxBrain(None)
+    boosts = {'open safari': 0.1}
+    monkeypatch.setattr(brain.q_learning, 'get_confidence_boost', lambda message, intent: boosts.get(message, 0))
+    
+    for message in ('open safari', 'open safari', 'Open Safari', 'play jazz', 'play jazz'):
+        brain._perceive_cached(message)
+        
+    assert brain.perception_cache.hits == 3
+    # Every perception of the boosted message, cached or not
+    assert brain.q_boosts == 3
+    assert brain._perceive_cached('open safari')[0]['confidence'] == pytest.approx(0.95)
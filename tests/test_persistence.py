@@ -0,0 +1,115 @@
+"""
+Persistence scheduler tests
+Coalesced writes, retries after a failed write, and journal compaction
+"""
+
+import asyncio
+import signal
+
+from brain import brain_core
+from brain.learning.persistence import PersistenceScheduler
+from brain.learning.q_learning import QLearningSystem
+from brain.learning.q_storage import JournalStorage
+
+def test_burst_of_changes_is_one_write():
+    written = []
+    
+    async def scenario():
+        state = {'value': 0}
+        scheduler = PersistenceScheduler(lambda: dict(state), written.append, delay=0.01)
+        for value in range(10):
+            state['value'] = value
+            scheduler.mark_dirty()
+        await asyncio.sleep(0.05)
+        return scheduler.get_stats()
+        
+    stats = asyncio.run(scenario())
+    assert written == [{'value': 9}]
+    assert stats['writes'] == 1 and stats['changes'] == 10
+
+def test_failed_write_is_retried():
+    attempts = []
+    
+    def write(snapshot):
+        attempts.append(snapshot)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+            
+    async def scenario():
+        scheduler = PersistenceScheduler(lambda: 'state', write, delay=0.0, retry_delay=0.01)
+        scheduler.mark_dirty()
+        await asyncio.sleep(0.05)
+        return scheduler.get_stats()
+        
+    stats = asyncio.run(scenario())
+    assert attempts == ['state', 'state']
+    assert stats['failures'] == 1 and stats['writes'] == 1 and not stats['dirty']
+
+def test_journal_compaction_retries_and_keeps_the_rotated_log(tmp_path, monkeypatch):
+    async def scenario():
+        storage = JournalStorage(tmp_path, compact_every=2)
+        storage.scheduler.retry_delay = 0.05
+        q_table = storage.load()
+        
+        real_write = storage.scheduler.write
+        failures = []
+        
+        def write(snapshot):
+            if not failures:
+                failures.append(snapshot)
+                raise OSError("disk full")
+            real_write(snapshot)
+            
+        monkeypatch.setattr(storage.scheduler, 'write', write)
+        
+        q_table.update({'a:x': 0.1, 'b:x': 0.2})
+        await storage.record_many([('a:x', 0.1), ('b:x', 0.2)], q_table)
+        await asyncio.sleep(0.02)
+        rotated_after_failure = storage.rotated_log_file.exists()
+        
+        await asyncio.sleep(0.1)
+        await storage.close(q_table)
+        return rotated_after_failure, failures
+        
+    rotated_after_failure, failures = asyncio.run(scenario())
+    assert failures and rotated_after_failure
+    assert not (tmp_path / 'q_learning.log.compacting').exists()
+    assert JournalStorage(tmp_path).load() == {'a:x': 0.1, 'b:x': 0.2}
+
+def test_feedback_burst_on_the_compact_backend_is_one_append(tmp_path, monkeypatch):
+    async def scenario():
+        q_learning = QLearningSystem(tmp_path, storage='compact', similarity=True)
+        await q_learning.initialize()
+        appends = []
+        real_append = q_learning.storage.appender.write
+        monkeypatch.setattr(q_learning.storage.appender, 'write', lambda batch: (appends.append(batch), real_append(batch)))
+        
+        for _ in range(10):
+            await q_learning.update_q_value('open safari', 'system.open', 1.0)
+        log_size = q_learning.storage.log_file.stat().st_size
+        await asyncio.sleep(0.02)
+        await q_learning.close()
+        return appends, log_size
+        
+    appends, log_size = asyncio.run(scenario())
+    # Nothing reached the log on the event loop, and the burst was one write
+    assert log_size == 0
+    assert len(appends) == 1 and appends[0][1].count('\n') == 10
+
+def test_exit_signal_flushes_before_stopping(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    raised = []
+    monkeypatch.setattr(brain_core.signal, 'raise_signal', raised.append)
+    
+    async def scenario():
+        brain = brain_core.NyxBrain(None)
+        await brain.initialize()
+        await brain.q_learning.update_q_value('open safari', 'system.open', 1.0)
+        brain._on_exit_signal(signal.SIGTERM)
+        await asyncio.sleep(0.05)
+        return brain
+        
+    brain = asyncio.run(scenario())
+    assert brain.closed
+    assert raised == [signal.SIGTERM]
+    assert (tmp_path / 'data' / 'q_learning.log').read_text().startswith('["open safari:system.open"')
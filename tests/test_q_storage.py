@@ -0,0 +1,139 @@
+"""
+Q-table storage tests
+Journal replay, torn records and interrupted compactions
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from brain.learning import q_storage
+from brain.learning.q_storage import CompactStorage, JournalStorage
+
+@pytest.fixture(params=[JournalStorage, CompactStorage])
+def storage_class(request):
+    return request.param
+
+def test_log_is_replayed_on_load(tmp_path, storage_class):
+    async def scenario():
+        storage = storage_class(tmp_path)
+        q_table = storage.load()
+        for key, value in [('open safari:system.open', 0.1), ('bonjour:unknown', -0.05), ('open safari:system.open', 0.19)]:
+            q_table[key] = value
+            await storage.record(key, value, q_table)
+        await storage.close(q_table)
+        
+        reloaded = storage_class(tmp_path)
+        q_table = reloaded.load()
+        values = {key: q_table[key] for key in ('open safari:system.open', 'bonjour:unknown')}
+        await reloaded.close(q_table)
+        return values
+        
+    values = asyncio.run(scenario())
+    assert values['open safari:system.open'] == pytest.approx(0.19)
+    assert values['bonjour:unknown'] == pytest.approx(-0.05)
+
+def test_torn_final_record_is_truncated(tmp_path, capsys):
+    log = tmp_path / 'q_learning.log'
+    good = json.dumps(['a:x', 0.5]) + '\n'
+    log.write_text(good + '["b:x", 0.')
+    
+    storage = JournalStorage(tmp_path)
+    q_table = storage.load()
+    storage.log.close()
+    
+    assert q_table == {'a:x': 0.5}
+    assert log.read_text() == good
+    captured = capsys.readouterr()
+    assert 'Truncating torn record' in captured.err
+    assert captured.out == ''
+
+def test_interrupted_compaction_is_finished_on_load(tmp_path):
+    (tmp_path / 'q_learning.json').write_text(json.dumps({'a:x': 0.1}))
+    (tmp_path / 'q_learning.log.compacting').write_text(json.dumps(['a:x', 0.2]) + '\n')
+    (tmp_path / 'q_learning.log').write_text(json.dumps(['b:x', 0.3]) + '\n')
+    
+    storage = JournalStorage(tmp_path)
+    q_table = storage.load()
+    storage.log.close()
+    
+    assert q_table == {'a:x': 0.2, 'b:x': 0.3}
+    assert not (tmp_path / 'q_learning.log.compacting').exists()
+    assert json.loads((tmp_path / 'q_learning.json').read_text()) == q_table
+    assert (tmp_path / 'q_learning.log').read_text() == ''
+
+def test_compaction_folds_log_into_snapshot(tmp_path, storage_class):
+    async def scenario():
+        storage = storage_class(tmp_path, compact_every=10)
+        q_table = storage.load()
+        records = [(f'message {i}:unknown', i / 100) for i in range(25)]
+        for key, value in records:
+            q_table[key] = value
+        await storage.record_many(records, q_table)
+        await storage.save(q_table)
+        await storage.close(q_table)
+        
+        reloaded = storage_class(tmp_path)
+        q_table = reloaded.load()
+        values = {key: q_table[key] for key, _ in records}
+        await reloaded.close(q_table)
+        return records, values
+        
+    records, values = asyncio.run(scenario())
+    assert (tmp_path / 'q_learning.log').stat().st_size == 0
+    for key, value in records:
+        assert values[key] == pytest.approx(value)
+
+def test_batches_are_fsynced_by_default(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    
+    def fsync(fd):
+        synced.append(fd)
+        real_fsync(fd)
+        
+    monkeypatch.setattr(q_storage.os, 'fsync', fsync)
+    
+    async def scenario():
+        storage = JournalStorage(tmp_path)
+        q_table = storage.load()
+        q_table['a:x'] = 0.1
+        await storage.record_many([('a:x', 0.1), ('a:x', 0.1)], q_table)
+        await storage.close(q_table)
+        
+    asyncio.run(scenario())
+    assert len(synced) == 1
+
+def test_appends_are_written_off_the_event_loop(tmp_path, monkeypatch, storage_class):
+    synced = []
+    real_fsync = os.fsync
+    
+    def fsync(fd):
+        synced.append(fd)
+        real_fsync(fd)
+        
+    monkeypatch.setattr(q_storage.os, 'fsync', fsync)
+    
+    async def scenario():
+        storage = storage_class(tmp_path, append_delay=60.0)
+        q_table = storage.load()
+        for value in (0.1, 0.2, 0.3):
+            q_table['a:x'] = value
+            await storage.record('a:x', value, q_table)
+            
+        # Queued, not yet on disk
+        assert synced == []
+        assert (tmp_path / 'q_learning.log').stat().st_size == 0
+        await storage.close(q_table)
+        
+        reloaded = storage_class(tmp_path)
+        q_table = reloaded.load()
+        value = q_table['a:x']
+        await reloaded.close(q_table)
+        return value
+        
+    assert asyncio.run(scenario()) == pytest.approx(0.3)
+    # The three records went out in one write
+    assert len(synced) == 1
@@ -0,0 +1,41 @@
+"""
+Perception cache invalidation tests
+A Q-value update drops only the perceptions it can change
+"""
+
+import asyncio
+
+from brain.brain_core import NyxBrain
+from brain.learning.q_learning import QLearningSystem
+from brain.learning.similarity_index import SimilarityIndex
+
+def test_similar_keeps_only_lsh_neighbours():
+    index = SimilarityIndex()
+    candidates = ['safari, open', 'set a timer for ten minutes', '...']
+    matches = index.similar('open safari', candidates)
+    assert 'safari, open' in matches
+    assert 'set a timer for ten minutes' not in matches
+    assert '...' not in matches
+
+def test_q_update_evicts_message_and_neighbours_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    brain = NyxBrain(None)
+    cache = brain.perception_cache
+    for key in ('open safari', 'safari, open', 'set a timer for ten minutes'):
+        cache.put(key, {'intent': 'system.open', 'confidence': 0.9}, {})
+        
+    brain._on_q_value_update('open safari', 'system.open', 0.1)
+    
+    assert set(cache.entries) == {'set a timer for ten minutes'}
+    assert cache.invalidations == 2
+
+def test_index_build_task_is_kept(tmp_path):
+    async def scenario():
+        q_learning = QLearningSystem(data_dir=tmp_path, storage='journal', similarity=True)
+        await q_learning.initialize()
+        task = q_learning.index_task
+        await task
+        await q_learning.close()
+        return task
+        
+    assert asyncio.run(scenario()).done()
@@ -0,0 +1,53 @@
+"""
+Script runner tests
+Crashed workers are replaced, but a request that may have run is not re-sent
+"""
+
+import asyncio
+import sys
+
+import pytest
+
+from conftest import ROOT
+from modules.script_runner import ScriptRunner
+
+STAND_IN = [sys.executable, str(ROOT / 'benchmarks' / 'stand_ins' / 'osascript.py')]
+
+# Counts each request it reads in a file, then dies without answering
+CRASHING_WORKER = '''
+import sys
+sys.stdin.readline()
+with open(sys.argv[1], 'a') as f:
+    f.write('ran\\n')
+'''
+
+def test_request_that_reached_a_crashing_worker_is_not_retried(tmp_path):
+    runs = tmp_path / 'runs'
+    
+    async def scenario():
+        runner = ScriptRunner([sys.executable, '-c', CRASHING_WORKER, str(runs)], pool_size=1)
+        with pytest.raises(ConnectionError):
+            await runner.request({'script': 'make new note'})
+        await runner.close()
+        return runner.get_stats()
+        
+    stats = asyncio.run(scenario())
+    assert runs.read_text() == 'ran\n'
+    assert stats['restarts'] == 0
+
+def test_worker_that_died_while_idle_is_replaced_before_sending(tmp_path):
+    async def scenario():
+        runner = ScriptRunner(STAND_IN, pool_size=1)
+        assert await runner.request({'script': 'return 1'}) == ''
+        
+        worker = runner.workers[0]
+        worker.process.kill()
+        await worker.process.stdout.read()
+        
+        result = await runner.request({'script': 'return 1'})
+        await runner.close()
+        return result, runner.get_stats()
+        
+    result, stats = asyncio.run(scenario())
+    assert result == ''
+    assert stats['requests'] == 2
@@ -0,0 +1,41 @@
+"""
+Script template tests
+Every declared template compiles, and parameters avoid AppleScript terms
+"""
+
+import asyncio
+import shutil
+import sys
+
+import pytest
+
+import modules.notes
+import modules.notes_index
+import modules.system
+from conftest import ROOT
+from modules.script_templates import DECLARED_TEMPLATES, OsaCompiler, ScriptTemplate, TemplateRegistry
+
+def test_reserved_parameter_names_are_refused():
+    for name in ('app', 'text', 'Result'):
+        with pytest.raises(ValueError):
+            ScriptTemplate('broken', f'tell application {name} to activate', **{name: str})
+    assert 'broken' not in DECLARED_TEMPLATES
+
+def test_system_templates_take_app_name():
+    assert list(modules.system.ACTIVATE_APP.params) == ['app_name']
+    assert list(modules.system.QUIT_APP.params) == ['app_name']
+
+def compile_all(compiler, cache_dir):
+    registry = TemplateRegistry(runner=object(), compiler=compiler, cache_dir=cache_dir)
+    asyncio.run(registry.compile_all())
+    return registry
+
+def test_compile_all_compiles_each_template_once(tmp_path):
+    compiler = OsaCompiler([sys.executable, str(ROOT / 'benchmarks' / 'stand_ins' / 'osacompile.py')])
+    registry = compile_all(compiler, tmp_path)
+    assert {'activate_app', 'quit_app', 'create_note', 'fetch_note_body'} <= set(DECLARED_TEMPLATES)
+    assert registry.compilations == len(DECLARED_TEMPLATES)
+
+@pytest.mark.skipif(shutil.which('osacompile') is None, reason='osacompile needs macOS')
+def test_every_template_compiles_with_osacompile(tmp_path):
+    compile_all(OsaCompiler(), tmp_path)